@@ -2,9 +2,13 @@ import streamlit as st
 import tempfile
 import os
 from video_processing.reel_generator import ReelGenerator
+from video_processing.pipeline import EventPipeline
+from utils import profiling
+from utils.memory import MemoryBudget
 import plotly.graph_objects as go
 import time
 import subprocess
+import shutil
 from contextlib import ExitStack
 import gc
 
@@ -324,6 +328,10 @@ uploaded_files = st.file_uploader(
     type=["mp4"],
     accept_multiple_files=True
 )
+sync_angles = st.checkbox(
+    "These videos are different camera angles of the same event",
+    help="Align the videos by their audio and show each moment once, from its best angle"
+)
 st.markdown('</div>', unsafe_allow_html=True)
 
 # --- REEL GENERATION SECTION ---
@@ -332,8 +340,18 @@ st.header("✨ Generate AI Reel")
 reel_path = None
 generator = ReelGenerator()
 
-def handle_video_upload(uploaded_files):
+@st.cache_resource
+def get_pipeline():
+    # One pipeline per server process: the models load once and the thread pool is shared by all
+    # sessions and reruns. Stay below the 4 GB container limit unless AI_EVENT_MEMORY_LIMIT_MB says otherwise
+    budget = MemoryBudget.from_env(default_mb=3584)
+    return EventPipeline(max_concurrent_videos=2, memory_budget=budget,
+                         detector_options={'face_model_path': os.path.join('models', 'yolov8n-face.pt')})
+
+@profiling.timed('app.handle_video_upload')
+def handle_video_upload(uploaded_files, sync_angles=False):
     with ExitStack() as stack:
+        job_metrics = stack.enter_context(profiling.job())
         temp_video_paths = []
         progress_bar = st.progress(0)
         status_text = st.empty()
@@ -346,20 +364,35 @@ def handle_video_upload(uploaded_files):
                 
             # Save uploaded files
             status_text.text("📥 Saving uploaded files...")
-            for i, file in enumerate(uploaded_files):
-                temp_file = stack.enter_context(tempfile.NamedTemporaryFile(suffix=".mp4", delete=False))
-                temp_file.write(file.getvalue())
-                temp_file.flush()
-                temp_video_paths.append(temp_file.name)
-                progress_bar.progress((i + 1) * 20 // len(uploaded_files))
+            with profiling.timer('app.save_uploads'):
+                for i, file in enumerate(uploaded_files):
+                    temp_file = stack.enter_context(tempfile.NamedTemporaryFile(suffix=".mp4", delete=False))
+                    file.seek(0)
+                    shutil.copyfileobj(file, temp_file)
+                    temp_file.flush()
+                    temp_video_paths.append(temp_file.name)
+                    progress_bar.progress((i + 1) * 20 // len(uploaded_files))
             
             # Generate reel
             status_text.text("🎬 Generating reel...")
-            generator = ReelGenerator()
-            output_path = generator.merge_clips(
-                temp_video_paths,
-                progress_callback=lambda p: progress_bar.progress(20 + int(p * 0.8))
-            )
+            stage_labels = {
+                'analyze': "🔍 Detecting highlights...",
+                'extract': "✂️ Extracting clips...",
+                'merge': "🎬 Merging clips...",
+                'captions': "💬 Adding captions...",
+                'title': "🏷️ Adding title screen..."
+            }
+            
+            def on_progress(event):
+                status_text.text(stage_labels[event['stage']])
+                progress_bar.progress(20 + int(event['overall'] * 80))
+            
+            output_path = stack.enter_context(tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)).name
+            result = get_pipeline().run_sync(temp_video_paths, output_path, progress_callback=on_progress,
+                                             sync_angles=sync_angles)
+            
+            if profiling.is_enabled():
+                st.session_state.last_profile = dict(job_metrics.report(), memory=result['memory'])
             
             return output_path
             
@@ -379,10 +412,13 @@ def handle_video_upload(uploaded_files):
             gc.collect()
 
 if uploaded_files:
-    reel_path = handle_video_upload(uploaded_files)
+    reel_path = handle_video_upload(uploaded_files, sync_angles)
     if reel_path and os.path.exists(reel_path):
         st.success("✨ Your AI-generated reel is ready!")
         st.video(reel_path)
+        if profiling.is_enabled() and 'last_profile' in st.session_state:
+            with st.expander("⏱️ Processing profile"):
+                st.json(st.session_state.last_profile)
         with open(reel_path, "rb") as f:
             st.download_button(
                 label="⬇️ Download Reel",
@@ -0,0 +1,311 @@
+import asyncio
+import contextlib
+import csv
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import click
+from threadpoolctl import threadpool_limits
+
+from utils import profiling
+from utils.helpers import ensure_dir, list_video_files, load_json, save_json
+from utils.memory import MemoryBudget
+from video_processing.pipeline import EventPipeline
+from video_processing.reel_generator import ReelGenerator
+
+TIMED_STAGES = ['analyze', 'extract', 'merge', 'total']
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Load the videos to process from a manifest.
+
+    A JSON manifest is a list of video paths or of objects with a 'video' key and
+    optional 'name' and 'title' keys; any other file lists one video path per line.
+    Relative paths are resolved against the manifest directory.
+
+    Args:
+        manifest_path (str): Path to the manifest
+
+    Returns:
+        List[Dict[str, Any]]: Job entries with 'video' and optional 'name'/'title'
+    """
+    base_dir = Path(manifest_path).parent
+    if manifest_path.endswith('.json'):
+        entries = load_json(manifest_path)
+    else:
+        with open(manifest_path) as f:
+            entries = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    jobs = []
+    for entry in entries:
+        job = {'video': entry} if isinstance(entry, str) else dict(entry)
+        job['video'] = str(base_dir / job['video'])
+        jobs.append(job)
+    return jobs
+
+def collect_jobs(source: str, output_dir: str) -> List[Dict[str, Any]]:
+    """
+    Build the job list for a directory or a manifest.
+
+    Args:
+        source (str): Directory of videos or manifest file
+        output_dir (str): Directory for reels and per-video results
+
+    Returns:
+        List[Dict[str, Any]]: Jobs with 'video', 'name', 'title', 'reel' and 'result' paths
+    """
+    if os.path.isdir(source):
+        jobs = [{'video': path} for path in sorted(list_video_files(source))]
+    else:
+        jobs = load_manifest(source)
+
+    names = set()
+    for job in jobs:
+        name = job.get('name') or Path(job['video']).stem
+        if name in names:
+            raise click.UsageError(f"Two videos map to the output name '{name}'; set 'name' in the manifest")
+        names.add(name)
+        job['name'] = name
+        job.setdefault('title', None)
+        job['reel'] = os.path.join(output_dir, f"{name}.mp4")
+        job['result'] = os.path.join(output_dir, f"{name}.json")
+    return jobs
+
+def is_completed(job: Dict[str, Any]) -> bool:
+    """
+    Check whether a job already produced its reel in an earlier run.
+
+    Args:
+        job (Dict[str, Any]): Job entry
+
+    Returns:
+        bool: True if the reel exists and its result file records a completed run
+    """
+    if not (os.path.exists(job['reel']) and os.path.exists(job['result'])):
+        return False
+    try:
+        return load_json(job['result']).get('status') == 'completed'
+    except ValueError:
+        return False
+
+async def process_job(pipeline: EventPipeline,
+                      job: Dict[str, Any],
+                      detect_options: Dict[str, Any],
+                      checkpoint_dir: str,
+                      reel_duration: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Detect highlights in one video and build its reel.
+
+    Args:
+        pipeline (EventPipeline): Shared pipeline
+        job (Dict[str, Any]): Job entry
+        detect_options (Dict[str, Any]): Arguments passed to detect_highlights
+        checkpoint_dir (str): Directory for the analysis checkpoints of interrupted runs
+        reel_duration (Optional[float]): Length the best highlights should fill (all if None)
+
+    Returns:
+        Dict[str, Any]: Summary record of the job
+    """
+    record = {
+        'video': job['video'],
+        'reel': job['reel'],
+        'status': 'failed',
+        'error': None,
+        'highlights': 0,
+        'timings': {}
+    }
+    click.echo(f"▶ {job['video']}")
+    started = time.perf_counter()
+
+    with profiling.job() as metrics:
+        try:
+            options = dict(detect_options, checkpoint_path=os.path.join(checkpoint_dir, f"{job['name']}.json"))
+            result = await pipeline.run([job['video']], job['reel'], title=job['title'], detect_options=options,
+                                        reel_duration=reel_duration)
+            video_result = result['videos'][job['video']]
+            record['status'] = 'completed'
+            record['highlights'] = len(video_result['highlights'])
+            record['timings'] = dict(video_result['timings'], **result['timings'])
+            record['memory'] = result['memory']
+        except Exception as e:
+            record['error'] = str(e)
+            record['timings']['total'] = time.perf_counter() - started
+    if profiling.is_enabled():
+        record['profile'] = metrics.report()
+
+    save_json(record, job['result'])
+    symbol = '✅' if record['status'] == 'completed' else '❌'
+    click.echo(f"{symbol} {job['video']} ({record['timings']['total']:.1f}s, {record['highlights']} highlights)"
+               + (f": {record['error']}" if record['error'] else ''))
+    return record
+
+async def process_batch(jobs: List[Dict[str, Any]],
+                        pipeline: EventPipeline,
+                        concurrency: int,
+                        detect_options: Dict[str, Any],
+                        checkpoint_dir: str,
+                        force: bool = False,
+                        reel_duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Process all jobs, running up to concurrency videos at the same time.
+
+    Args:
+        jobs (List[Dict[str, Any]]): Job entries
+        pipeline (EventPipeline): Shared pipeline
+        concurrency (int): Number of videos processed at the same time
+        detect_options (Dict[str, Any]): Arguments passed to detect_highlights
+        checkpoint_dir (str): Directory for the analysis checkpoints of interrupted runs
+        force (bool): Reprocess videos whose reel already exists
+        reel_duration (Optional[float]): Length the best highlights of each video should fill
+
+    Returns:
+        List[Dict[str, Any]]: Summary records in job order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(job: Dict[str, Any]) -> Dict[str, Any]:
+        if not force and is_completed(job):
+            click.echo(f"⏭ {job['video']} (already completed)")
+            return dict(load_json(job['result']), status='skipped')
+        async with semaphore:
+            return await process_job(pipeline, job, detect_options, checkpoint_dir, reel_duration)
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+def write_summary(records: List[Dict[str, Any]],
+                  json_path: Optional[str],
+                  csv_path: Optional[str]) -> None:
+    """
+    Write the batch summary as JSON and/or CSV (one row per video, one column per stage timing).
+
+    Args:
+        records (List[Dict[str, Any]]): Summary records
+        json_path (Optional[str]): JSON summary path
+        csv_path (Optional[str]): CSV summary path
+    """
+    if json_path:
+        counts = {status: sum(r['status'] == status for r in records)
+                  for status in ('completed', 'skipped', 'failed')}
+        save_json({'counts': counts, 'videos': records}, json_path)
+
+    if csv_path:
+        fields = (['video', 'reel', 'status', 'highlights', 'error', 'peak_rss_mb']
+                  + [f"{stage}_seconds" for stage in TIMED_STAGES])
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for record in records:
+                row = {field: record.get(field) for field in fields[:5]}
+                peak = record.get('memory', {}).get('peak_rss_mb')
+                row['peak_rss_mb'] = f"{peak:.1f}" if peak is not None else ''
+                for stage in TIMED_STAGES:
+                    timing = record.get('timings', {}).get(stage)
+                    row[f"{stage}_seconds"] = f"{timing:.3f}" if timing is not None else ''
+                writer.writerow(row)
+
+@click.command()
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--output-dir', '-o', default='output/batch', show_default=True,
+              help='Directory for reels and per-video results')
+@click.option('--jobs', '-j', default=2, show_default=True, help='Videos processed at the same time')
+@click.option('--threads', '-t', default=os.cpu_count() or 1, show_default=True,
+              help='Total CPU threads shared by all jobs')
+@click.option('--backend', type=click.Choice(['torch', 'onnx']), default='torch', show_default=True,
+              help='Inference backend')
+@click.option('--model', 'model_path', default='yolov8n.pt', show_default=True, help='YOLO model weights')
+@click.option('--face-model', 'face_model_path', default='models/yolov8n-face.pt', show_default=True,
+              help='YOLO face model weights')
+@click.option('--decoder', type=click.Choice(['opencv', 'ffmpeg']), default='opencv', show_default=True,
+              help='Frame decoder')
+@click.option('--min-confidence', default=0.5, show_default=True, help='Minimum detection confidence')
+@click.option('--min-duration', default=2.0, show_default=True, help='Minimum highlight duration in seconds')
+@click.option('--no-audio', is_flag=True, help='Skip applause detection')
+@click.option('--no-faces', is_flag=True, help='Skip crowd reaction analysis')
+@click.option('--summary-json', default=None, help='JSON summary path (default: <output-dir>/summary.json)')
+@click.option('--summary-csv', default=None, help='CSV summary path (default: <output-dir>/summary.csv)')
+@click.option('--memory-limit', type=float, default=None,
+              help='RSS budget in MiB; analysis sheds memory near it and fails above it '
+                   '(default: $AI_EVENT_MEMORY_LIMIT_MB, unlimited if unset)')
+@click.option('--reel-duration', type=float, default=None,
+              help='Reel length in seconds; only the best-scoring highlights that fill it are cut '
+                   '(default: every highlight)')
+@click.option('--force', is_flag=True, help='Reprocess videos whose reel already exists')
+@click.option('--profile', is_flag=True,
+              help='Record per-stage metrics (per-video in the summary, totals in <output-dir>/metrics.prom)')
+@click.option('--profile-capture', default=None,
+              help='Also capture a full profile: pstats file, or pyinstrument output if it ends in .html/.txt '
+                   '(runs one video at a time)')
+def main(source, output_dir, jobs, threads, backend, model_path, face_model_path, decoder,
+         min_confidence, min_duration, no_audio, no_faces, summary_json, summary_csv, memory_limit,
+         reel_duration, force, profile, profile_capture):
+    """Detect highlights and build a reel for every video in SOURCE (a directory or a manifest)."""
+    ensure_dir(output_dir)
+    checkpoint_dir = str(ensure_dir(os.path.join(output_dir, '.checkpoints')))
+    job_list = collect_jobs(source, output_dir)
+    if not job_list:
+        raise click.UsageError(f"No videos found in {source}")
+
+    # The profiler only follows the calling thread, so a capture runs one job inline
+    if profile_capture:
+        jobs = 1
+    # Split the thread budget between the concurrent jobs
+    jobs = max(1, min(jobs, len(job_list)))
+    threads_per_job = max(1, threads // jobs)
+
+    # Every worker thread builds its own detector (models are not thread-safe), with its share of threads
+    detector_options = {
+        'model_path': model_path,
+        'face_model_path': face_model_path,
+        'backend': backend,
+        'backend_options': {'intra_op_threads': threads_per_job},
+        # Decoded audio is reused when a video is reprocessed or resumed
+        'audio_cache_dir': os.path.join(output_dir, '.audio_cache')
+    }
+
+    detect_options = {
+        'min_confidence': min_confidence,
+        'min_duration': min_duration,
+        'analyze_audio': not no_audio,
+        'analyze_faces': not no_faces,
+        'decoder': decoder,
+        'decoder_options': {'threads': threads_per_job} if decoder == 'ffmpeg' else None
+    }
+
+    if profile:
+        profiling.enable()
+    capture = contextlib.nullcontext()
+    executor = None
+    if profile_capture:
+        executor = profiling.CallingThreadExecutor()
+        engine = 'pyinstrument' if profile_capture.endswith(('.html', '.txt')) else 'cprofile'
+        capture = profiling.capture_profile(profile_capture, engine)
+    
+    click.echo(f"Processing {len(job_list)} videos, {jobs} at a time with {threads_per_job} threads each")
+    with threadpool_limits(limits=threads_per_job), capture:
+        pipeline = EventPipeline(reel_generator=ReelGenerator(threads=threads_per_job), max_concurrent_videos=jobs,
+                                 detector_options=detector_options,
+                                 memory_budget=MemoryBudget(memory_limit) if memory_limit else MemoryBudget.from_env(),
+                                 executor=executor)
+        try:
+            records = asyncio.run(process_batch(job_list, pipeline, jobs, detect_options, checkpoint_dir, force,
+                                                reel_duration))
+        finally:
+            pipeline.close()
+
+    write_summary(
+        records,
+        summary_json or os.path.join(output_dir, 'summary.json'),
+        summary_csv or os.path.join(output_dir, 'summary.csv')
+    )
+    if profile:
+        with open(os.path.join(output_dir, 'metrics.prom'), 'w') as f:
+            f.write(profiling.prometheus_text())
+    failed = sum(r['status'] == 'failed' for r in records)
+    click.echo(f"Done: {len(records) - failed} succeeded, {failed} failed")
+    if failed:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import click
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import SIZES, generate_guests, get_event_video
+
+DEFAULT_CACHE_DIR = os.path.join(ROOT, 'benchmarks', '.cache')
+DEFAULT_RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DETECTOR_WEIGHTS = 'yolov8n.pt'
+FACE_WEIGHTS = os.path.join('models', 'yolov8n-face.pt')
+
+# A benchmark takes (video info, size parameters, scratch directory) and returns
+# the unit name and a zero-argument callable that does the measured work and
+# returns the number of units processed. Setup happens before the callable is
+# returned and is not measured.
+Benchmark = Callable[[Dict[str, Any], Dict[str, Any], str], Tuple[str, Callable[[], float]]]
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    """Register a benchmark under a name."""
+    def decorator(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def _count_frames(reader) -> int:
+    frames = 0
+    for _ in reader:
+        frames += 1
+    reader.close()
+    return frames
+
+
+@benchmark('decode.opencv')
+def bench_decode_opencv(video, params, scratch):
+    from src.utils.video_utils import OpenCVFrameReader
+    return 'frames', lambda: _count_frames(OpenCVFrameReader(video['path']))
+
+
+@benchmark('decode.ffmpeg')
+def bench_decode_ffmpeg(video, params, scratch):
+    from src.utils.video_utils import FFmpegFrameReader
+    return 'frames', lambda: _count_frames(FFmpegFrameReader(video['path']))
+
+
+def _detect_video(backend: str, batch_size: int) -> Benchmark:
+    def bench(video, params, scratch):
+        from src.models.yolo_detector import YOLODetector
+        detector = YOLODetector(DETECTOR_WEIGHTS, backend=backend)
+
+        def run():
+            detections, offsets = detector.detect_video(video['path'], batch_size=batch_size, as_array=True)
+            return len(offsets) - 1
+        return 'frames', run
+    return bench
+
+
+benchmark('detect.torch.batch1')(_detect_video('torch', 1))
+benchmark('detect.torch.batch8')(_detect_video('torch', 8))
+benchmark('detect.onnx.batch1')(_detect_video('onnx', 1))
+benchmark('detect.onnx.batch8')(_detect_video('onnx', 8))
+
+
+@benchmark('highlights.detect_highlights')
+def bench_detect_highlights(video, params, scratch):
+    from video_processing.highlight_detection import HighlightDetector
+    detector = HighlightDetector(DETECTOR_WEIGHTS, FACE_WEIGHTS)
+
+    def run():
+        detector.detect_highlights(video['path'])
+        return video['duration']
+    return 'video_seconds', run
+
+
+@benchmark('highlights.extract_highlight_clips')
+def bench_extract_highlight_clips(video, params, scratch):
+    from video_processing.highlight_detection import HighlightDetector
+    detector = HighlightDetector(DETECTOR_WEIGHTS, FACE_WEIGHTS)
+    highlights = [{'start_time': start, 'end_time': end, 'has_applause': True}
+                  for start, end in video['applause']]
+
+    def run():
+        detector.extract_highlight_clips(video['path'], highlights, os.path.join(scratch, 'clips'))
+        return sum(end - start for start, end in video['applause'])
+    return 'clip_seconds', run
+
+
+def _extract_audio(backend: str, cached: bool = False) -> Benchmark:
+    def bench(video, params, scratch):
+        from video_processing.audio_analyzer import AudioAnalyzer
+        # The warm-up run fills the cache, so cached runs measure cache hits
+        analyzer = AudioAnalyzer(cache_dir=os.path.join(scratch, 'audio') if cached else None)
+
+        def run():
+            analyzer.extract_audio(video['path'], backend=backend)
+            return video['duration']
+        return 'audio_seconds', run
+    return bench
+
+
+benchmark('audio.extract_audio')(_extract_audio('ffmpeg'))
+benchmark('audio.extract_audio.cached')(_extract_audio('ffmpeg', cached=True))
+benchmark('audio.extract_audio.librosa')(_extract_audio('librosa'))
+
+
+def _audio_method(method: str) -> Benchmark:
+    def bench(video, params, scratch):
+        from video_processing.audio_analyzer import AudioAnalyzer
+        analyzer = AudioAnalyzer()
+        audio_data, _ = analyzer.extract_audio(video['path'])
+
+        def run():
+            getattr(analyzer, method)(audio_data)
+            return video['duration']
+        return 'audio_seconds', run
+    return bench
+
+
+benchmark('audio.detect_applause')(_audio_method('detect_applause'))
+benchmark('audio.analyze_crowd_reaction')(_audio_method('analyze_crowd_reaction'))
+
+
+def _cut_clips(video: Dict[str, Any], scratch: str, ffmpeg_path: str = 'ffmpeg') -> List[str]:
+    """Cut the applause bursts of a video into clips (benchmark setup)."""
+    clips = []
+    for i, (start, end) in enumerate(video['applause']):
+        clip_path = os.path.join(scratch, f"clip_{i}.mp4")
+        subprocess.run([
+            ffmpeg_path, '-v', 'error', '-y', '-ss', str(start), '-i', video['path'],
+            '-t', str(end - start), '-c:v', 'libx264', '-preset', 'ultrafast',
+            '-pix_fmt', 'yuv420p', '-c:a', 'aac', clip_path
+        ], check=True)
+        clips.append(clip_path)
+    return clips
+
+
+@benchmark('reel.merge_clips')
+def bench_merge_clips(video, params, scratch):
+    from video_processing.reel_generator import ReelGenerator
+    generator = ReelGenerator()
+    clips = _cut_clips(video, scratch)
+    output_path = os.path.join(scratch, 'merged.mp4')
+
+    def run():
+        generator.merge_clips(clips, output_path)
+        return sum(end - start for start, end in video['applause'])
+    return 'output_seconds', run
+
+
+@benchmark('reel.create_reel')
+def bench_create_reel(video, params, scratch):
+    from reel_generator.generate_reel import ReelGenerator
+    generator = ReelGenerator(os.path.join(scratch, 'reels'))
+    clips = _cut_clips(video, scratch)
+    duration = sum(end - start for start, end in video['applause'])
+
+    def run():
+        generator.create_reel(clips, 'bench_reel', duration=duration, transition_duration=0.5)
+        return duration
+    return 'output_seconds', run
+
+
+@benchmark('reel.plan_cuts.cached')
+def bench_plan_cuts_cached(video, params, scratch):
+    from reel_generator import cut_planner
+    # The event's own soundtrack stands in for the music; the warm-up run fills the cache
+    cache_dir = os.path.join(scratch, 'beats')
+    clip_durations = [end - start for start, end in video['applause']]
+    clips = [f"clip_{i}.mp4" for i in range(len(clip_durations))]
+
+    def run():
+        cut_planner._beat_grids.clear()
+        grid = cut_planner.analyze_beats(video['path'], cache_dir=cache_dir)
+        cut_planner.plan_cuts(clips, clip_durations, min(60.0, grid['duration']),
+                              weights=clip_durations, beats=grid['beats'], transition_duration=0.5)
+        return video['duration']
+    return 'music_seconds', run
+
+
+@benchmark('multicam.align')
+def bench_multicam_align(video, params, scratch):
+    from video_processing.multicam_sync import MultiCamSync
+    # Second angle: the last two thirds of the same recording
+    angle_path = os.path.join(scratch, 'angle.mp4')
+    subprocess.run([
+        'ffmpeg', '-v', 'error', '-y', '-ss', f"{video['duration'] / 3:.3f}", '-i', video['path'],
+        '-c', 'copy', angle_path
+    ], check=True)
+    sync = MultiCamSync(min_overlap=min(10.0, video['duration'] / 3))
+
+    def run():
+        sync.align([video['path'], angle_path])
+        return video['duration'] * 5 / 3
+    return 'audio_seconds', run
+
+
+def _guest_benchmark(method: str, cached: bool = False, **options) -> Benchmark:
+    def bench(video, params, scratch):
+        from nlp_guest_mapping.guest_clustering import GuestAnalyzer
+        # The warm-up run fills the cache, so cached runs measure cache hits
+        analyzer = GuestAnalyzer(cache_path=os.path.join(scratch, 'guests.sqlite') if cached else None)
+        guests = generate_guests(params['guests'])
+        inputs = {
+            'analyze_guest_data': lambda: (guests,),
+            'cluster_guests': lambda: (analyzer.analyze_guest_data(guests),),
+            'extract_entities': lambda: ([f"{g['name']} {g['title']} {g['company']}" for g in guests],),
+            'analyze_sentiment': lambda: ([g['description'] for g in guests],)
+        }[method]()
+
+        def run():
+            getattr(analyzer, method)(*inputs, **options)
+            return len(guests)
+        return 'guests', run
+    return bench
+
+
+benchmark('guests.analyze_guest_data')(_guest_benchmark('analyze_guest_data'))
+benchmark('guests.analyze_guest_data.cached')(_guest_benchmark('analyze_guest_data', cached=True))
+benchmark('guests.extract_entities')(_guest_benchmark('extract_entities'))
+benchmark('guests.analyze_sentiment')(_guest_benchmark('analyze_sentiment'))
+benchmark('guests.cluster_guests')(_guest_benchmark('cluster_guests'))
+benchmark('guests.cluster_guests.scalable')(_guest_benchmark('cluster_guests', scalable=True, n_components=100))
+
+
+@benchmark('guests.index_add')
+def bench_guest_index_add(video, params, scratch):
+    from nlp_guest_mapping.guest_clustering import GuestAnalyzer
+    from nlp_guest_mapping.guest_index import GuestIndex
+    # Late registrations: 50 guests added to an index of the full guest list
+    guests = generate_guests(params['guests'] + 50)
+    index = GuestIndex(GuestAnalyzer())
+    index.build(guests[:-50])
+
+    def run():
+        index.add(guests[-50:])
+        return 50
+    return 'guests', run
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's peak RSS counter (Linux), so setup memory is not counted."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _rss_mb(field: str) -> Optional[float]:
+    """Read VmRSS or VmHWM from /proc/self/status in MiB."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _measure(name: str, size: str, cache_dir: str, repeat: int, connection) -> None:
+    """Run one benchmark in a fresh process and send the measurements back."""
+    os.chdir(ROOT)
+    scratch = tempfile.mkdtemp(prefix='bench_')
+    try:
+        video = get_event_video(cache_dir, size)
+        unit, run = BENCHMARKS[name](video, SIZES[size], scratch)
+
+        run()  # warm-up: lazy model init, ONNX export, page cache
+        rss_before = _rss_mb('VmRSS')
+        peak_reset = _reset_peak_rss()
+        times = []
+        units = 0.0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            units = run()
+            times.append(time.perf_counter() - start)
+
+        if peak_reset:
+            peak_rss = _rss_mb('VmHWM')
+        else:
+            # Fall back to the lifetime peak (ru_maxrss is KiB on Linux, bytes on macOS)
+            scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+        best = min(times)
+        connection.send({
+            'unit': unit,
+            'units': units,
+            'seconds': times,
+            'best_seconds': best,
+            'median_seconds': statistics.median(times),
+            'throughput': units / best if best > 0 else None,
+            'rss_before_mb': rss_before,
+            'peak_rss_mb': peak_rss,
+            'peak_includes_setup': not peak_reset
+        })
+    except Exception as e:
+        connection.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        connection.close()
+
+
+def run_benchmark(name: str, size: str, cache_dir: str, repeat: int) -> Dict[str, Any]:
+    """
+    Run one benchmark at one size in a separate process.
+
+    Args:
+        name (str): Benchmark name
+        size (str): Key of SIZES
+        cache_dir (str): Directory for synthetic inputs
+        repeat (int): Number of measured runs
+
+    Returns:
+        Dict[str, Any]: Measurements, or an 'error' entry
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(name, size, cache_dir, repeat, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        process.join()
+        result = {'error': f"benchmark process exited with code {process.exitcode}"}
+    process.join()
+    return dict({'name': name, 'size': size}, **result)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """
+    Compare throughputs against an earlier results file.
+
+    Args:
+        results (List[Dict[str, Any]]): Current results
+        baseline_path (str): Earlier results JSON
+        tolerance (float): Relative slowdown reported as a regression
+
+    Returns:
+        List[str]: One line per benchmark present in both runs
+    """
+    with open(baseline_path) as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+
+    lines = []
+    for result in results:
+        previous = baseline.get((result['name'], result['size']))
+        if not previous or not result.get('throughput') or not previous.get('throughput'):
+            continue
+        ratio = result['throughput'] / previous['throughput']
+        flag = '  REGRESSION' if ratio < 1 - tolerance else ''
+        lines.append(f"{result['name']:<40} {result['size']:<7} {ratio:6.2f}x{flag}")
+    return lines
+
+
+@click.command()
+@click.option('--only', '-k', multiple=True, help='Benchmark name patterns to run (fnmatch, repeatable)')
+@click.option('--sizes', default='small,medium', show_default=True,
+              help=f"Comma-separated input sizes from {', '.join(SIZES)}")
+@click.option('--repeat', '-r', default=3, show_default=True, help='Measured runs per benchmark')
+@click.option('--cache-dir', default=DEFAULT_CACHE_DIR, show_default=True, help='Synthetic input cache')
+@click.option('--output', '-o', default=None, help='Results JSON path (default: benchmarks/results/<time>_<commit>.json)')
+@click.option('--baseline', default=None, type=click.Path(exists=True), help='Earlier results JSON to compare with')
+@click.option('--tolerance', default=0.1, show_default=True, help='Slowdown reported as a regression')
+@click.option('--list', 'list_only', is_flag=True, help='List benchmarks and exit')
+def main(only, sizes, repeat, cache_dir, output, baseline, tolerance, list_only):
+    """Benchmark the pipeline stages on synthetic event videos."""
+    names = [name for name in BENCHMARKS if not only or any(fnmatch.fnmatch(name, p) for p in only)]
+    if list_only:
+        click.echo('\n'.join(names))
+        return
+
+    size_names = [size.strip() for size in sizes.split(',') if size.strip()]
+    unknown = [size for size in size_names if size not in SIZES]
+    if unknown:
+        raise click.UsageError(f"Unknown sizes: {', '.join(unknown)}")
+
+    # Render inputs up front so generation time never lands in a measurement
+    for size in size_names:
+        get_event_video(cache_dir, size)
+
+    results = []
+    for name in names:
+        for size in size_names:
+            result = run_benchmark(name, size, cache_dir, repeat)
+            results.append(result)
+            if 'error' in result:
+                click.echo(f"{name:<40} {size:<7} ERROR {result['error']}")
+            else:
+                click.echo(f"{name:<40} {size:<7} {result['throughput']:10.1f} {result['unit']}/s"
+                           f"  peak {result['peak_rss_mb']:.0f} MiB")
+
+    commit = _git_commit()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = output or os.path.join(DEFAULT_RESULTS_DIR, f"{timestamp}_{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'timestamp': timestamp,
+                'commit': commit,
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'repeat': repeat
+            },
+            'results': results
+        }, f, indent=4)
+    click.echo(f"Results written to {output}")
+
+    if baseline:
+        click.echo(f"\nThroughput relative to {baseline}:")
+        click.echo('\n'.join(compare(results, baseline, tolerance)))
+
+
+if __name__ == "__main__":
+    main()
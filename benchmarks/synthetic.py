@@ -0,0 +1,152 @@
+import json
+import os
+import random
+import subprocess
+from typing import Any, Dict, List, Tuple
+
+# Input sizes shared by all benchmarks
+SIZES = {
+    'small': {'duration': 10, 'width': 640, 'height': 360, 'fps': 25, 'guests': 100},
+    'medium': {'duration': 30, 'width': 1280, 'height': 720, 'fps': 25, 'guests': 1000},
+    'large': {'duration': 60, 'width': 1920, 'height': 1080, 'fps': 30, 'guests': 5000}
+}
+
+APPLAUSE_PERIOD = 10.0
+APPLAUSE_LENGTH = 2.5
+
+FIRST_NAMES = ['Ava', 'Liam', 'Maya', 'Noah', 'Priya', 'Omar', 'Chen', 'Sofia', 'Mateo', 'Zara']
+LAST_NAMES = ['Patel', 'Smith', 'Garcia', 'Kim', 'Okafor', 'Rossi', 'Novak', 'Silva', 'Cohen', 'Tanaka']
+TITLES = ['CEO', 'CTO', 'Product Manager', 'Data Scientist', 'Designer', 'Sales Director',
+          'Software Engineer', 'Investor', 'Marketing Lead', 'Founder']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Stark Industries', 'Wayne Enterprises',
+             'Hooli', 'Pied Piper', 'Soylent', 'Cyberdyne']
+DESCRIPTIONS = [
+    'Excited to meet new partners and share our latest launch.',
+    'Looking forward to the keynote, last year was fantastic.',
+    'Not thrilled about the venue change but happy to attend.',
+    'Interested in machine learning and large scale data systems.',
+    'Here to recruit engineers and talk about our growth plans.'
+]
+
+
+def applause_intervals(duration: float) -> List[Tuple[float, float]]:
+    """
+    Ground-truth applause bursts of a synthetic video.
+
+    Args:
+        duration (float): Video duration in seconds
+
+    Returns:
+        List[Tuple[float, float]]: (start, end) of each burst in seconds
+    """
+    intervals = []
+    start = 3.0
+    while start + APPLAUSE_LENGTH <= duration:
+        intervals.append((start, start + APPLAUSE_LENGTH))
+        start += APPLAUSE_PERIOD
+    return intervals
+
+
+def generate_event_video(output_path: str,
+                         duration: float,
+                         width: int,
+                         height: int,
+                         fps: int = 25,
+                         seed: int = 0,
+                         ffmpeg_path: str = 'ffmpeg') -> Dict[str, Any]:
+    """
+    Render a synthetic event video with ffmpeg lavfi sources.
+
+    The picture is a moving test pattern; the soundtrack is a low tone bed with
+    bursts of pink noise standing in for applause.
+
+    Args:
+        output_path (str): Output MP4 path
+        duration (float): Duration in seconds
+        width (int): Frame width
+        height (int): Frame height
+        fps (int): Frame rate
+        seed (int): Noise generator seed
+        ffmpeg_path (str): Path to FFmpeg executable
+
+    Returns:
+        Dict[str, Any]: Video parameters and ground-truth 'applause' intervals
+    """
+    intervals = applause_intervals(duration)
+    gate = '+'.join(f"between(t,{start},{end})" for start, end in intervals) or '0'
+
+    command = [
+        ffmpeg_path, '-v', 'error', '-y',
+        '-f', 'lavfi', '-i', f"testsrc2=size={width}x{height}:rate={fps}:duration={duration}",
+        '-f', 'lavfi', '-i', f"anoisesrc=color=pink:amplitude=0.8:seed={seed}:duration={duration}",
+        '-f', 'lavfi', '-i', f"sine=frequency=180:duration={duration}",
+        '-filter_complex',
+        f"[1:a]volume='gt({gate},0)':eval=frame[burst];"
+        f"[2:a]volume=0.2[bed];"
+        f"[bed][burst]amix=inputs=2:duration=first[audio]",
+        '-map', '0:v', '-map', '[audio]',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-ar', '44100',
+        output_path
+    ]
+    subprocess.run(command, check=True)
+
+    return {
+        'path': output_path,
+        'duration': duration,
+        'width': width,
+        'height': height,
+        'fps': fps,
+        'applause': intervals
+    }
+
+
+def get_event_video(cache_dir: str, size: str, ffmpeg_path: str = 'ffmpeg') -> Dict[str, Any]:
+    """
+    Get the synthetic video of a size, rendering it on first use.
+
+    Args:
+        cache_dir (str): Directory holding rendered videos
+        size (str): Key of SIZES
+        ffmpeg_path (str): Path to FFmpeg executable
+
+    Returns:
+        Dict[str, Any]: Video parameters as returned by generate_event_video
+    """
+    params = SIZES[size]
+    os.makedirs(cache_dir, exist_ok=True)
+    video_path = os.path.join(cache_dir, f"event_{size}.mp4")
+    info_path = f"{video_path}.json"
+
+    if os.path.exists(video_path) and os.path.exists(info_path):
+        with open(info_path) as f:
+            return json.load(f)
+
+    info = generate_event_video(video_path, params['duration'], params['width'], params['height'],
+                                params['fps'], ffmpeg_path=ffmpeg_path)
+    with open(info_path, 'w') as f:
+        json.dump(info, f, indent=4)
+    return info
+
+
+def generate_guests(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic guest records.
+
+    Args:
+        count (int): Number of guests
+        seed (int): Random seed
+
+    Returns:
+        List[Dict[str, Any]]: Guests with name, title, company and description
+    """
+    rng = random.Random(seed)
+    guests = []
+    for i in range(count):
+        guests.append({
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            'title': rng.choice(TITLES),
+            'company': rng.choice(COMPANIES),
+            'description': rng.choice(DESCRIPTIONS)
+        })
+    return guests
@@ -1,6 +1,6 @@
 from ultralytics import YOLO
 import os
-import torch
+from src.models.model_artifact import save_model_artifact
 
 def download_models():
     # Create models directory if it doesn't exist
@@ -12,9 +12,9 @@ def download_models():
         # First download the base YOLOv8n model
         model = YOLO('yolov8n.pt')
         
-        # Save it to our models directory
+        # Save it to our models directory as a self-contained artifact
         model_path = os.path.join('models', 'yolov8n-face.pt')
-        torch.save(model.state_dict(), model_path)
+        save_model_artifact(model, model_path)
         
         print("✅ Models downloaded successfully!")
         print(f"Model saved to: {model_path}")
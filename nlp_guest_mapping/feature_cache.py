@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+# Keys per SELECT, below SQLite's default limit of 999 bound variables
+LOOKUP_CHUNK = 500
+
+CONTENT_FIELDS = ('name', 'title', 'company', 'description')
+
+
+def guest_key(guest: Dict[str, Any]) -> str:
+    """
+    Hash of the guest fields the NLP features are computed from.
+
+    A missing description hashes differently from an empty one, since only
+    guests with a description get a sentiment.
+
+    Args:
+        guest (Dict[str, Any]): Guest information
+
+    Returns:
+        str: Hex digest identifying the guest's content
+    """
+    content = json.dumps([guest.get(field) for field in CONTENT_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class GuestFeatureCache:
+    """
+    SQLite store of per-guest NLP features keyed by guest content and model version.
+
+    Entities and sentiment are stored under guest_key of the guest and the
+    version of the models that computed them. Changing either the guest or the
+    models therefore misses the cache instead of returning stale features.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (and create if needed) a cache database.
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS guest_features ('
+            'key TEXT NOT NULL, model_version TEXT NOT NULL, entities TEXT NOT NULL, '
+            'sentiment TEXT, sentiment_score REAL, PRIMARY KEY (key, model_version))'
+        )
+        self.connection.commit()
+
+    def get_many(self, keys: List[str], model_version: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the features of many guests.
+
+        Args:
+            keys (List[str]): Guest keys
+            model_version (str): Version of the models the features must come from
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 'entities', 'sentiment' and 'sentiment_score' per
+                cached key; keys not in the cache are absent
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        features = {}
+        for start in range(0, len(unique_keys), LOOKUP_CHUNK):
+            chunk = unique_keys[start:start + LOOKUP_CHUNK]
+            rows = self.connection.execute(
+                f"SELECT key, entities, sentiment, sentiment_score FROM guest_features "
+                f"WHERE model_version = ? AND key IN ({','.join('?' * len(chunk))})",
+                [model_version, *chunk]
+            )
+            for key, entities, sentiment, sentiment_score in rows:
+                features[key] = {
+                    'entities': json.loads(entities),
+                    'sentiment': sentiment,
+                    'sentiment_score': sentiment_score
+                }
+        return features
+
+    def put_many(self, features: Dict[str, Dict[str, Any]], model_version: str) -> None:
+        """
+        Store the features of many guests in one transaction.
+
+        Args:
+            features (Dict[str, Dict[str, Any]]): 'entities', 'sentiment' and
+                'sentiment_score' per guest key
+            model_version (str): Version of the models that computed the features
+        """
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO guest_features VALUES (?, ?, ?, ?, ?)',
+                [(key, model_version, json.dumps(value['entities'], ensure_ascii=False),
+                  value['sentiment'], value['sentiment_score']) for key, value in features.items()]
+            )
+
+    def clear(self, model_version: Optional[str] = None) -> None:
+        """
+        Drop cached features.
+
+        Args:
+            model_version (Optional[str]): Only drop features of this model version
+                (all if None)
+        """
+        with self.connection:
+            if model_version is None:
+                self.connection.execute('DELETE FROM guest_features')
+            else:
+                self.connection.execute('DELETE FROM guest_features WHERE model_version = ?', (model_version,))
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
@@ -1,92 +1,311 @@
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Union
+from scipy import sparse
 from sklearn.cluster import DBSCAN
+from sklearn.decomposition import TruncatedSVD
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
 from transformers import pipeline
 import spacy
 import pandas as pd
+from utils import profiling
+from .feature_cache import GuestFeatureCache, guest_key
+
+def vectorize(texts: List[str],
+              vectorizer: TfidfVectorizer,
+              svd: Optional[TruncatedSVD] = None) -> Union[sparse.csr_matrix, np.ndarray]:
+    """
+    L2-normalized vectors of texts from a fitted vectorizer.
+    
+    Args:
+        texts (List[str]): Texts to vectorize
+        vectorizer (TfidfVectorizer): Fitted vectorizer
+        svd (Optional[TruncatedSVD]): Fitted reduction applied after the vectorizer
+        
+    Returns:
+        Union[sparse.csr_matrix, np.ndarray]: One unit-length (or, without any known
+            term, zero) row per text
+    """
+    features = vectorizer.transform(texts)
+    if svd is not None:
+        features = svd.transform(features)
+    return normalize(features)
 
 class GuestAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_path: Optional[str] = None):
         """
         Initialize the guest analyzer with NLP models.
+        
+        Args:
+            cache_path (Optional[str]): SQLite file caching each guest's entities and
+                sentiment, so repeat analyses only run the models on new or changed guests
         """
         self.nlp = spacy.load("en_core_web_sm")
         self.sentiment_analyzer = pipeline("sentiment-analysis")
         self.vectorizer = TfidfVectorizer(max_features=1000)
+        self.svd: Optional[TruncatedSVD] = None
+        self.cache = GuestFeatureCache(cache_path) if cache_path else None
+    
+    @property
+    def model_version(self) -> str:
+        """
+        Version of the NLP models, part of the feature cache key.
         
-    def analyze_guest_data(self, guest_data: List[Dict[str, Any]]) -> pd.DataFrame:
+        Returns:
+            str: spaCy pipeline and sentiment model identifiers
+        """
+        meta = self.nlp.meta
+        sentiment_model = getattr(getattr(self.sentiment_analyzer, 'model', None), 'name_or_path', 'default')
+        return f"{meta.get('lang')}_{meta.get('name')}-{meta.get('version')}|{sentiment_model}"
+    
+    def analyze_guest_data(self,
+                           guest_data: List[Dict[str, Any]],
+                           batch_size: int = 256,
+                           n_process: int = 1,
+                           sentiment_batch_size: int = 32) -> pd.DataFrame:
         """
         Analyze guest data and extract features.
         
+        Entities and sentiment are computed in batches (see extract_entities and
+        analyze_sentiment), so large guest lists run at model throughput
+        rather than per-call overhead. With a cache, they are only computed for
+        guests whose content or the models changed since they were cached.
+        
         Args:
             guest_data (List[Dict[str, Any]]): List of guest information
-            
+            batch_size (int): Texts per spaCy batch
+            n_process (int): spaCy worker processes (-1 for one per CPU)
+            sentiment_batch_size (int): Descriptions per sentiment model forward pass
+        
         Returns:
             pd.DataFrame: Processed guest data with features
         """
-        processed_data = []
+        keys = [guest_key(guest) for guest in guest_data]
+        features = {}
+        if self.cache is not None:
+            features = self.cache.get_many(keys, self.model_version)
+            profiling.count('guests.cache_hits', sum(key in features for key in keys))
         
-        for guest in guest_data:
-            # Extract text features
-            text = f"{guest.get('name', '')} {guest.get('title', '')} {guest.get('company', '')}"
-            doc = self.nlp(text)
-            
-            # Extract named entities
-            entities = [ent.text for ent in doc.ents]
-            
-            # Analyze sentiment if description is available
-            sentiment = None
-            if 'description' in guest:
-                sentiment = self.sentiment_analyzer(guest['description'])[0]
-            
+        # Compute each missing guest once, however often it is listed
+        missing = {}
+        for key, guest in zip(keys, guest_data):
+            if key not in features:
+                missing.setdefault(key, guest)
+        if missing:
+            computed = self._compute_features(list(missing.values()), batch_size, n_process, sentiment_batch_size)
+            computed = dict(zip(missing, computed))
+            if self.cache is not None:
+                self.cache.put_many(computed, self.model_version)
+            features.update(computed)
+        
+        processed_data = []
+        for guest, key in zip(guest_data, keys):
             processed_data.append({
                 'name': guest.get('name', ''),
                 'title': guest.get('title', ''),
                 'company': guest.get('company', ''),
-                'entities': entities,
-                'sentiment': sentiment['label'] if sentiment else None,
-                'sentiment_score': sentiment['score'] if sentiment else None
+                **features[key]
             })
-            
+        
         return pd.DataFrame(processed_data)
     
+    def _compute_features(self,
+                          guest_data: List[Dict[str, Any]],
+                          batch_size: int,
+                          n_process: int,
+                          sentiment_batch_size: int) -> List[Dict[str, Any]]:
+        """
+        Run the NLP models on guests.
+        
+        Args:
+            guest_data (List[Dict[str, Any]]): List of guest information
+            batch_size (int): Texts per spaCy batch
+            n_process (int): spaCy worker processes
+            sentiment_batch_size (int): Descriptions per sentiment model forward pass
+        
+        Returns:
+            List[Dict[str, Any]]: 'entities', 'sentiment' and 'sentiment_score' of each guest
+        """
+        # Extract text features
+        texts = [f"{guest.get('name', '')} {guest.get('title', '')} {guest.get('company', '')}"
+                 for guest in guest_data]
+        entities = self.extract_entities(texts, batch_size, n_process)
+        
+        # Analyze sentiment where a description is available
+        described = [i for i, guest in enumerate(guest_data) if 'description' in guest]
+        sentiments = [None] * len(guest_data)
+        results = self.analyze_sentiment([guest_data[i]['description'] for i in described], sentiment_batch_size)
+        for i, sentiment in zip(described, results):
+            sentiments[i] = sentiment
+        
+        return [{
+            'entities': guest_entities,
+            'sentiment': sentiment['label'] if sentiment else None,
+            'sentiment_score': sentiment['score'] if sentiment else None
+        } for guest_entities, sentiment in zip(entities, sentiments)]
+
+    def _unused_components(self) -> List[str]:
+        """
+        Pipeline components named entity recognition does not need.
+        
+        Returns:
+            List[str]: Names of the components to disable
+        """
+        keep = {'ner'}
+        # NER may listen to a shared tok2vec/transformer component
+        for name, component in self.nlp.pipeline:
+            if 'ner' in getattr(component, 'listening_components', []):
+                keep.add(name)
+        return [name for name in self.nlp.pipe_names if name not in keep]
+    
+    def extract_entities(self,
+                         texts: List[str],
+                         batch_size: int = 256,
+                         n_process: int = 1) -> List[List[str]]:
+        """
+        Extract named entities from many texts in batches.
+        
+        Args:
+            texts (List[str]): Texts to analyze
+            batch_size (int): Texts per spaCy batch
+            n_process (int): Worker processes (-1 for one per CPU)
+        
+        Returns:
+            List[List[str]]: Entity texts of each input text
+        """
+        docs = self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process,
+                             disable=self._unused_components())
+        return [[ent.text for ent in doc.ents] for doc in docs]
+    
+    def analyze_sentiment(self,
+                          descriptions: List[str],
+                          batch_size: int = 32) -> List[Dict[str, Any]]:
+        """
+        Classify the sentiment of many texts in batches.
+        
+        Args:
+            descriptions (List[str]): Texts to classify
+            batch_size (int): Texts per model forward pass
+        
+        Returns:
+            List[Dict[str, Any]]: 'label' and 'score' of each text
+        """
+        if not descriptions:
+            return []
+        # Truncate to the model's maximum length instead of failing on long texts
+        return self.sentiment_analyzer(descriptions, batch_size=batch_size, truncation=True)
+
+    def guest_texts(self, guest_df: pd.DataFrame) -> pd.Series:
+        """
+        Text each guest is clustered on.
+        
+        Args:
+            guest_df (pd.DataFrame): Processed guest data
+        
+        Returns:
+            pd.Series: Title, company and entities of each guest
+        """
+        if guest_df.empty:
+            return pd.Series([], dtype=object)
+        return guest_df.apply(
+            lambda x: f"{x['title']} {x['company']} {' '.join(x['entities'])}", 
+            axis=1
+        )
+    
     def cluster_guests(self, guest_df: pd.DataFrame, 
                       eps: float = 0.5, 
-                      min_samples: int = 2) -> Dict[int, List[str]]:
+                      min_samples: int = 2,
+                      scalable: bool = False,
+                      n_components: Optional[int] = None) -> Dict[int, List[str]]:
         """
         Cluster guests based on their features.
         
+        The default mode runs DBSCAN on cosine distance, which sklearn computes
+        brute force over all pairs. The scalable mode gives the same clusters
+        (up to the SVD approximation) for large guest lists: identical guests
+        become one weighted point, vectors are L2-normalized so a Euclidean
+        radius of sqrt(2 * eps) equals cosine distance eps, and with n_components
+        they are reduced by TruncatedSVD and indexed in a ball tree. Guests
+        whose text has no vocabulary term are noise in both modes.
+        
         Args:
             guest_df (pd.DataFrame): Processed guest data
             eps (float): Maximum distance between samples for DBSCAN
             min_samples (int): Minimum number of samples in a cluster
-            
+            scalable (bool): Use the scalable mode
+            n_components (Optional[int]): TruncatedSVD dimensions in the scalable mode
+                (sparse vectors and brute-force neighbours if None)
+        
         Returns:
             Dict[int, List[str]]: Clusters of guest names
         """
         # Prepare text data for clustering
-        text_data = guest_df.apply(
-            lambda x: f"{x['title']} {x['company']} {' '.join(x['entities'])}", 
-            axis=1
-        )
-        
-        # Convert text to TF-IDF features
-        features = self.vectorizer.fit_transform(text_data)
+        text_data = self.guest_texts(guest_df)
         
-        # Perform clustering
-        clustering = DBSCAN(eps=eps, min_samples=min_samples, metric='cosine')
-        clusters = clustering.fit_predict(features)
+        if scalable:
+            clusters = self._cluster_scalable(text_data, eps, min_samples, n_components)
+        else:
+            # Convert text to TF-IDF features
+            self.svd = None
+            features = self.vectorizer.fit_transform(text_data)
+            
+            # Perform clustering
+            clustering = DBSCAN(eps=eps, min_samples=min_samples, metric='cosine')
+            clusters = clustering.fit_predict(features)
         
         # Group guests by cluster
         cluster_groups = {}
-        for i, cluster_id in enumerate(clusters):
+        for name, cluster_id in zip(guest_df['name'], clusters):
             if cluster_id not in cluster_groups:
                 cluster_groups[cluster_id] = []
-            cluster_groups[cluster_id].append(guest_df.iloc[i]['name'])
-            
+            cluster_groups[cluster_id].append(name)
+        
         return cluster_groups
     
+    def _cluster_scalable(self,
+                          text_data: pd.Series,
+                          eps: float,
+                          min_samples: int,
+                          n_components: Optional[int]) -> np.ndarray:
+        """
+        DBSCAN labels of guest texts on normalized Euclidean features.
+        
+        Args:
+            text_data (pd.Series): Clustering text of each guest
+            eps (float): Maximum cosine distance between neighbours
+            min_samples (int): Minimum number of samples in a cluster
+            n_components (Optional[int]): TruncatedSVD dimensions (none if None)
+        
+        Returns:
+            np.ndarray: Cluster label of each guest (-1 for noise)
+        """
+        # Identical guests are one point weighted by their count; in order of first
+        # appearance, so clusters are numbered as in a run over every guest
+        codes, unique_texts = pd.factorize(text_data)
+        weights = np.bincount(codes)
+        
+        self.vectorizer.fit(text_data)
+        self.svd = None
+        if n_components is not None and n_components < len(self.vectorizer.vocabulary_):
+            self.svd = TruncatedSVD(n_components, random_state=0).fit(self.vectorizer.transform(unique_texts))
+        features = vectorize(unique_texts, self.vectorizer, self.svd)
+        
+        # For unit vectors |a - b|^2 = 2 * cosine distance
+        clustering = DBSCAN(
+            eps=np.sqrt(2 * eps),
+            min_samples=min_samples,
+            metric='euclidean',
+            algorithm='brute' if sparse.issparse(features) else 'ball_tree'
+        )
+        
+        # Texts without a vocabulary term have zero vectors, at distance 1 from every
+        # other vector; in cosine mode they are noise, so they are left out here
+        known = features.getnnz(axis=1) > 0 if sparse.issparse(features) else np.any(features != 0, axis=1)
+        labels = np.full(len(unique_texts), -1, dtype=np.int64)
+        if known.any():
+            labels[known] = clustering.fit_predict(features[known], sample_weight=weights[known])
+        return labels[codes]
+
     def get_guest_insights(self, guest_df: pd.DataFrame, 
                           clusters: Dict[int, List[str]]) -> Dict[str, Any]:
         """
@@ -0,0 +1,199 @@
+import copy
+from typing import Any, Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.neighbors import NearestNeighbors
+
+from utils import profiling
+from .guest_clustering import GuestAnalyzer, vectorize
+
+# Bumped whenever the persisted layout changes
+INDEX_VERSION = 2
+
+
+class GuestIndex:
+    """
+    Persisted guest clustering that takes late registrations incrementally.
+
+    A full build analyzes the guests, clusters them with the scalable mode of
+    GuestAnalyzer.cluster_guests and keeps the fitted vectorizer, the guest
+    vectors, their NLP features and a neighbour index over the clustered
+    guests. Guests added later are the only ones analyzed and vectorized; each
+    joins the cluster of its nearest clustered guest within eps, or stays noise.
+    The share of guests that found no cluster since the last full clustering is
+    the drift. Once it passes drift_threshold, everything is reclustered from the
+    stored features, without rerunning the NLP models.
+    """
+
+    def __init__(self,
+                 analyzer: GuestAnalyzer,
+                 eps: float = 0.5,
+                 min_samples: int = 2,
+                 n_components: Optional[int] = None,
+                 drift_threshold: float = 0.1):
+        """
+        Create an empty index.
+
+        Args:
+            analyzer (GuestAnalyzer): Analyzer computing the NLP features of new guests
+            eps (float): Maximum cosine distance between neighbours
+            min_samples (int): Minimum number of samples in a cluster
+            n_components (Optional[int]): TruncatedSVD dimensions (sparse vectors if None)
+            drift_threshold (float): Share of unclustered new guests that triggers a recluster
+        """
+        self.analyzer = analyzer
+        self.eps = eps
+        self.min_samples = min_samples
+        self.n_components = n_components
+        self.drift_threshold = drift_threshold
+        self.guest_df = pd.DataFrame()
+        self.features = None
+        self.labels = np.zeros(0, dtype=np.int64)
+        self.vectorizer = None
+        self.svd = None
+        self.neighbors: Optional[NearestNeighbors] = None
+        self.neighbor_labels = np.zeros(0, dtype=np.int64)
+        self.unmatched = 0
+        self.added = 0
+
+    @property
+    def drift(self) -> float:
+        """Share of the guests added since the last full clustering that found no cluster."""
+        return self.unmatched / self.added if self.added else 0.0
+
+    @profiling.timed('guests.index_build')
+    def build(self, guest_data: List[Dict[str, Any]]) -> None:
+        """
+        Analyze and cluster a full guest list, replacing the index.
+
+        Args:
+            guest_data (List[Dict[str, Any]]): List of guest information
+        """
+        self._recluster(self.analyzer.analyze_guest_data(guest_data))
+
+    def _recluster(self, guest_df: pd.DataFrame) -> None:
+        """Cluster analyzed guests from scratch and index the clustered ones."""
+        texts = self.analyzer.guest_texts(guest_df)
+        labels = self.analyzer._cluster_scalable(texts, self.eps, self.min_samples, self.n_components)
+
+        # Own copies, so later clustering with the analyzer does not refit them
+        self.vectorizer = copy.deepcopy(self.analyzer.vectorizer)
+        self.svd = copy.deepcopy(self.analyzer.svd)
+        self.guest_df = guest_df.reset_index(drop=True)
+        self.features = vectorize(texts, self.vectorizer, self.svd)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.unmatched = 0
+        self.added = 0
+
+        clustered = np.flatnonzero(self.labels >= 0)
+        self.neighbor_labels = self.labels[clustered]
+        self.neighbors = None
+        if len(clustered):
+            algorithm = 'brute' if sparse.issparse(self.features) else 'ball_tree'
+            self.neighbors = NearestNeighbors(n_neighbors=1, algorithm=algorithm).fit(self.features[clustered])
+
+    @profiling.timed('guests.index_add')
+    def add(self, guest_data: List[Dict[str, Any]]) -> List[int]:
+        """
+        Add guests, assigning each to the cluster of its nearest clustered guest.
+
+        Clusters are those of the last full clustering; an empty index is built
+        from the new guests instead. Passing drift_threshold reclusters every
+        guest.
+
+        Args:
+            guest_data (List[Dict[str, Any]]): New guests
+
+        Returns:
+            List[int]: Cluster id of each new guest (-1 for noise)
+        """
+        if not guest_data:
+            return []
+        if not len(self.labels):
+            self.build(guest_data)
+            return self.labels.tolist()
+
+        new_df = self.analyzer.analyze_guest_data(guest_data)
+        features = vectorize(self.analyzer.guest_texts(new_df), self.vectorizer, self.svd)
+        labels = np.full(len(new_df), -1, dtype=np.int64)
+        if self.neighbors is not None:
+            distances, indices = self.neighbors.kneighbors(features)
+            # Guests without a known term have a zero vector and no neighbours
+            known = features.getnnz(axis=1) > 0 if sparse.issparse(features) else np.any(features != 0, axis=1)
+            # For unit vectors |a - b|^2 = 2 * cosine distance
+            matched = known & (distances[:, 0] <= np.sqrt(2 * self.eps))
+            labels[matched] = self.neighbor_labels[indices[matched, 0]]
+
+        self.guest_df = pd.concat([self.guest_df, new_df], ignore_index=True)
+        stack = sparse.vstack if sparse.issparse(features) else np.vstack
+        self.features = stack([self.features, features])
+        self.labels = np.concatenate([self.labels, labels])
+        self.unmatched += int(np.sum(labels < 0))
+        self.added += len(labels)
+
+        if self.drift > self.drift_threshold:
+            with profiling.timer('guests.index_recluster'):
+                self._recluster(self.guest_df)
+            return self.labels[-len(new_df):].tolist()
+        return labels.tolist()
+
+    def clusters(self) -> Dict[int, List[str]]:
+        """
+        Clusters of guest names, as returned by GuestAnalyzer.cluster_guests.
+
+        Returns:
+            Dict[int, List[str]]: Clusters of guest names
+        """
+        cluster_groups = {}
+        for name, cluster_id in zip(self.guest_df.get('name', []), self.labels):
+            cluster_groups.setdefault(cluster_id, []).append(name)
+        return cluster_groups
+
+    def save(self, path: str) -> None:
+        """
+        Persist the index (everything but the analyzer's models).
+
+        Args:
+            path (str): Output file
+        """
+        joblib.dump({
+            'version': INDEX_VERSION,
+            'eps': self.eps,
+            'min_samples': self.min_samples,
+            'n_components': self.n_components,
+            'drift_threshold': self.drift_threshold,
+            'guest_df': self.guest_df,
+            'features': self.features,
+            'labels': self.labels,
+            'vectorizer': self.vectorizer,
+            'svd': self.svd,
+            'neighbors': self.neighbors,
+            'neighbor_labels': self.neighbor_labels,
+            'unmatched': self.unmatched,
+            'added': self.added
+        }, path)
+
+    @classmethod
+    def load(cls, path: str, analyzer: GuestAnalyzer) -> 'GuestIndex':
+        """
+        Load a persisted index.
+
+        Args:
+            path (str): File written by save
+            analyzer (GuestAnalyzer): Analyzer computing the NLP features of new guests
+
+        Returns:
+            GuestIndex: Restored index
+        """
+        state = joblib.load(path)
+        if state.get('version') != INDEX_VERSION:
+            raise ValueError(f"Guest index {path} has version {state.get('version')}, expected {INDEX_VERSION}")
+
+        index = cls(analyzer, state['eps'], state['min_samples'], state['n_components'], state['drift_threshold'])
+        for name in ('guest_df', 'features', 'labels', 'vectorizer', 'svd', 'neighbors',
+                     'neighbor_labels', 'unmatched', 'added'):
+            setattr(index, name, state[name])
+        return index
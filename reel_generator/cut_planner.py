@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils import profiling
+
+# Beat grids already analyzed in this process, by cache key
+_beat_grids: Dict[str, Dict[str, Any]] = {}
+
+
+def _beat_cache_key(music_path: str) -> str:
+    stat = os.stat(music_path)
+    key = f"{os.path.abspath(music_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+@profiling.timed('reel.analyze_beats')
+def analyze_beats(music_path: str,
+                  cache_dir: Optional[str] = None,
+                  sample_rate: int = 22050) -> Dict[str, Any]:
+    """
+    Track the beats of a music file once and cache the grid.
+
+    Grids are cached in memory and, with a cache_dir, as JSON keyed by the
+    file's path, size and mtime, so planning against a known track skips the
+    audio analysis entirely.
+
+    Args:
+        music_path (str): Path to the music file
+        cache_dir (Optional[str]): Directory for the beat grid cache
+        sample_rate (int): Rate the music is analyzed at
+
+    Returns:
+        Dict[str, Any]: 'tempo' in BPM, 'beats' (beat times in seconds), 'strength'
+            (onset strength at each beat, 0-1) and 'duration' in seconds
+    """
+    key = _beat_cache_key(music_path)
+    if key in _beat_grids:
+        return _beat_grids[key]
+
+    cache_path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            grid = json.load(f)
+    else:
+        import librosa
+        from video_processing.audio_analyzer import AudioAnalyzer
+
+        analyzer = AudioAnalyzer(sample_rate)
+        audio_data, _ = analyzer.extract_audio(music_path)
+        onset_env = analyzer.spectral_features(audio_data)['onset_env']
+        tempo, beat_frames = librosa.beat.beat_track(
+            onset_envelope=onset_env, sr=sample_rate, hop_length=analyzer.hop_length
+        )
+        strength = onset_env[beat_frames] / (onset_env.max() or 1.0)
+        grid = {
+            'tempo': float(np.atleast_1d(tempo)[0]),
+            'beats': librosa.frames_to_time(beat_frames, sr=sample_rate, hop_length=analyzer.hop_length).tolist(),
+            'strength': strength.tolist(),
+            'duration': len(audio_data) / sample_rate
+        }
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump(grid, f)
+
+    _beat_grids[key] = grid
+    return grid
+
+
+@profiling.timed('reel.plan_cuts')
+def plan_cuts(clips: List[str],
+              clip_durations: List[float],
+              duration: float,
+              weights: Optional[List[float]] = None,
+              beats: Optional[List[float]] = None,
+              transition_duration: float = 1.0,
+              min_clip_duration: float = 1.5,
+              max_clip_duration: float = 8.0) -> Dict[str, Any]:
+    """
+    Plan which part of each clip plays when in the reel.
+
+    Each clip gets a share of the target duration proportional to its weight,
+    bounded by min/max_clip_duration and the clip's length. With a beat grid,
+    every cut is moved to the beat nearest its planned time (within those
+    bounds) and the reel ends on a beat. Clips that no longer fit at their
+    minimum duration are dropped, lowest weight first. Each entry plays the
+    middle of its clip.
+
+    Args:
+        clips (List[str]): Clip paths in reel order
+        clip_durations (List[float]): Length of each clip in seconds
+        duration (float): Target reel duration in seconds
+        weights (Optional[List[float]]): Relative importance of each clip (equal if None)
+        beats (Optional[List[float]]): Beat times of the music in seconds
+        transition_duration (float): Crossfade length between clips in seconds
+        min_clip_duration (float): Shortest slot a clip gets in seconds
+        max_clip_duration (float): Longest slot a clip gets in seconds
+
+    Returns:
+        Dict[str, Any]: Edit decision list with 'duration', 'transition_duration' and
+            'entries', each with 'source', 'source_start', 'reel_start' and 'duration'
+            (the slot length; a clip plays transition_duration longer into the next
+            crossfade)
+    """
+    if len(clips) != len(clip_durations):
+        raise ValueError("clips and clip_durations must have the same length")
+    weights = np.ones(len(clips)) if weights is None else np.asarray(weights, dtype=np.float64)
+    if len(weights) != len(clips):
+        raise ValueError("clips and weights must have the same length")
+
+    # Playable length of each clip; all but the last also feed a crossfade
+    available = np.asarray(clip_durations, dtype=np.float64) - transition_duration
+    keep = available >= min_clip_duration
+    max_clips = max(1, int(duration // min_clip_duration))
+    if keep.sum() > max_clips:
+        ranked = np.argsort(-np.where(keep, weights, -np.inf), kind='stable')
+        keep[:] = False
+        keep[ranked[:max_clips]] = True
+    indices = np.flatnonzero(keep)
+    if not len(indices):
+        return {'duration': 0.0, 'transition_duration': transition_duration, 'entries': []}
+
+    shares = weights[indices] / (weights[indices].sum() or 1.0)
+    upper = np.minimum(available[indices], max_clip_duration)
+    lengths = np.clip(duration * shares, min_clip_duration, upper)
+    beat_times = np.asarray(beats if beats is not None else [], dtype=np.float64)
+
+    entries = []
+    cursor = 0.0
+    for position, (index, length, longest) in enumerate(zip(indices, lengths, upper)):
+        remaining = duration - cursor
+        if remaining < min_clip_duration:
+            break
+        is_last = position == len(indices) - 1
+        target = cursor + (remaining if is_last else length)
+        low = cursor + min_clip_duration
+        high = min(cursor + longest, duration)
+        end = min(max(target, low), high)
+
+        # Snap the cut to the nearest beat inside the allowed range
+        if len(beat_times):
+            first, last = np.searchsorted(beat_times, [low, high + 1e-9])
+            if last > first:
+                candidates = beat_times[first:last]
+                end = float(candidates[np.argmin(np.abs(candidates - target))])
+
+        slot = end - cursor
+        entries.append({
+            'source': clips[index],
+            'source_start': max(0.0, float(available[index] - slot) / 2),
+            'reel_start': cursor,
+            'duration': slot
+        })
+        cursor = end
+
+    return {'duration': cursor, 'transition_duration': transition_duration, 'entries': entries}
@@ -1,8 +1,11 @@
 import ffmpeg
 import json
+import subprocess
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import random
+from utils import profiling
+from .cut_planner import analyze_beats, plan_cuts
 
 class ReelGenerator:
     def __init__(self, output_dir: str = "output"):
@@ -15,93 +18,163 @@ class ReelGenerator:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-    def create_reel(self, 
+    def plan_reel(self,
+                  clips: List[str],
+                  duration: float = 60.0,
+                  transition_duration: float = 1.0,
+                  music_path: Optional[str] = None,
+                  weights: Optional[List[float]] = None) -> Dict[str, Any]:
+        """
+        Plan a reel: beat-aligned slots for the clips, weighted by importance.
+        
+        Args:
+            clips (List[str]): List of video clip paths
+            duration (float): Target duration of the reel in seconds
+            transition_duration (float): Duration of transitions between clips
+            music_path (Optional[str]): Path to background music; cuts land on its beats
+            weights (Optional[List[float]]): Relative importance of each clip, e.g. highlight scores
+        
+        Returns:
+            Dict[str, Any]: Edit decision list (see cut_planner.plan_cuts) with 'music' and 'tempo'
+        """
+        clip_durations = [float(ffmpeg.probe(clip)['format']['duration']) for clip in clips]
+        
+        beats = None
+        tempo = None
+        if music_path:
+            grid = analyze_beats(music_path, cache_dir=str(self.output_dir / '.beat_cache'))
+            beats = grid['beats']
+            tempo = grid['tempo']
+            duration = min(duration, grid['duration'])
+        
+        edl = plan_cuts(clips, clip_durations, duration, weights, beats, transition_duration)
+        edl['music'] = music_path
+        edl['tempo'] = tempo
+        return edl
+    
+    @profiling.timed('reel.create_reel')
+    def create_reel(self,
                    clips: List[str],
                    output_name: str,
                    duration: float = 60.0,
                    transition_duration: float = 1.0,
-                   music_path: str = None) -> str:
+                   music_path: str = None,
+                   weights: Optional[List[float]] = None) -> str:
         """
         Create a highlight reel from video clips.
         
+        With background music, cuts are placed on its beats and the music
+        replaces the clips' audio.
+        
         Args:
             clips (List[str]): List of video clip paths
             output_name (str): Name of the output reel
             duration (float): Target duration of the reel in seconds
             transition_duration (float): Duration of transitions between clips
             music_path (str): Path to background music (optional)
-            
+            weights (Optional[List[float]]): Relative importance of each clip; more
+                important clips get longer slots
+        
         Returns:
             str: Path to the generated reel
         """
-        output_path = self.output_dir / f"{output_name}.mp4"
-        
-        # Calculate clip durations
-        total_clips = len(clips)
-        clip_duration = (duration - (transition_duration * (total_clips - 1))) / total_clips
+        if not clips:
+            raise ValueError("No clips to create a reel from")
         
-        # Create filter complex for transitions
-        filter_complex = []
-        inputs = []
+        edl = self.plan_reel(clips, duration, transition_duration, music_path, weights)
+        return self.render_edl(edl, str(self.output_dir / f"{output_name}.mp4"))
+    
+    @profiling.timed('reel.render_edl')
+    def render_edl(self, edl: Dict[str, Any], output_path: str, fps: int = 30) -> str:
+        """
+        Render an edit decision list in a single FFmpeg pass.
         
-        for i, clip in enumerate(clips):
-            # Add input
-            inputs.append(f"[{i}:v]")
-            
-            # Add clip with duration
-            filter_complex.append(f"[{i}:v]trim=0:{clip_duration},setpts=PTS-STARTPTS[v{i}];")
-            
-            # Add transition if not last clip
-            if i < total_clips - 1:
-                filter_complex.append(
-                    f"[v{i}][{i+1}:v]xfade=transition=fade:duration={transition_duration}:"
-                    f"offset={clip_duration * (i+1) - transition_duration}[v{i+1}];"
-                )
-        
-        # Add audio if provided
-        if music_path:
-            # Get music duration
-            probe = ffmpeg.probe(music_path)
-            music_duration = float(probe['format']['duration'])
-            
-            # Trim music to match video duration
-            filter_complex.append(
-                f"[{total_clips}:a]atrim=0:{duration},asetpts=PTS-STARTPTS[a];"
-            )
-            
-            # Mix audio from clips and music
-            filter_complex.append(
-                f"[a]amix=inputs=1:duration=first[aout]"
-            )
+        Every entry is seeked and trimmed at the input, scaled to the first
+        clip's frame size and crossfaded into the next one at its reel_start.
         
-        # Combine all clips
-        filter_complex.append(f"[v{total_clips-1}]")
+        Args:
+            edl (Dict[str, Any]): Plan from plan_reel or cut_planner.plan_cuts
+            output_path (str): Output video path
+            fps (int): Output frame rate
         
-        # Build FFmpeg command
-        stream = ffmpeg.input('pipe:', format='rawvideo', pix_fmt='rgb24')
+        Returns:
+            str: Path to the rendered reel
+        """
+        entries = edl['entries']
+        if not entries:
+            raise ValueError("The edit decision list has no entries")
+        transition = edl['transition_duration']
+        music_path = edl.get('music')
         
-        for clip in clips:
-            stream = ffmpeg.input(clip)
+        first = next(s for s in ffmpeg.probe(entries[0]['source'])['streams'] if s['codec_type'] == 'video')
+        width, height = int(first['width']), int(first['height'])
+        use_clip_audio = not music_path and all(
+            any(s['codec_type'] == 'audio' for s in ffmpeg.probe(entry['source'])['streams'])
+            for entry in entries
+        )
         
-        if music_path:
-            stream = ffmpeg.input(music_path)
+        inputs = []
+        filters = []
+        for i, entry in enumerate(entries):
+            # Clips play on into the crossfade with the next one
+            length = entry['duration'] + (transition if i < len(entries) - 1 else 0.0)
+            inputs += ['-ss', f"{entry['source_start']:.3f}", '-t', f"{length:.3f}", '-i', entry['source']]
+            filters.append(
+                f"[{i}:v]setpts=PTS-STARTPTS,scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={fps},format=yuv420p[v{i}]"
+            )
+            if use_clip_audio:
+                filters.append(f"[{i}:a]asetpts=PTS-STARTPTS,aresample=44100,aformat=channel_layouts=stereo[a{i}]")
         
-        # Apply filters and output
-        stream = ffmpeg.output(
-            stream,
-            str(output_path),
-            vcodec='libx264',
-            acodec='aac',
-            filter_complex=''.join(filter_complex),
-            preset='medium',
-            movflags='faststart'
-        )
+        filters += self._join_streams(len(entries), 'v', transition, entries)
+        if use_clip_audio:
+            filters += self._join_streams(len(entries), 'a', transition, entries)
+        elif music_path:
+            inputs += ['-i', music_path]
+            fade_start = max(0.0, edl['duration'] - 1.0)
+            filters.append(
+                f"[{len(entries)}:a]atrim=0:{edl['duration']:.3f},asetpts=PTS-STARTPTS,"
+                f"afade=t=out:st={fade_start:.3f}:d=1[aout]"
+            )
         
-        # Run FFmpeg
-        stream.run(overwrite_output=True)
+        command = ['ffmpeg', '-y', '-v', 'error', *inputs, '-filter_complex', ';'.join(filters), '-map', '[vout]']
+        if use_clip_audio or music_path:
+            command += ['-map', '[aout]', '-c:a', 'aac', '-b:a', '192k']
+        command += ['-c:v', 'libx264', '-preset', 'medium', '-pix_fmt', 'yuv420p', '-movflags', '+faststart',
+                    str(output_path)]
         
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"FFmpeg error: {result.stderr.strip()}")
         return str(output_path)
     
+    def _join_streams(self,
+                      count: int,
+                      kind: str,
+                      transition: float,
+                      entries: List[Dict[str, Any]]) -> List[str]:
+        """Filters joining the per-entry v{i}/a{i} streams into vout/aout."""
+        out = f"[{kind}out]"
+        if count == 1:
+            return [f"[{kind}0]{'null' if kind == 'v' else 'anull'}{out}"]
+        if transition <= 0:
+            inputs = ''.join(f"[{kind}{i}]" for i in range(count))
+            video, audio = (1, 0) if kind == 'v' else (0, 1)
+            return [f"{inputs}concat=n={count}:v={video}:a={audio}{out}"]
+        
+        filters = []
+        previous = f"[{kind}0]"
+        for i in range(1, count):
+            label = out if i == count - 1 else f"[{kind}x{i}]"
+            if kind == 'v':
+                filters.append(f"{previous}[v{i}]xfade=transition=fade:duration={transition:.3f}:"
+                               f"offset={entries[i]['reel_start']:.3f}{label}")
+            else:
+                filters.append(f"{previous}[a{i}]acrossfade=d={transition:.3f}{label}")
+            previous = label
+        return filters
+
+    @profiling.timed('reel.add_effects')
     def add_effects(self, 
                    video_path: str,
                    effects: List[Dict[str, Any]]) -> str:
@@ -145,6 +218,7 @@ class ReelGenerator:
         
         return str(output_path)
     
+    @profiling.timed('reel.add_text_overlay')
     def add_text_overlay(self,
                         video_path: str,
                         text: str,
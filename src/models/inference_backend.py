@@ -0,0 +1,360 @@
+import ast
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+from ultralytics.nn.modules import Detect
+from ultralytics.utils import ops
+
+BACKENDS = ('torch', 'onnx')
+DEFAULT_CACHE_DIR = os.path.join('models', 'onnx')
+
+
+def _cache_key(weights_path: str, imgsz: int) -> str:
+    """
+    Build a cache key that changes whenever the source weights change.
+
+    Args:
+        weights_path (str): Path to the PyTorch weights
+        imgsz (int): Export input size
+
+    Returns:
+        str: Short hexadecimal key
+    """
+    stat = os.stat(weights_path)
+    source = f"{os.path.abspath(weights_path)}:{stat.st_size}:{stat.st_mtime_ns}:{imgsz}"
+    return hashlib.sha1(source.encode()).hexdigest()[:12]
+
+
+def export_onnx(weights_path: str,
+                build_model: Optional[Callable[[], Any]] = None,
+                cache_dir: str = DEFAULT_CACHE_DIR,
+                imgsz: int = 640,
+                quantize: bool = False) -> str:
+    """
+    Export YOLO weights to ONNX once and return the cached graph path.
+
+    The PyTorch model is only constructed on a cache miss, so repeated startups
+    never pay for loading the original checkpoint.
+
+    Args:
+        weights_path (str): Path to the PyTorch weights
+        build_model (Optional[Callable[[], Any]]): Factory for the PyTorch model (defaults to YOLO(weights_path))
+        cache_dir (str): Directory holding exported graphs
+        imgsz (int): Square input size of the exported graph
+        quantize (bool): Whether to return a dynamically INT8-quantized graph
+
+    Returns:
+        str: Path to the cached ONNX graph
+    """
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(
+            f"Model weights not found at {weights_path}. "
+            "Please run download_models.py first."
+        )
+
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"{Path(weights_path).stem}-{imgsz}-{_cache_key(weights_path, imgsz)}"
+    onnx_path = cache_dir / f"{stem}.onnx"
+
+    if not onnx_path.exists():
+        model = build_model() if build_model else YOLO(weights_path)
+        exported = model.export(format='onnx', imgsz=imgsz, dynamic=True)
+        shutil.move(str(exported), str(onnx_path))
+
+    if not quantize:
+        return str(onnx_path)
+
+    int8_path = cache_dir / f"{stem}-int8.onnx"
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(onnx_path), str(int8_path), weight_type=QuantType.QUInt8)
+    return str(int8_path)
+
+
+class _YOLORunner(ABC):
+    """
+    Shared pre- and post-processing for YOLO detection graphs.
+
+    Calling an instance mirrors ``YOLO.__call__``: it accepts a frame or a list of
+    frames and returns a list of ultralytics ``Results``. Subclasses only provide
+    the raw forward pass.
+    """
+
+    names: Dict[int, str]
+    imgsz: int
+
+    @abstractmethod
+    def _forward(self, batch: np.ndarray) -> torch.Tensor:
+        """Run the raw network on a preprocessed batch."""
+
+    def _letterbox(self, frame: np.ndarray) -> np.ndarray:
+        """Resize and pad a BGR frame to the square network input."""
+        height, width = frame.shape[:2]
+        scale = min(self.imgsz / height, self.imgsz / width)
+        new_width, new_height = round(width * scale), round(height * scale)
+
+        canvas = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+        top = (self.imgsz - new_height) // 2
+        left = (self.imgsz - new_width) // 2
+        canvas[top:top + new_height, left:left + new_width] = cv2.resize(
+            frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR
+        )
+        return canvas
+
+    def _preprocess(self, frames: Sequence[np.ndarray]) -> np.ndarray:
+        """Stack frames into a normalized NCHW RGB float32 batch."""
+        batch = np.stack([self._letterbox(frame) for frame in frames])
+        batch = batch[..., ::-1].transpose(0, 3, 1, 2)
+        return np.ascontiguousarray(batch, dtype=np.float32) / 255.0
+
+    def __call__(self,
+                 source: Union[np.ndarray, Sequence[np.ndarray]],
+                 conf: float = 0.25,
+                 iou: float = 0.7,
+                 max_det: int = 300,
+                 **kwargs) -> List[Results]:
+        """
+        Run detection on one frame or a batch of frames.
+
+        Args:
+            source (Union[np.ndarray, Sequence[np.ndarray]]): BGR frame or list of frames
+            conf (float): Confidence threshold
+            iou (float): IoU threshold for non-maximum suppression
+            max_det (int): Maximum detections per frame
+
+        Returns:
+            List[Results]: One result per input frame
+        """
+        frames = [source] if isinstance(source, np.ndarray) else list(source)
+        batch = self._preprocess(frames)
+        predictions = self._forward(batch)
+
+        detections = ops.non_max_suppression(predictions, conf, iou, max_det=max_det)
+
+        results = []
+        for frame, det in zip(frames, detections):
+            det[:, :4] = ops.scale_boxes(batch.shape[2:], det[:, :4], frame.shape)
+            results.append(Results(frame, path='', names=self.names, boxes=det))
+        return results
+
+
+class OnnxYOLO(_YOLORunner):
+    """ONNX Runtime drop-in for an ultralytics YOLO detection model."""
+
+    def __init__(self,
+                 onnx_path: str,
+                 imgsz: int = 640,
+                 intra_op_threads: Optional[int] = None,
+                 inter_op_threads: int = 1,
+                 providers: Optional[List[str]] = None):
+        """
+        Create an inference session for an exported YOLO graph.
+
+        Args:
+            onnx_path (str): Path to the ONNX graph
+            imgsz (int): Square input size the graph was exported with
+            intra_op_threads (Optional[int]): Threads used inside an operator (defaults to all cores)
+            inter_op_threads (int): Threads used across independent operators
+            providers (Optional[List[str]]): Execution providers, e.g. ['OpenVINOExecutionProvider']
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads or os.cpu_count() or 1
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.session = ort.InferenceSession(
+            onnx_path,
+            sess_options=options,
+            providers=providers or ['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.imgsz = imgsz
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata['names']) if 'names' in metadata else {}
+
+    def _forward(self, batch: np.ndarray) -> torch.Tensor:
+        return torch.from_numpy(self.session.run(None, {self.input_name: batch})[0])
+
+
+class TorchYOLO(_YOLORunner):
+    """
+    PyTorch runner for a bare ultralytics ``DetectionModel``.
+
+    Used for models restored from a local artifact, where building a full
+    ``YOLO`` wrapper would require a second checkpoint.
+    """
+
+    def __init__(self,
+                 model: torch.nn.Module,
+                 names: Dict[int, str],
+                 imgsz: int = 640,
+                 device: Union[str, torch.device] = 'cpu'):
+        """
+        Wrap a detection network for inference.
+
+        Args:
+            model (torch.nn.Module): Detection network in eval mode
+            names (Dict[int, str]): Class id to class name mapping
+            imgsz (int): Square inference input size
+            device (Union[str, torch.device]): Device to run inference on
+        """
+        self.model = model.eval()
+        self.names = names
+        self.imgsz = imgsz
+        self.to(device)
+
+    def to(self, device: Union[str, torch.device]) -> 'TorchYOLO':
+        """Move the network to a device."""
+        self.device = torch.device(device)
+        self.model.to(self.device)
+        return self
+
+    def _forward(self, batch: np.ndarray) -> torch.Tensor:
+        with torch.inference_mode():
+            output = self.model(torch.from_numpy(batch).to(self.device))
+        if isinstance(output, (list, tuple)):
+            output = output[0]
+        return output.float().cpu()
+
+    def export(self, format: str = 'onnx', imgsz: int = 640, dynamic: bool = True, **kwargs) -> str:
+        """
+        Export the network to ONNX, mirroring ``YOLO.export``.
+
+        Args:
+            format (str): Export format, only 'onnx' is supported
+            imgsz (int): Square input size of the exported graph
+            dynamic (bool): Whether the batch dimension is dynamic
+
+        Returns:
+            str: Path to the exported graph
+        """
+        if format != 'onnx':
+            raise ValueError(f"Unsupported export format '{format}'")
+        import onnx
+
+        fd, onnx_path = tempfile.mkstemp(suffix='.onnx')
+        os.close(fd)
+
+        # Detection heads return a single tensor instead of a tuple in export mode
+        heads = [m for m in self.model.modules() if isinstance(m, Detect)]
+        for head in heads:
+            head.export = True
+
+        dummy = torch.zeros(1, 3, imgsz, imgsz, device=self.device)
+        try:
+            torch.onnx.export(
+                self.model,
+                dummy,
+                onnx_path,
+                input_names=['images'],
+                output_names=['output0'],
+                dynamic_axes={'images': {0: 'batch'}, 'output0': {0: 'batch'}} if dynamic else None,
+                opset_version=12
+            )
+        finally:
+            for head in heads:
+                head.export = False
+
+        graph = onnx.load(onnx_path)
+        entry = graph.metadata_props.add()
+        entry.key, entry.value = 'names', str(self.names)
+        onnx.save(graph, onnx_path)
+        return onnx_path
+
+
+def load_yolo(weights_path: str,
+              backend: str = 'torch',
+              build_model: Optional[Callable[[], Any]] = None,
+              **backend_options) -> Union[YOLO, OnnxYOLO, TorchYOLO]:
+    """
+    Load a YOLO detection model on the requested inference backend.
+
+    Args:
+        weights_path (str): Path to the PyTorch weights
+        backend (str): 'torch' for ultralytics eager mode or 'onnx' for ONNX Runtime
+        build_model (Optional[Callable[[], Any]]): Factory for the PyTorch model (defaults to YOLO(weights_path))
+        **backend_options: intra_op_threads for both backends (torch threads are set for
+            the calling thread), and ONNX options (cache_dir, imgsz, quantize,
+            inter_op_threads, providers)
+
+    Returns:
+        Union[YOLO, OnnxYOLO, TorchYOLO]: Callable model returning ultralytics Results
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+    if backend == 'torch':
+        if backend_options.get('intra_op_threads'):
+            torch.set_num_threads(backend_options['intra_op_threads'])
+        return build_model() if build_model else YOLO(weights_path)
+
+    imgsz = backend_options.pop('imgsz', 640)
+    onnx_path = export_onnx(
+        weights_path,
+        build_model=build_model,
+        cache_dir=backend_options.pop('cache_dir', DEFAULT_CACHE_DIR),
+        imgsz=imgsz,
+        quantize=backend_options.pop('quantize', False)
+    )
+    return OnnxYOLO(onnx_path, imgsz=imgsz, **backend_options)
+
+
+def verify_parity(reference: Callable,
+                  candidate: Callable,
+                  frames: Sequence[np.ndarray],
+                  conf: float = 0.25,
+                  atol: float = 2.0) -> Dict[str, Any]:
+    """
+    Compare detections of two backends on the same frames.
+
+    Boxes are matched by order after sorting on confidence, which is sufficient
+    for a float32 export of the same weights; INT8 graphs need a larger tolerance.
+
+    Args:
+        reference (Callable): Model used as ground truth (usually the PyTorch model)
+        candidate (Callable): Model under test (usually an OnnxYOLO)
+        frames (Sequence[np.ndarray]): Frames to compare on
+        conf (float): Confidence threshold for both backends
+        atol (float): Allowed box coordinate difference in pixels
+
+    Returns:
+        Dict[str, Any]: Parity summary with per-frame count mismatches and max box error
+    """
+    count_mismatches = 0
+    max_box_error = 0.0
+
+    for frame in frames:
+        expected = reference(frame, conf=conf)[0].boxes.data.cpu().numpy()
+        actual = candidate(frame, conf=conf)[0].boxes.data.cpu().numpy()
+
+        if len(expected) != len(actual):
+            count_mismatches += 1
+            continue
+        if len(expected) == 0:
+            continue
+
+        expected = expected[np.argsort(-expected[:, 4])]
+        actual = actual[np.argsort(-actual[:, 4])]
+        max_box_error = max(max_box_error, float(np.abs(expected[:, :4] - actual[:, :4]).max()))
+
+    return {
+        'frames': len(frames),
+        'count_mismatches': count_mismatches,
+        'max_box_error': max_box_error,
+        'passed': count_mismatches == 0 and max_box_error <= atol
+    }
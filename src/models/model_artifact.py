@@ -0,0 +1,77 @@
+import os
+from typing import Any, Dict, Optional, Union
+
+import torch
+from ultralytics.nn.tasks import DetectionModel
+
+from src.models.inference_backend import TorchYOLO
+
+ARTIFACT_FORMAT = 'ai-event-yolo/1'
+
+
+def save_model_artifact(yolo_model: Any, output_path: str) -> str:
+    """
+    Save a YOLO detection model as a self-contained local artifact.
+
+    The artifact holds the architecture config, class names and weights in a
+    single zip-serialized file so it can be memory-mapped on load.
+
+    Args:
+        yolo_model (Any): ultralytics YOLO model to save
+        output_path (str): Path of the artifact file
+
+    Returns:
+        str: Path to the saved artifact
+    """
+    network = yolo_model.model
+    artifact = {
+        'format': ARTIFACT_FORMAT,
+        'config': dict(network.yaml),
+        'names': dict(network.names),
+        'state_dict': {k: v.detach().cpu() for k, v in network.state_dict().items()}
+    }
+    torch.save(artifact, output_path)
+    return output_path
+
+
+def load_model_artifact(artifact_path: str,
+                        device: Optional[Union[str, torch.device]] = None,
+                        imgsz: int = 640) -> TorchYOLO:
+    """
+    Load a model artifact with a single memory-mapped read.
+
+    Builds the network from the stored config and assigns the mapped tensors
+    directly, so no base checkpoint is loaded and nothing is downloaded.
+
+    Args:
+        artifact_path (str): Path to an artifact written by save_model_artifact
+        device (Optional[Union[str, torch.device]]): Inference device (defaults to CUDA when available)
+        imgsz (int): Square inference input size
+
+    Returns:
+        TorchYOLO: Callable detection model returning ultralytics Results
+    """
+    if not os.path.exists(artifact_path):
+        raise FileNotFoundError(
+            f"Model artifact not found at {artifact_path}. "
+            "Please run download_models.py first."
+        )
+
+    artifact: Dict[str, Any] = torch.load(
+        artifact_path, map_location='cpu', mmap=True, weights_only=True
+    )
+    if not isinstance(artifact, dict) or artifact.get('format') != ARTIFACT_FORMAT:
+        raise ValueError(
+            f"{artifact_path} is not a {ARTIFACT_FORMAT} model artifact. "
+            "Please re-run download_models.py to regenerate it."
+        )
+
+    names = artifact['names']
+    network = DetectionModel(artifact['config'], nc=len(names), verbose=False)
+    network.load_state_dict(artifact['state_dict'], assign=True)
+    network.names = names
+    network = network.fuse(verbose=False)
+
+    if device is None:
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    return TorchYOLO(network, names, imgsz=imgsz, device=device)
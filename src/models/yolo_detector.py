@@ -1,18 +1,38 @@
-from ultralytics import YOLO
 import cv2
+from contextlib import ExitStack
 import numpy as np
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Sequence, Union
+from src.models.inference_backend import load_yolo
+from src.utils.video_utils import open_frame_reader, FFmpegVideoWriter
+from utils.feature_store import FeatureStoreWriter
+
+# One record per detection; per-frame slices are given by an offsets array
+DETECTION_DTYPE = np.dtype([
+    ('frame', np.int32),
+    ('bbox', np.float32, (4,)),
+    ('confidence', np.float32),
+    ('class_id', np.int16)
+])
 
 class YOLODetector:
-    def __init__(self, model_path: str = "yolov8n.pt"):
+    def __init__(self, model_path: str = "yolov8n.pt",
+                 backend: str = "torch",
+                 backend_options: Optional[Dict[str, Any]] = None):
         """
         Initialize YOLO detector with specified model.
         
         Args:
             model_path (str): Path to YOLO model weights
+            backend (str): Inference backend, 'torch' or 'onnx'
+            backend_options (Optional[Dict[str, Any]]): Backend options passed to load_yolo
         """
-        self.model = YOLO(model_path)
-        
+        self.model = load_yolo(model_path, backend, **(backend_options or {}))
+    
+    @property
+    def names(self) -> Dict[int, str]:
+        """Class id to class name mapping of the loaded model."""
+        return self.model.names
+    
     def detect(self, frame: np.ndarray, conf_threshold: float = 0.25) -> List[Dict[str, Any]]:
         """
         Perform object detection on a single frame.
@@ -20,82 +40,167 @@ class YOLODetector:
         Args:
             frame (np.ndarray): Input frame
             conf_threshold (float): Confidence threshold for detections
-            
+        
         Returns:
             List[Dict[str, Any]]: List of detections with bounding boxes and class information
         """
-        results = self.model(frame, conf=conf_threshold)[0]
-        detections = []
+        detections, _ = self.detect_batch([frame], conf_threshold)
+        return self.to_dicts(detections)
+    
+    def detect_batch(self, frames: Sequence[np.ndarray],
+                     conf_threshold: float = 0.25,
+                     frame_offset: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Perform object detection on a batch of frames in one forward pass.
         
-        for box in results.boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            confidence = float(box.conf[0])
-            class_id = int(box.cls[0])
-            class_name = results.names[class_id]
-            
-            detections.append({
-                'bbox': (int(x1), int(y1), int(x2), int(y2)),
-                'confidence': confidence,
-                'class_id': class_id,
-                'class_name': class_name
-            })
-            
-        return detections
+        Args:
+            frames (Sequence[np.ndarray]): Input frames
+            conf_threshold (float): Confidence threshold for detections
+            frame_offset (int): Frame index assigned to the first frame of the batch
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: DETECTION_DTYPE records for all frames, and
+                offsets of length len(frames) + 1 so that frame i owns
+                detections[offsets[i]:offsets[i + 1]]
+        """
+        results = self.model(list(frames), conf=conf_threshold)
+        
+        offsets = np.zeros(len(results) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(result.boxes) for result in results])
+        detections = np.empty(offsets[-1], dtype=DETECTION_DTYPE)
+        
+        for i, result in enumerate(results):
+            # One device-to-host copy per frame: columns are x1, y1, x2, y2, conf, cls
+            data = result.boxes.data.cpu().numpy()
+            frame_detections = detections[offsets[i]:offsets[i + 1]]
+            frame_detections['frame'] = frame_offset + i
+            frame_detections['bbox'] = data[:, :4]
+            frame_detections['confidence'] = data[:, 4]
+            frame_detections['class_id'] = data[:, 5]
+        
+        return detections, offsets
     
-    def detect_video(self, video_path: str, output_path: str = None, 
-                    conf_threshold: float = 0.25) -> List[List[Dict[str, Any]]]:
+    def to_dicts(self, detections: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Convert detection records to the per-detection dict format.
+        
+        Args:
+            detections (np.ndarray): DETECTION_DTYPE records
+        
+        Returns:
+            List[Dict[str, Any]]: List of detections with bounding boxes and class information
+        """
+        return [
+            {
+                'bbox': tuple(int(v) for v in det['bbox']),
+                'confidence': float(det['confidence']),
+                'class_id': int(det['class_id']),
+                'class_name': self.names[int(det['class_id'])]
+            }
+            for det in detections
+        ]
+    
+    def detect_video(self, video_path: str, output_path: str = None,
+                    conf_threshold: float = 0.25,
+                    decoder: str = "opencv",
+                    decoder_options: Optional[Dict[str, Any]] = None,
+                    batch_size: int = 1,
+                    as_array: bool = False,
+                    store_path: Optional[str] = None) -> Union[List[List[Dict[str, Any]]], Tuple[np.ndarray, np.ndarray]]:
         """
         Perform object detection on a video file.
         
         Args:
             video_path (str): Path to input video
-            output_path (str): Path to save annotated video (optional)
+            output_path (str): Path to save annotated H.264 video (optional)
             conf_threshold (float): Confidence threshold for detections
-            
+            decoder (str): Frame decoder, 'opencv' or 'ffmpeg'
+            decoder_options (Optional[Dict[str, Any]]): Options passed to open_frame_reader
+            batch_size (int): Number of frames per forward pass
+            as_array (bool): Return (detections, offsets) arrays instead of per-frame dict lists
+            store_path (Optional[str]): Directory to stream detections to as they are produced
+                (readable with utils.feature_store.FeatureStore)
+        
         Returns:
-            List[List[Dict[str, Any]]]: List of detections for each frame
+            Union[List[List[Dict[str, Any]]], Tuple[np.ndarray, np.ndarray]]: List of detections
+                for each frame, or DETECTION_DTYPE records with per-frame offsets
         """
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video file: {video_path}")
+        decoder_options = dict(decoder_options or {})
+        if decoder == 'ffmpeg':
+            # Every frame of a batch must stay valid until the batch is processed
+            decoder_options['num_buffers'] = max(decoder_options.get('num_buffers', 0), batch_size + 1)
+        # The reader, writer and store are closed even if detection fails
+        with ExitStack() as resources:
+            reader = resources.enter_context(open_frame_reader(video_path, decoder, **decoder_options))
             
-        all_detections = []
-        frame_count = 0
-        
-        # Get video properties
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        
-        # Initialize video writer if output path is provided
-        writer = None
-        if output_path:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            writer = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Perform detection
-            detections = self.detect(frame, conf_threshold)
-            all_detections.append(detections)
+            all_detections = []
+            chunks = []
+            counts = []
+            frame_count = 0
             
-            # Draw detections if output video is requested
-            if writer:
-                for det in detections:
-                    x1, y1, x2, y2 = det['bbox']
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    label = f"{det['class_name']}: {det['confidence']:.2f}"
-                    cv2.putText(frame, label, (x1, y1 - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                writer.write(frame)
+            # Get video properties
+            width = reader.width
+            height = reader.height
             
-            frame_count += 1
+            store = resources.enter_context(FeatureStoreWriter(store_path)) if store_path else None
             
-        cap.release()
-        if writer:
-            writer.release()
+            # Initialize video writer if output path is provided
+            writer = None
+            if output_path:
+                writer = resources.enter_context(FFmpegVideoWriter(output_path, width, height, reader.fps))
             
-        return all_detections 
\ No newline at end of file
+            def process(batch: List[np.ndarray]) -> None:
+                # Perform detection
+                detections, offsets = self.detect_batch(batch, conf_threshold, frame_count)
+                chunks.append(detections)
+                counts.append(np.diff(offsets))
+                
+                if store is not None:
+                    frame_indices = np.arange(frame_count, frame_count + len(batch))
+                    store.append('frames', {
+                        'frame': frame_indices.astype(np.int32),
+                        'timestamp': frame_indices / reader.fps,
+                        'detection_count': np.diff(offsets).astype(np.int32)
+                    })
+                    store.append('detections', {
+                        'frame': detections['frame'],
+                        'timestamp': detections['frame'] / reader.fps,
+                        'bbox': detections['bbox'],
+                        'confidence': detections['confidence'],
+                        'class_id': detections['class_id']
+                    })
+                
+                for i, frame in enumerate(batch):
+                    frame_detections = detections[offsets[i]:offsets[i + 1]]
+                    if not as_array:
+                        all_detections.append(self.to_dicts(frame_detections))
+                    
+                    # Draw detections if output video is requested
+                    if writer:
+                        for det in frame_detections:
+                            x1, y1, x2, y2 = (int(v) for v in det['bbox'])
+                            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                            label = f"{self.names[int(det['class_id'])]}: {det['confidence']:.2f}"
+                            cv2.putText(frame, label, (x1, y1 - 10),
+                                      cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+                        writer.write(frame)
+            
+            batch = []
+            for _, frame in reader:
+                batch.append(frame)
+                if len(batch) == batch_size:
+                    process(batch)
+                    frame_count += len(batch)
+                    batch = []
+            if batch:
+                process(batch)
+                frame_count += len(batch)
+        
+        if not as_array:
+            return all_detections
+        
+        offsets = np.zeros(frame_count + 1, dtype=np.int64)
+        if counts:
+            offsets[1:] = np.cumsum(np.concatenate(counts))
+        detections = np.concatenate(chunks) if chunks else np.empty(0, dtype=DETECTION_DTYPE)
+        return detections, offsets
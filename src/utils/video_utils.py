@@ -1,7 +1,12 @@
 import cv2
 import numpy as np
-from typing import Tuple, List
+from typing import Tuple, List, Iterable, Iterator, Optional, Union
 import ffmpeg
+import subprocess
+import tempfile
+import queue
+import threading
+from utils import profiling
 
 def load_video(video_path: str) -> Tuple[cv2.VideoCapture, dict]:
     """
@@ -26,10 +31,58 @@ def load_video(video_path: str) -> Tuple[cv2.VideoCapture, dict]:
     
     return cap, properties
 
+def iter_frames(video_path: str,
+                sample_rate: int = 1,
+                sample_interval: Optional[float] = None,
+                target_size: Optional[Tuple[int, int]] = None,
+                return_index: bool = False) -> Iterator[Union[np.ndarray, Tuple[int, np.ndarray]]]:
+    """
+    Lazily yield frames from a video file.
+    
+    Unsampled frames are only grabbed, never converted to BGR, and at most one
+    frame is held in memory at a time.
+    
+    Args:
+        video_path (str): Path to the video file
+        sample_rate (int): Yield every nth frame (ignored when sample_interval is set)
+        sample_interval (Optional[float]): Yield one frame every sample_interval seconds
+        target_size (Optional[Tuple[int, int]]): Resize yielded frames to (width, height)
+        return_index (bool): Yield (frame_index, frame) tuples instead of bare frames
+        
+    Yields:
+        Union[np.ndarray, Tuple[int, np.ndarray]]: Frames, optionally with their index
+    """
+    cap, properties = load_video(video_path)
+    fps = properties['fps'] or 30.0
+    next_sample_time = 0.0
+    frame_index = 0
+    
+    try:
+        while cap.grab():
+            if sample_interval:
+                sampled = frame_index / fps + 1e-9 >= next_sample_time
+                if sampled:
+                    next_sample_time += sample_interval
+            else:
+                sampled = frame_index % sample_rate == 0
+            
+            if sampled:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                if target_size is not None:
+                    frame = cv2.resize(frame, target_size, interpolation=cv2.INTER_AREA)
+                yield (frame_index, frame) if return_index else frame
+            frame_index += 1
+    finally:
+        cap.release()
+
 def extract_frames(video_path: str, sample_rate: int = 1) -> List[np.ndarray]:
     """
     Extract frames from a video file at specified sample rate.
     
+    Holds every sampled frame in memory; prefer iter_frames for long videos.
+    
     Args:
         video_path (str): Path to the video file
         sample_rate (int): Extract every nth frame
@@ -37,21 +90,36 @@ def extract_frames(video_path: str, sample_rate: int = 1) -> List[np.ndarray]:
     Returns:
         List[np.ndarray]: List of frames as numpy arrays
     """
-    cap, _ = load_video(video_path)
-    frames = []
-    frame_count = 0
+    return list(iter_frames(video_path, sample_rate=sample_rate))
+
+def write_video(frames: Iterable[np.ndarray], output_path: str, fps: float = 30) -> int:
+    """
+    Write frames from any iterable to a video file as they arrive.
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        if frame_count % sample_rate == 0:
-            frames.append(frame)
-        frame_count += 1
+    Args:
+        frames (Iterable[np.ndarray]): Frames to write, all of the same size
+        output_path (str): Path to save the video
+        fps (float): Frames per second for the output video
+        
+    Returns:
+        int: Number of frames written
+    """
+    out = None
+    count = 0
     
-    cap.release()
-    return frames
+    try:
+        for frame in frames:
+            if out is None:
+                height, width = frame.shape[:2]
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            out.write(frame)
+            count += 1
+    finally:
+        if out is not None:
+            out.release()
+    
+    return count
 
 def save_video(frames: List[np.ndarray], output_path: str, fps: int = 30) -> None:
     """
@@ -65,14 +133,7 @@ def save_video(frames: List[np.ndarray], output_path: str, fps: int = 30) -> Non
     if not frames:
         raise ValueError("No frames provided")
     
-    height, width = frames[0].shape[:2]
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-    
-    for frame in frames:
-        out.write(frame)
-    
-    out.release()
+    write_video(frames, output_path, fps)
 
 def get_video_duration(video_path: str) -> float:
     """
@@ -89,4 +150,310 @@ def get_video_duration(video_path: str) -> float:
         duration = float(probe['format']['duration'])
         return duration
     except ffmpeg.Error as e:
-        raise RuntimeError(f"Error getting video duration: {str(e)}") 
\ No newline at end of file
+        raise RuntimeError(f"Error getting video duration: {str(e)}") 
+
+class OpenCVFrameReader:
+    """
+    Frame reader backed by cv2.VideoCapture.
+    
+    Iterating yields (frame_index, frame) tuples with a freshly allocated frame
+    per read.
+    """
+    
+    def __init__(self,
+                 video_path: str,
+                 size: Optional[Tuple[int, int]] = None,
+                 start_frame: int = 0):
+        """
+        Open a video for reading.
+        
+        Args:
+            video_path (str): Path to the video file
+            size (Optional[Tuple[int, int]]): Resize frames to (width, height)
+            start_frame (int): Index of the first frame to read
+        """
+        self.cap, properties = load_video(video_path)
+        self.size = size
+        self.start_frame = start_frame
+        self.fps = properties['fps']
+        self.frame_count = properties['frame_count']
+        self.width, self.height = size or (properties['width'], properties['height'])
+        
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        if self.start_frame:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+        frame_index = self.start_frame
+        
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            if self.size is not None:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+            yield frame_index, frame
+            frame_index += 1
+            
+    def close(self) -> None:
+        """Release the underlying capture."""
+        self.cap.release()
+        
+    def __enter__(self) -> 'OpenCVFrameReader':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class FFmpegFrameReader:
+    """
+    Frame reader that decodes through an ffmpeg rawvideo pipe.
+    
+    Frames are read with readinto into a fixed ring of preallocated buffers, so
+    decoding allocates nothing per frame. A yielded frame stays valid until
+    num_buffers further frames have been read; copy it to keep it longer.
+    """
+    
+    CHANNELS = {'bgr24': 3, 'rgb24': 3, 'gray': 1}
+    
+    def __init__(self,
+                 video_path: str,
+                 size: Optional[Tuple[int, int]] = None,
+                 fps: Optional[float] = None,
+                 pix_fmt: str = 'bgr24',
+                 threads: int = 0,
+                 num_buffers: int = 4,
+                 start_frame: int = 0,
+                 ffmpeg_path: str = 'ffmpeg'):
+        """
+        Probe a video and prepare the decoder command.
+        
+        Args:
+            video_path (str): Path to the video file
+            size (Optional[Tuple[int, int]]): Output frame size (width, height), scaled by ffmpeg
+            fps (Optional[float]): Output frame rate, resampled by ffmpeg (defaults to source rate)
+            pix_fmt (str): Output pixel format: 'bgr24', 'rgb24' or 'gray'
+            threads (int): Decoder threads (0 lets ffmpeg decide)
+            num_buffers (int): Number of frame buffers in the ring
+            start_frame (int): Index of the first frame to read, at the output frame rate
+            ffmpeg_path (str): Path to FFmpeg executable
+        """
+        if pix_fmt not in self.CHANNELS:
+            raise ValueError(f"Unsupported pixel format '{pix_fmt}', expected one of {list(self.CHANNELS)}")
+        
+        try:
+            probe = ffmpeg.probe(video_path, select_streams='v:0')
+        except ffmpeg.Error as e:
+            raise ValueError(f"Could not open video file: {video_path}") from e
+        if not probe['streams']:
+            raise ValueError(f"No video stream in file: {video_path}")
+        stream = probe['streams'][0]
+        
+        numerator, denominator = stream.get('avg_frame_rate', '0/1').split('/')
+        source_fps = float(numerator) / float(denominator) if float(denominator) else 0.0
+        
+        self.video_path = video_path
+        self.fps = fps or source_fps or 30.0
+        duration = float(stream.get('duration') or probe['format'].get('duration') or 0.0)
+        self.frame_count = int(duration * self.fps)
+        self.width, self.height = size or (int(stream['width']), int(stream['height']))
+        self.pix_fmt = pix_fmt
+        self.threads = threads
+        self.start_frame = start_frame
+        self.ffmpeg_path = ffmpeg_path
+        self.process = None
+        self.stderr = None
+        
+        channels = self.CHANNELS[pix_fmt]
+        shape = (self.height, self.width, channels) if channels > 1 else (self.height, self.width)
+        self.frame_bytes = self.width * self.height * channels
+        self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(max(1, num_buffers))]
+        
+    def _command(self) -> List[str]:
+        """Build the ffmpeg decode command."""
+        command = [self.ffmpeg_path, '-v', 'error', '-nostdin', '-threads', str(self.threads)]
+        if self.start_frame:
+            command += ['-ss', f"{self.start_frame / self.fps:.6f}"]
+        command += ['-i', self.video_path, '-an', '-sn']
+        
+        filters = [f"fps={self.fps}", f"scale={self.width}:{self.height}"]
+        command += ['-vf', ','.join(filters), '-f', 'rawvideo', '-pix_fmt', self.pix_fmt, 'pipe:']
+        return command
+    
+    def _read_into(self, buffer: np.ndarray) -> bool:
+        """Fill a buffer with the next frame, returning False at end of stream."""
+        view = memoryview(buffer.reshape(-1))
+        filled = 0
+        while filled < self.frame_bytes:
+            count = self.process.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+    
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        self.close()
+        # A file rather than a pipe, so error output never blocks the decoder while frames are read
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            self._command(),
+            stdout=subprocess.PIPE,
+            stderr=self.stderr,
+            bufsize=0
+        )
+        frame_index = self.start_frame
+        
+        try:
+            while True:
+                buffer = self.buffers[(frame_index - self.start_frame) % len(self.buffers)]
+                if not self._read_into(buffer):
+                    break
+                yield frame_index, buffer
+                frame_index += 1
+            
+            # A failed decode also ends the stream; it must not pass for the end of the video
+            if self.process.wait() != 0:
+                self.stderr.seek(0)
+                error_output = self.stderr.read().decode(errors='replace').strip()
+                raise RuntimeError(f"FFmpeg error reading {self.video_path}: {error_output}")
+        finally:
+            self.close()
+            
+    def close(self) -> None:
+        """Stop the decoder process if it is running."""
+        if self.process is None:
+            return
+        self.process.stdout.close()
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+        self.stderr.close()
+        self.stderr = None
+        
+    def __enter__(self) -> 'FFmpegFrameReader':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def open_frame_reader(video_path: str,
+                      decoder: str = 'opencv',
+                      **options) -> Union[OpenCVFrameReader, FFmpegFrameReader]:
+    """
+    Open a frame reader for a video with the requested decoder.
+    
+    Args:
+        video_path (str): Path to the video file
+        decoder (str): 'opencv' for cv2.VideoCapture or 'ffmpeg' for the rawvideo pipe
+        **options: Reader options (size, start_frame, and for ffmpeg fps, pix_fmt,
+            threads, num_buffers)
+        
+    Returns:
+        Union[OpenCVFrameReader, FFmpegFrameReader]: Iterable of (frame_index, frame) tuples
+    """
+    if decoder == 'opencv':
+        return OpenCVFrameReader(video_path, **options)
+    if decoder == 'ffmpeg':
+        return FFmpegFrameReader(video_path, **options)
+    raise ValueError(f"Unknown decoder '{decoder}', expected 'opencv' or 'ffmpeg'")
+
+
+class FFmpegVideoWriter:
+    """
+    H.264 video writer that encodes in an ffmpeg process fed by a background thread.
+    
+    write() only copies the frame into a bounded queue; piping to ffmpeg and the
+    encode itself run concurrently with the caller. Output is yuv420p MP4 with
+    faststart, so it plays in browsers.
+    """
+    
+    def __init__(self,
+                 output_path: str,
+                 width: int,
+                 height: int,
+                 fps: float,
+                 pix_fmt: str = 'bgr24',
+                 preset: str = 'veryfast',
+                 crf: int = 23,
+                 queue_size: int = 16,
+                 ffmpeg_path: str = 'ffmpeg'):
+        """
+        Start the encoder process and writer thread.
+        
+        Args:
+            output_path (str): Path to save the video
+            width (int): Frame width
+            height (int): Frame height
+            fps (float): Frames per second for the output video
+            pix_fmt (str): Pixel format of the frames passed to write()
+            preset (str): libx264 preset
+            crf (int): libx264 constant rate factor
+            queue_size (int): Maximum number of frames waiting to be encoded
+            ffmpeg_path (str): Path to FFmpeg executable
+        """
+        command = [
+            ffmpeg_path, '-v', 'error', '-y',
+            '-f', 'rawvideo', '-pix_fmt', pix_fmt,
+            '-s', f"{width}x{height}", '-r', str(fps),
+            '-i', 'pipe:',
+            '-an',
+            # libx264 with yuv420p needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            output_path
+        ]
+        self.output_path = output_path
+        self.frame_count = 0
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        
+    def _run(self) -> None:
+        """Pipe queued frames to ffmpeg until the end-of-stream marker."""
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                with profiling.timer('video.encode'):
+                    self.process.stdin.write(frame.data)
+            except (BrokenPipeError, OSError) as e:
+                self.error = e
+        
+    def write(self, frame: np.ndarray) -> None:
+        """
+        Queue a frame for encoding.
+        
+        Args:
+            frame (np.ndarray): Frame to write (copied, so the caller may reuse it)
+        """
+        if self.error is not None:
+            raise RuntimeError(f"FFmpeg encoder failed: {self.error}")
+        self.queue.put(np.array(frame, order='C', copy=True))
+        self.frame_count += 1
+        
+    def release(self) -> None:
+        """Flush queued frames and wait for the encoder to finish."""
+        if self.process is None:
+            return
+        self.queue.put(None)
+        self.thread.join()
+        self.process.stdin.close()
+        error_output = self.process.stderr.read().decode(errors='replace')
+        returncode = self.process.wait()
+        self.process = None
+        if returncode != 0 or self.error is not None:
+            raise RuntimeError(f"FFmpeg error writing {self.output_path}: {error_output or self.error}")
+        
+    def __enter__(self) -> 'FFmpegVideoWriter':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.release()
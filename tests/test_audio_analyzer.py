@@ -0,0 +1,58 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+audio_analyzer = pytest.importorskip('video_processing.audio_analyzer')
+
+
+@pytest.mark.parametrize('seconds', [0.05, 0.2, 0.5, 0.99, 1.5])
+def test_detect_applause_short_audio(seconds):
+    # Audio shorter than the one-second scoring window, e.g. the tail block of analyze_stream
+    analyzer = audio_analyzer.AudioAnalyzer()
+    rng = np.random.default_rng(0)
+    audio = (0.3 * rng.standard_normal(int(seconds * analyzer.sample_rate))).astype(np.float32)
+
+    segments = analyzer.detect_applause(audio, min_duration=0.0)
+
+    for segment in segments:
+        assert 0.0 <= segment['start'] < segment['end'] <= seconds + analyzer.hop_length / analyzer.sample_rate
+        assert 0.0 <= segment['score'] <= 1.0
+
+
+def test_spectral_features_cache_is_per_thread():
+    analyzer = audio_analyzer.AudioAnalyzer()
+    rng = np.random.default_rng(1)
+    first = rng.standard_normal(analyzer.sample_rate).astype(np.float32)
+    second = 0.1 * rng.standard_normal(analyzer.sample_rate).astype(np.float32)
+    features = analyzer.spectral_features(first)
+
+    # Another thread caching features of other audio leaves this thread's entry intact
+    worker = threading.Thread(target=analyzer.spectral_features, args=(second,))
+    worker.start()
+    worker.join()
+
+    assert analyzer.spectral_features(first) is features
+    assert np.allclose(analyzer.spectral_features(second)['rms'], analyzer.spectral_features(second.copy())['rms'])
+
+
+def test_stream_audio_raises_when_decoding_fails_partway(tmp_path):
+    # Stand-in for ffmpeg that decodes two seconds of audio and then fails
+    ffmpeg = tmp_path / 'ffmpeg'
+    ffmpeg.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stdout.buffer.write(bytes(2 * 22050 * 4))\n"
+        "sys.stderr.write('Invalid data found when processing input')\n"
+        "sys.exit(1)\n"
+    )
+    ffmpeg.chmod(0o755)
+    analyzer = audio_analyzer.AudioAnalyzer(ffmpeg_path=str(ffmpeg))
+
+    blocks = []
+    with pytest.raises(RuntimeError, match='Invalid data'):
+        for start, block in analyzer.stream_audio('event.mp4', block_duration=1.0):
+            blocks.append(start)
+
+    assert blocks == [0.0, 1.0]
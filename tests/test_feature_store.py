@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from utils.feature_store import FeatureStore, FeatureStoreWriter
+
+
+def test_wider_strings_are_rejected(tmp_path):
+    with FeatureStoreWriter(str(tmp_path), buffer_rows=2) as store:
+        store.append('detections', {'class': np.array(['person']), 'confidence': 0.9})
+        with pytest.raises(ValueError):
+            store.append('detections', {'class': np.array(['celebrating']), 'confidence': 0.8})
+        store.append('detections', {'class': np.array(['crowd']), 'confidence': 0.7})
+
+    # Also against the width already written to disk
+    with FeatureStoreWriter(str(tmp_path), mode='a') as store:
+        with pytest.raises(ValueError):
+            store.append('detections', {'class': np.array(['celebrating']), 'confidence': 0.6})
+        assert store.rows('detections') == 2
+
+    assert FeatureStore(str(tmp_path)).column('detections', 'class').tolist() == ['person', 'crowd']
@@ -0,0 +1,39 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+pytest.importorskip('spacy')
+pytest.importorskip('transformers')
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from nlp_guest_mapping.guest_clustering import GuestAnalyzer
+
+
+def _analyzer() -> GuestAnalyzer:
+    # Clustering only uses the vectorizer, so the NLP models are not loaded
+    analyzer = GuestAnalyzer.__new__(GuestAnalyzer)
+    analyzer.vectorizer = TfidfVectorizer(max_features=1000)
+    analyzer.svd = None
+    return analyzer
+
+
+def _guests() -> pd.DataFrame:
+    rows = []
+    for i in range(4):
+        rows.append({'name': f"engineer {i}", 'title': 'Engineer', 'company': 'Acme', 'entities': []})
+        rows.append({'name': f"doctor {i}", 'title': 'Doctor', 'company': 'Mercy', 'entities': []})
+    # No text at all, and only tokens the vectorizer ignores
+    rows += [{'name': f"empty {i}", 'title': '', 'company': '', 'entities': []} for i in range(2)]
+    rows += [{'name': f"unknown {i}", 'title': 'x', 'company': '-', 'entities': []} for i in range(2)]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('eps', [0.3, 0.5, 0.6, 0.9])
+def test_scalable_matches_cosine(eps):
+    guests = _guests()
+    cosine = _analyzer().cluster_guests(guests, eps=eps, min_samples=2)
+    scalable = _analyzer().cluster_guests(guests, eps=eps, min_samples=2, scalable=True)
+
+    assert scalable == cosine
+    assert sorted(cosine[-1]) == ['empty 0', 'empty 1', 'unknown 0', 'unknown 1']
@@ -0,0 +1,49 @@
+import pytest
+
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sklearn')
+pytest.importorskip('spacy')
+pytest.importorskip('transformers')
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from nlp_guest_mapping.guest_clustering import GuestAnalyzer
+from nlp_guest_mapping.guest_index import GuestIndex
+
+
+def _analyzer() -> GuestAnalyzer:
+    # Guests are "analyzed" without entities, so the NLP models are not loaded
+    analyzer = GuestAnalyzer.__new__(GuestAnalyzer)
+    analyzer.vectorizer = TfidfVectorizer(max_features=1000)
+    analyzer.svd = None
+    analyzer.analyze_guest_data = lambda guest_data: pd.DataFrame([dict(g, entities=[]) for g in guest_data])
+    return analyzer
+
+
+def _guest(name, title, company):
+    return {'name': name, 'title': title, 'company': company}
+
+
+def test_add_nothing_to_empty_index():
+    index = GuestIndex(_analyzer())
+
+    assert index.add([]) == []
+    assert len(index.labels) == 0
+
+
+def test_drift_counts_guests_added_since_clustering(tmp_path):
+    index = GuestIndex(_analyzer(), drift_threshold=0.5)
+    index.build([_guest(f"engineer {i}", 'Engineer', 'Acme') for i in range(4)] +
+                [_guest(f"doctor {i}", 'Doctor', 'Mercy') for i in range(4)])
+    engineers = index.labels[0]
+
+    labels = index.add([_guest('engineer 4', 'Engineer', 'Acme'), _guest('chef', 'Chef', 'Bistro')])
+
+    assert labels == [engineers, -1]
+    assert index.drift == 0.5
+    index.save(str(tmp_path / 'guests.joblib'))
+    assert GuestIndex.load(str(tmp_path / 'guests.joblib'), _analyzer()).drift == 0.5
+
+    # A third unmatched guest passes the threshold and reclusters everything
+    index.add([_guest('pilot', 'Pilot', 'Airline')])
+    assert index.drift == 0.0
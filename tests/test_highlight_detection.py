@@ -0,0 +1,115 @@
+import cv2
+import numpy as np
+import pytest
+
+highlight_detection = pytest.importorskip('video_processing.highlight_detection')
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _detector():
+    # Detections from frame brightness instead of YOLO, so no model weights are needed
+    detector = highlight_detection.HighlightDetector.__new__(highlight_detection.HighlightDetector)
+    detector.analyze_frame = lambda frame, min_confidence, analyze_faces: (
+        None, [None] if frame.mean() > 100 else [], None
+    )
+    detector.describe_detections = lambda results, important: [
+        {'class': 'person', 'confidence': 1.0} for _ in important
+    ]
+    return detector
+
+
+def _write_video(path, frames=90, fps=10):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), fps, (64, 48))
+    rng = np.random.default_rng(0)
+    for index in range(frames):
+        # Bright moving noise in the middle of every 30 frames, dark otherwise
+        level = 200 if index % 30 >= 10 else 20
+        frame = np.full((48, 64, 3), level, dtype=np.uint8)
+        frame[:, :32] = rng.integers(0, 256, (48, 32, 3), dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def test_resumed_run_matches_straight_run(tmp_path):
+    video = tmp_path / 'event.avi'
+    _write_video(video)
+    options = dict(min_duration=0.5, analyze_audio=False, analyze_faces=False)
+    expected = _detector().detect_highlights(str(video), **options)
+
+    def interrupt(progress):
+        if progress >= 50:
+            raise Interrupted()
+
+    checkpoint = str(tmp_path / 'event.checkpoint.json')
+    with pytest.raises(Interrupted):
+        _detector().detect_highlights(str(video), checkpoint_path=checkpoint, checkpoint_interval=0.5,
+                                      progress_callback=interrupt, **options)
+    resumed = _detector().detect_highlights(str(video), checkpoint_path=checkpoint,
+                                            checkpoint_interval=0.5, **options)
+
+    assert len(expected) == 3
+    assert resumed == expected
+
+
+def test_failed_run_closes_reader_and_store(tmp_path, monkeypatch):
+    video = tmp_path / 'event.avi'
+    _write_video(video)
+    readers = []
+
+    def open_reader(*args, **kwargs):
+        reader = open_frame_reader(*args, **kwargs)
+        readers.append(reader)
+        return reader
+
+    open_frame_reader = highlight_detection.open_frame_reader
+    monkeypatch.setattr(highlight_detection, 'open_frame_reader', open_reader)
+    closed = []
+    monkeypatch.setattr(highlight_detection.FeatureStoreWriter, 'close', lambda store: closed.append(store))
+
+    def fail(progress):
+        raise MemoryError('highlight detection over budget')
+
+    detector = _detector()
+    detector._store_frame_features = lambda store, *features: None
+    with pytest.raises(MemoryError):
+        detector.detect_highlights(str(video), analyze_audio=False, analyze_faces=False,
+                                   feature_store=str(tmp_path / 'features'), progress_callback=fail)
+
+    assert not readers[0].cap.isOpened()
+    assert len(closed) == 1
+
+
+def test_failed_clip_extraction_releases_capture_and_encoder(tmp_path, monkeypatch):
+    video = tmp_path / 'event.avi'
+    _write_video(video)
+    captures = []
+    writers = []
+
+    class Capture(cv2.VideoCapture):
+        def __init__(self, *args):
+            super().__init__(*args)
+            captures.append(self)
+
+    class Writer(highlight_detection.FFmpegVideoWriter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            writers.append(self)
+
+    class FaceAnalyzer:
+        def detect_faces(self, frame):
+            raise MemoryError('clip extraction over budget')
+
+    monkeypatch.setattr(highlight_detection.cv2, 'VideoCapture', Capture)
+    monkeypatch.setattr(highlight_detection, 'FFmpegVideoWriter', Writer)
+    detector = _detector()
+    detector.face_analyzer = FaceAnalyzer()
+    highlights = [{'start_time': 1.0, 'end_time': 2.0, 'avg_face_analysis': {}}]
+
+    with pytest.raises(MemoryError):
+        detector.extract_highlight_clips(str(video), highlights, str(tmp_path / 'clips'))
+
+    assert not captures[0].isOpened()
+    assert writers[0].process is None
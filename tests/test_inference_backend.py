@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+pytest.importorskip('ultralytics')
+
+from ultralytics.nn.tasks import DetectionModel
+
+from src.models.inference_backend import OnnxYOLO, TorchYOLO, _YOLORunner, export_onnx, verify_parity
+
+IMGSZ = 320
+
+
+def _torch_model():
+    # Randomly initialized yolov8n, so no weights are downloaded
+    torch.manual_seed(0)
+    network = DetectionModel('yolov8n.yaml', nc=3, verbose=False)
+    for head in network.modules():
+        if hasattr(head, 'cv3'):
+            # Confidences around 0.5 instead of the near-zero initial bias, so frames have detections
+            for branch in head.cv3:
+                torch.nn.init.zeros_(branch[-1].bias)
+    return TorchYOLO(network, {0: 'person', 1: 'dancing', 2: 'cheering'}, imgsz=IMGSZ)
+
+
+def test_runner_requires_forward():
+    with pytest.raises(TypeError):
+        _YOLORunner()
+
+
+def test_onnx_export_matches_torch(tmp_path):
+    weights = tmp_path / 'yolov8n.pt'
+    weights.write_bytes(b'weights')
+    model = _torch_model()
+    onnx_path = export_onnx(str(weights), build_model=lambda: model, cache_dir=str(tmp_path / 'onnx'), imgsz=IMGSZ)
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 256, (240, 320, 3), dtype=np.uint8) for _ in range(3)]
+
+    parity = verify_parity(model, OnnxYOLO(onnx_path, imgsz=IMGSZ), frames, conf=0.6)
+
+    assert parity['frames'] == 3
+    assert parity['passed'], parity
@@ -0,0 +1,100 @@
+import asyncio
+import shutil
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+pipeline_module = pytest.importorskip('video_processing.pipeline')
+
+
+class UnsafeDetector:
+    """Detector keeping per-call state on the instance, like an ultralytics predictor."""
+
+    def __init__(self, **options):
+        self.video_path = None
+
+    def detect_highlights(self, video_path, progress_callback=None, **options):
+        self.video_path = video_path
+        time.sleep(0.05)
+        return [{'start_time': 0.0, 'end_time': 1.0, 'video': self.video_path}]
+
+
+def _analyze(pipeline, video_paths):
+    async def analyze_all():
+        return await asyncio.gather(*(
+            pipeline.analyze_video(path, '', lambda *args, **kwargs: None, extract=False) for path in video_paths
+        ))
+
+    try:
+        return [result['highlights'] for result in asyncio.run(analyze_all())]
+    finally:
+        pipeline.close()
+
+
+@pytest.mark.parametrize('given_detector', [False, True])
+def test_concurrent_videos_match_serial_run(monkeypatch, given_detector):
+    monkeypatch.setattr(pipeline_module, 'HighlightDetector', UnsafeDetector)
+    video_paths = ['talk.mp4', 'party.mp4']
+    serial = [UnsafeDetector().detect_highlights(path) for path in video_paths]
+
+    if given_detector:
+        # A detector without options to rebuild it is shared, one video at a time
+        pipeline = pipeline_module.EventPipeline(UnsafeDetector(), max_concurrent_videos=2)
+    else:
+        pipeline = pipeline_module.EventPipeline(max_concurrent_videos=2, detector_options={})
+
+    assert _analyze(pipeline, video_paths) == serial
+
+
+def _write_video(path, seconds, fps=10):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, (64, 48))
+    for index in range(int(seconds * fps)):
+        writer.write(np.full((48, 64, 3), index % 256, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+def _duration(path):
+    capture = cv2.VideoCapture(path)
+    try:
+        return capture.get(cv2.CAP_PROP_FRAME_COUNT) / capture.get(cv2.CAP_PROP_FPS)
+    finally:
+        capture.release()
+
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+@pytest.mark.parametrize('talk_highlights, expected', [
+    ([{'start_time': 1.0, 'end_time': 3.0, 'score': 0.8}], 2.0),
+    # No highlight at all: the opening of the first video, cut to the reel duration
+    ([], 3.0)
+])
+def test_reel_duration_leaves_out_videos_without_highlights(tmp_path, monkeypatch, talk_highlights, expected):
+    talk = _write_video(tmp_path / 'talk.mp4', 5)
+    quiet = _write_video(tmp_path / 'quiet.mp4', 10)
+    highlights = {talk: talk_highlights, quiet: []}
+
+    class Detector:
+        def detect_highlights(self, video_path, progress_callback=None, **options):
+            return [dict(highlight) for highlight in highlights[video_path]]
+
+    monkeypatch.setattr(pipeline_module, 'get_video_duration', _duration)
+    pipeline = pipeline_module.EventPipeline(Detector())
+    merged = []
+    merge = pipeline._merge
+
+    async def record_merge(clips, output_file, duration, *args):
+        merged.append((clips, duration))
+        return await merge(clips, output_file, duration, *args)
+
+    pipeline._merge = record_merge
+    try:
+        result = pipeline.run_sync([talk, quiet], str(tmp_path / 'reel.mp4'), reel_duration=3.0)
+    finally:
+        pipeline.close()
+
+    clips, duration = merged[0]
+    assert result['videos'][quiet]['selected'] == []
+    assert quiet not in clips and len(clips) == 1
+    assert duration == expected
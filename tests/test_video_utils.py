@@ -0,0 +1,38 @@
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+video_utils = pytest.importorskip('src.utils.video_utils')
+
+pytestmark = pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg is not installed')
+
+
+def _reader(monkeypatch, video_path):
+    # Probe results of a 64x48 10 fps video, so ffprobe is not needed
+    monkeypatch.setattr(video_utils.ffmpeg, 'probe', lambda *args, **kwargs: {
+        'streams': [{'avg_frame_rate': '10/1', 'duration': '2.0', 'width': 64, 'height': 48}],
+        'format': {}
+    })
+    return video_utils.FFmpegFrameReader(str(video_path))
+
+
+def test_ffmpeg_reader_reads_frames(tmp_path, monkeypatch):
+    video_path = tmp_path / 'event.avi'
+    writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'MJPG'), 10, (64, 48))
+    for index in range(20):
+        writer.write(np.full((48, 64, 3), index * 10, dtype=np.uint8))
+    writer.release()
+
+    with _reader(monkeypatch, video_path) as reader:
+        assert [index for index, _ in reader] == list(range(20))
+
+
+def test_ffmpeg_reader_raises_on_decode_failure(tmp_path, monkeypatch):
+    video_path = tmp_path / 'broken.mp4'
+    video_path.write_bytes(b'not a video')
+
+    with _reader(monkeypatch, video_path) as reader:
+        with pytest.raises(RuntimeError, match='broken.mp4'):
+            list(reader)
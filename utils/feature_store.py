@@ -0,0 +1,275 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+META_FILE = 'meta.json'
+
+Columns = Dict[str, Union[np.ndarray, float, int, bool]]
+
+
+def _write_meta(root: Path, meta: Dict[str, Any]) -> None:
+    """
+    Atomically replace the store metadata.
+
+    Args:
+        root (Path): Store directory
+        meta (Dict[str, Any]): Table and column metadata
+    """
+    tmp_path = root / f"{META_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp_path, root / META_FILE)
+
+
+class FeatureStoreWriter:
+    """
+    Incremental writer for a columnar on-disk feature store.
+
+    Each table is a directory holding one raw binary file per column, so readers
+    can memory-map only the columns they need. Rows are buffered in memory and
+    appended to the column files in blocks of buffer_rows.
+    """
+
+    def __init__(self, path: str, mode: str = 'w', buffer_rows: int = 1024):
+        """
+        Open a store for writing.
+
+        Args:
+            path (str): Store directory
+            mode (str): 'w' to start empty tables, 'a' to append to existing ones
+            buffer_rows (int): Rows buffered per table before they are written
+        """
+        if mode not in ('w', 'a'):
+            raise ValueError(f"Invalid mode '{mode}', expected 'w' or 'a'")
+
+        self.root = Path(path)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.buffer_rows = buffer_rows
+        self.meta: Dict[str, Any] = {'tables': {}}
+        self._buffers: Dict[str, List[Dict[str, np.ndarray]]] = {}
+        self._buffered: Dict[str, int] = {}
+
+        meta_path = self.root / META_FILE
+        if meta_path.exists():
+            with open(meta_path) as f:
+                existing = json.load(f)
+            if mode == 'a':
+                self.meta = existing
+            else:
+                for table in existing['tables']:
+                    shutil.rmtree(self.root / table, ignore_errors=True)
+        _write_meta(self.root, self.meta)
+
+    def rows(self, table: str) -> int:
+        """
+        Number of rows written to a table, including buffered rows.
+
+        Args:
+            table (str): Table name
+
+        Returns:
+            int: Row count
+        """
+        written = self.meta['tables'].get(table, {}).get('rows', 0)
+        return written + self._buffered.get(table, 0)
+
+    def append(self, table: str, columns: Union[Columns, np.ndarray]) -> None:
+        """
+        Append rows to a table.
+
+        Args:
+            table (str): Table name
+            columns (Union[Columns, np.ndarray]): Column name to values (scalars for a
+                single row), or a structured array whose fields are the columns
+        """
+        if isinstance(columns, np.ndarray):
+            columns = {name: columns[name] for name in columns.dtype.names}
+        arrays = {name: np.atleast_1d(np.asarray(values)) for name, values in columns.items()}
+
+        lengths = {len(values) for values in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns appended to '{table}' have different lengths: {sorted(lengths)}")
+
+        # String columns keep the width of their first rows; wider strings would be cut
+        columns_meta = self.meta['tables'].get(table, {}).get('columns', {})
+        buffered = self._buffers.get(table, [{}])[0]
+        for name, values in arrays.items():
+            if name in columns_meta:
+                dtype = np.dtype(columns_meta[name]['dtype'])
+            elif name in buffered:
+                dtype = buffered[name].dtype
+            else:
+                continue
+            if values.dtype.kind in 'SU' and not np.can_cast(values.dtype, dtype, 'safe'):
+                raise ValueError(
+                    f"Column '{name}' of '{table}' holds {dtype} strings, got wider {values.dtype}"
+                )
+
+        self._buffers.setdefault(table, []).append(arrays)
+        self._buffered[table] = self._buffered.get(table, 0) + lengths.pop()
+        if self._buffered[table] >= self.buffer_rows:
+            self._flush_table(table)
+
+    def _flush_table(self, table: str) -> None:
+        """Write the buffered rows of one table to its column files."""
+        chunks = self._buffers.pop(table, [])
+        self._buffered.pop(table, None)
+        if not chunks:
+            return
+
+        table_dir = self.root / table
+        table_dir.mkdir(exist_ok=True)
+        table_meta = self.meta['tables'].setdefault(table, {'rows': 0, 'columns': {}})
+
+        rows = 0
+        for name in chunks[0]:
+            values = np.concatenate([chunk[name] for chunk in chunks])
+            column_meta = table_meta['columns'].setdefault(
+                name, {'dtype': values.dtype.str, 'shape': list(values.shape[1:])}
+            )
+            values = np.ascontiguousarray(values, dtype=np.dtype(column_meta['dtype']))
+            with open(table_dir / f"{name}.bin", 'ab') as f:
+                f.write(values.tobytes())
+            rows = len(values)
+
+        table_meta['rows'] += rows
+
+    def truncate(self, table: str, rows: int) -> None:
+        """
+        Drop every row of a table after the first rows.
+
+        Args:
+            table (str): Table name
+            rows (int): Number of rows to keep
+        """
+        self.flush()
+        table_meta = self.meta['tables'].get(table)
+        if table_meta is None:
+            return
+
+        for name, column_meta in table_meta['columns'].items():
+            row_bytes = np.dtype(column_meta['dtype']).itemsize * int(np.prod(column_meta['shape']))
+            column_path = self.root / table / f"{name}.bin"
+            if column_path.exists():
+                with open(column_path, 'r+b') as f:
+                    f.truncate(rows * row_bytes)
+        table_meta['rows'] = min(table_meta['rows'], rows)
+        _write_meta(self.root, self.meta)
+
+    def flush(self) -> None:
+        """Write all buffered rows and update the metadata."""
+        for table in list(self._buffers):
+            self._flush_table(table)
+        _write_meta(self.root, self.meta)
+
+    def close(self) -> None:
+        """Flush and close the store."""
+        self.flush()
+
+    def __enter__(self) -> 'FeatureStoreWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class FeatureStore:
+    """
+    Lazy reader for a store written by FeatureStoreWriter.
+
+    Columns are memory-mapped on first access and range queries binary-search a
+    sorted time column, so only the pages of the requested window are read.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a store for reading.
+
+        Args:
+            path (str): Store directory
+        """
+        self.root = Path(path)
+        meta_path = self.root / META_FILE
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No feature store found at {path}")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        self._columns: Dict[tuple, np.ndarray] = {}
+
+    @property
+    def tables(self) -> List[str]:
+        """Names of the tables in the store."""
+        return list(self.meta['tables'])
+
+    def rows(self, table: str) -> int:
+        """
+        Number of rows in a table.
+
+        Args:
+            table (str): Table name
+
+        Returns:
+            int: Row count
+        """
+        return self.meta['tables'][table]['rows']
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """
+        Memory-map one column of a table.
+
+        Args:
+            table (str): Table name
+            name (str): Column name
+
+        Returns:
+            np.ndarray: Read-only memory-mapped column
+        """
+        key = (table, name)
+        if key not in self._columns:
+            table_meta = self.meta['tables'][table]
+            column_meta = table_meta['columns'][name]
+            rows = table_meta['rows']
+            if rows == 0:
+                self._columns[key] = np.empty((0, *column_meta['shape']), dtype=column_meta['dtype'])
+            else:
+                self._columns[key] = np.memmap(
+                    self.root / table / f"{name}.bin",
+                    dtype=np.dtype(column_meta['dtype']),
+                    mode='r',
+                    shape=(rows, *column_meta['shape'])
+                )
+        return self._columns[key]
+
+    def read(self,
+             table: str,
+             start_time: Optional[float] = None,
+             end_time: Optional[float] = None,
+             columns: Optional[List[str]] = None,
+             time_column: str = 'timestamp') -> Dict[str, np.ndarray]:
+        """
+        Read rows of a table, optionally restricted to a time window.
+
+        Args:
+            table (str): Table name
+            start_time (Optional[float]): Inclusive window start in seconds
+            end_time (Optional[float]): Inclusive window end in seconds
+            columns (Optional[List[str]]): Columns to read (defaults to all)
+            time_column (str): Sorted column used for the window
+
+        Returns:
+            Dict[str, np.ndarray]: Column name to memory-mapped slice
+        """
+        start, stop = 0, self.rows(table)
+        if start_time is not None or end_time is not None:
+            times = self.column(table, time_column)
+            if start_time is not None:
+                start = int(np.searchsorted(times, start_time, side='left'))
+            if end_time is not None:
+                stop = int(np.searchsorted(times, end_time, side='right'))
+
+        names = columns or list(self.meta['tables'][table]['columns'])
+        return {name: self.column(table, name)[start:stop] for name in names}
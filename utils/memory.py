@@ -0,0 +1,210 @@
+import contextlib
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, Optional
+
+MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process.
+
+    Returns:
+        int: RSS in bytes (the lifetime peak where the current value is unavailable)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryBudget:
+    """
+    RSS budget of a job.
+
+    Above soft_fraction of the limit the job should shed memory (spill buffers to
+    disk, shrink queues); above the limit it fails with a MemoryError instead of
+    being killed by the container.
+    """
+
+    def __init__(self, limit_mb: float, soft_fraction: float = 0.8):
+        """
+        Initialize the budget.
+
+        Args:
+            limit_mb (float): Hard RSS limit in MiB
+            soft_fraction (float): Fraction of the limit at which to start shedding memory
+        """
+        if limit_mb <= 0:
+            raise ValueError(f"Memory limit must be positive, got {limit_mb}")
+        self.limit = int(limit_mb * MB)
+        self.soft_limit = int(self.limit * soft_fraction)
+
+    @classmethod
+    def from_env(cls,
+                 variable: str = 'AI_EVENT_MEMORY_LIMIT_MB',
+                 default_mb: Optional[float] = None) -> Optional['MemoryBudget']:
+        """
+        Build a budget from an environment variable.
+
+        Args:
+            variable (str): Variable holding the limit in MiB
+            default_mb (Optional[float]): Limit used when the variable is unset
+
+        Returns:
+            Optional[MemoryBudget]: Budget, or None if neither the variable nor a default is set
+        """
+        value = os.environ.get(variable) or default_mb
+        return cls(float(value)) if value else None
+
+    def over_soft_limit(self) -> bool:
+        """Whether the process is above the soft limit."""
+        return current_rss() > self.soft_limit
+
+    def enforce(self, stage: str = '') -> None:
+        """
+        Fail if the process is above the hard limit.
+
+        Args:
+            stage (str): Stage name for the error message
+        """
+        rss = current_rss()
+        if rss > self.limit:
+            where = f" during {stage}" if stage else ''
+            raise MemoryError(f"RSS {rss / MB:.0f} MiB exceeds the {self.limit / MB:.0f} MiB budget{where}")
+
+    def queue_size(self, item_bytes: int, share: float = 0.05, maximum: int = 16) -> int:
+        """
+        Size a queue so its items use at most a share of the budget.
+
+        Args:
+            item_bytes (int): Size of one queued item
+            share (float): Fraction of the limit the queue may use
+            maximum (int): Upper bound on the queue size
+
+        Returns:
+            int: Queue size, at least 1
+        """
+        return max(1, min(maximum, int(self.limit * share) // max(item_bytes, 1)))
+
+
+class MemorySampler:
+    """
+    Background sampler of process memory, attributing peaks to named stages.
+
+    RSS is sampled every interval seconds; with trace_python the tracemalloc peak
+    of Python allocations is recorded per stage as well. Stages may overlap (e.g.
+    concurrent videos), in which case a sample counts toward every open stage.
+    """
+
+    def __init__(self, interval: float = 0.05, trace_python: bool = False):
+        """
+        Initialize the sampler.
+
+        Args:
+            interval (float): Seconds between RSS samples
+            trace_python (bool): Also track Python allocations with tracemalloc (slower)
+        """
+        self.interval = interval
+        self.trace_python = trace_python
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._open: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.peak_rss = 0
+
+    def start(self) -> 'MemorySampler':
+        """Start sampling."""
+        if self.trace_python and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sample()
+        if self.trace_python and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> int:
+        """
+        Take one sample and update the open stages.
+
+        Returns:
+            int: Current RSS in bytes
+        """
+        rss = current_rss()
+        traced = tracemalloc.get_traced_memory()[1] if self.trace_python and tracemalloc.is_tracing() else None
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for name in self._open:
+                stage = self.stages[name]
+                stage['peak_rss_mb'] = max(stage['peak_rss_mb'], rss / MB)
+                if traced is not None:
+                    stage['peak_traced_mb'] = max(stage.get('peak_traced_mb', 0.0), traced / MB)
+        return rss
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Attribute samples taken while the block runs to a stage.
+
+        Args:
+            name (str): Stage name
+        """
+        rss = current_rss()
+        with self._lock:
+            stage = self.stages.setdefault(name, {'start_rss_mb': rss / MB, 'peak_rss_mb': rss / MB})
+            self._open[name] = self._open.get(name, 0) + 1
+        if self.trace_python and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sample()
+            with self._lock:
+                stage['seconds'] = stage.get('seconds', 0.0) + time.perf_counter() - started
+                self._open[name] -= 1
+                if not self._open[name]:
+                    del self._open[name]
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Peak memory per stage.
+
+        Returns:
+            Dict[str, Any]: 'peak_rss_mb' of the process and per-stage 'stages' entries
+                with start and peak RSS (and the tracemalloc peak when tracing)
+        """
+        with self._lock:
+            return {
+                'peak_rss_mb': self.peak_rss / MB,
+                'stages': {name: dict(stage) for name, stage in self.stages.items()}
+            }
+
+    def __enter__(self) -> 'MemorySampler':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
@@ -0,0 +1,336 @@
+import contextlib
+import contextvars
+import cProfile
+import functools
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+# Instrumentation is off unless enabled in code or with AI_EVENT_PROFILE=1.
+# Disabled timers and counters cost one global lookup and a branch.
+_enabled = os.environ.get('AI_EVENT_PROFILE', '') not in ('', '0')
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class Metrics:
+    """
+    Thread-safe registry of timers and counters.
+
+    Each timer keeps its call count, total, minimum and maximum duration in
+    seconds; each counter keeps a running total.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers: Dict[str, Dict[str, float]] = {}
+        self.counters: Dict[str, float] = {}
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """
+        Record one timed call.
+
+        Args:
+            name (str): Timer name
+            seconds (float): Duration of the call
+        """
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = {'count': 1, 'total': seconds, 'min': seconds, 'max': seconds}
+            else:
+                timer['count'] += 1
+                timer['total'] += seconds
+                timer['min'] = min(timer['min'], seconds)
+                timer['max'] = max(timer['max'], seconds)
+
+    def add_count(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter.
+
+        Args:
+            name (str): Counter name
+            value (float): Amount to add
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Snapshot the metrics.
+
+        Returns:
+            Dict[str, Any]: 'timers' (with a derived 'mean') and 'counters'
+        """
+        with self._lock:
+            timers = {
+                name: dict(timer, mean=timer['total'] / timer['count'])
+                for name, timer in sorted(self.timers.items())
+            }
+            return {'timers': timers, 'counters': dict(sorted(self.counters.items()))}
+
+    def reset(self) -> None:
+        """Drop all recorded metrics."""
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+# Process-wide metrics, plus the metrics of the job running in the current context
+_global_metrics = Metrics()
+_current_job: contextvars.ContextVar[Optional[Metrics]] = contextvars.ContextVar('profiling_job', default=None)
+
+
+def enable() -> None:
+    """Turn instrumentation on."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Turn instrumentation off."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Whether instrumentation is on."""
+    return _enabled
+
+
+def _record_time(name: str, seconds: float) -> None:
+    _global_metrics.add_time(name, seconds)
+    job = _current_job.get()
+    if job is not None:
+        job.add_time(name, seconds)
+
+
+@contextlib.contextmanager
+def _timer(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_time(name, time.perf_counter() - start)
+
+
+def timer(name: str) -> contextlib.AbstractContextManager:
+    """
+    Context manager timing the enclosed block.
+
+    Args:
+        name (str): Timer name, e.g. 'highlight.yolo'
+
+    Returns:
+        contextlib.AbstractContextManager: Timing context (a shared no-op when disabled)
+    """
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _timer(name)
+
+
+def timed(name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of a function.
+
+    Args:
+        name (Optional[str]): Timer name (defaults to module.qualname)
+
+    Returns:
+        Callable[[Callable], Callable]: Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        metric = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_time(metric, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_iter(iterable: Iterable, name: str) -> Iterable:
+    """
+    Time how long each item of an iterable takes to produce (e.g. frame decoding).
+
+    Args:
+        iterable (Iterable): Source iterable
+        name (str): Timer name
+
+    Returns:
+        Iterable: The iterable itself when disabled, otherwise a timing wrapper
+    """
+    if not _enabled:
+        return iterable
+    return _timed_iter(iter(iterable), name)
+
+
+def _timed_iter(iterator: Iterator, name: str) -> Iterator:
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        _record_time(name, time.perf_counter() - start)
+        yield item
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Increment a counter.
+
+    Args:
+        name (str): Counter name, e.g. 'highlight.frames'
+        value (float): Amount to add
+    """
+    if not _enabled:
+        return
+    _global_metrics.add_count(name, value)
+    job = _current_job.get()
+    if job is not None:
+        job.add_count(name, value)
+
+
+@contextlib.contextmanager
+def job() -> Iterator[Metrics]:
+    """
+    Collect the metrics recorded in the current context into a per-job registry.
+
+    Work handed to threads only reports to the job if it runs in a copy of the
+    context (contextvars.copy_context().run).
+
+    Yields:
+        Metrics: Metrics of this job only
+    """
+    metrics = Metrics()
+    token = _current_job.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_job.reset(token)
+
+
+def report() -> Dict[str, Any]:
+    """
+    Snapshot the process-wide metrics.
+
+    Returns:
+        Dict[str, Any]: 'timers' and 'counters'
+    """
+    return _global_metrics.report()
+
+
+def reset() -> None:
+    """Drop all process-wide metrics."""
+    _global_metrics.reset()
+
+
+def _metric_name(prefix: str, name: str) -> str:
+    sanitized = ''.join(c if c.isalnum() else '_' for c in name)
+    return f"{prefix}_{sanitized}"
+
+
+def prometheus_text(metrics: Optional[Metrics] = None, prefix: str = 'ai_event') -> str:
+    """
+    Render metrics in the Prometheus text exposition format.
+
+    Timers become <name>_seconds_total and <name>_calls_total counters and a
+    <name>_seconds_max gauge.
+
+    Args:
+        metrics (Optional[Metrics]): Metrics to render (defaults to the process-wide ones)
+        prefix (str): Metric name prefix
+
+    Returns:
+        str: Exposition text
+    """
+    snapshot = (metrics or _global_metrics).report()
+    lines = []
+    for name, timer in snapshot['timers'].items():
+        base = _metric_name(prefix, name)
+        lines += [
+            f"# TYPE {base}_seconds_total counter",
+            f"{base}_seconds_total {timer['total']:.6f}",
+            f"# TYPE {base}_calls_total counter",
+            f"{base}_calls_total {timer['count']}",
+            f"# TYPE {base}_seconds_max gauge",
+            f"{base}_seconds_max {timer['max']:.6f}"
+        ]
+    for name, value in snapshot['counters'].items():
+        base = _metric_name(prefix, name)
+        lines += [f"# TYPE {base}_total counter", f"{base}_total {value:g}"]
+    return '\n'.join(lines) + '\n'
+
+
+@contextlib.contextmanager
+def capture_profile(output_path: str, engine: str = 'cprofile') -> Iterator[None]:
+    """
+    Capture a full profile of the enclosed block.
+
+    Only the thread entering the block is profiled; run thread pool work on a
+    CallingThreadExecutor to include it.
+
+    Args:
+        output_path (str): Output file: pstats data for cProfile, HTML (.html) or
+            text for pyinstrument
+        engine (str): 'cprofile' or 'pyinstrument'
+    """
+    if engine == 'cprofile':
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path)
+    elif engine == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise RuntimeError("pyinstrument is not installed; use engine='cprofile' or pip install pyinstrument") from e
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            output = profiler.output_html() if output_path.endswith('.html') else profiler.output_text()
+            with open(output_path, 'w') as f:
+                f.write(output)
+    else:
+        raise ValueError(f"Unknown profiler '{engine}', expected 'cprofile' or 'pyinstrument'")
+
+
+class CallingThreadExecutor(Executor):
+    """
+    Executor running each submitted call immediately in the submitting thread.
+
+    Swapped in for a thread pool while capturing a profile, so the work is
+    seen by the profiler of the calling thread.
+    """
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Run a call and return its already completed future.
+
+        Args:
+            fn (Callable): Function to call with args and kwargs
+
+        Returns:
+            Future: Future holding the result or the raised exception
+        """
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
@@ -2,5 +2,8 @@ from .reel_generator import ReelGenerator
 from .face_analyzer import FaceAnalyzer
 from .audio_analyzer import AudioAnalyzer
 from .highlight_detection import HighlightDetector
+from .live_detection import LiveHighlightDetector
+from .multicam_sync import MultiCamSync
+from .pipeline import EventPipeline
  
-__all__ = ['ReelGenerator', 'FaceAnalyzer', 'AudioAnalyzer', 'HighlightDetector'] 
\ No newline at end of file
+__all__ = ['ReelGenerator', 'FaceAnalyzer', 'AudioAnalyzer', 'HighlightDetector', 'LiveHighlightDetector', 'MultiCamSync', 'EventPipeline'] 
\ No newline at end of file
@@ -1,86 +1,337 @@
 import librosa
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import weakref
 import numpy as np
-from typing import List, Dict, Any, Tuple
+from scipy.ndimage import uniform_filter1d
+from typing import List, Dict, Any, Tuple, Iterator, Optional
 import soundfile as sf
+from utils import profiling
+
+# Applause score references: onsets per second, spectral flatness and share of
+# energy above 2 kHz at which the clap-density, noisiness and brightness terms
+# saturate, and the RMS below which audio is silence
+APPLAUSE_ONSET_RATE = 6.0
+APPLAUSE_FLATNESS = 0.15
+APPLAUSE_HIGH_RATIO = 0.25
+APPLAUSE_MIN_RMS = 0.003
 
 class AudioAnalyzer:
-    def __init__(self, sample_rate: int = 22050):
+    def __init__(self,
+                 sample_rate: int = 22050,
+                 ffmpeg_path: str = "ffmpeg",
+                 cache_dir: Optional[str] = None):
         """
         Initialize the audio analyzer.
         
         Args:
             sample_rate (int): Sample rate for audio processing
+            ffmpeg_path (str): Path to FFmpeg executable
+            cache_dir (Optional[str]): Directory to cache decoded audio in (no cache if None)
         """
         self.sample_rate = sample_rate
+        self.ffmpeg_path = ffmpeg_path
+        self.cache_dir = cache_dir
+        self.n_fft = 2048
+        self.hop_length = 512
+        # Per thread, one (weakref to audio, features) entry: the analyzer is shared
+        # by worker threads analyzing different audio
+        self._features_cache = threading.local()
+        
+    def _decode_command(self, video_path: str, output: str = 'pipe:') -> List[str]:
+        """
+        Build the FFmpeg command decoding a video's audio to mono float32 PCM.
+        
+        Args:
+            video_path (str): Path to the video file
+            output (str): Output file, or 'pipe:' for stdout
+            
+        Returns:
+            List[str]: FFmpeg command
+        """
+        return [
+            self.ffmpeg_path, '-v', 'error', '-nostdin', '-y',
+            '-i', video_path,
+            '-vn', '-ac', '1', '-ar', str(self.sample_rate),
+            '-f', 'f32le', output
+        ]
+    
+    def _cache_path(self, video_path: str) -> str:
+        """
+        Cache file of a video's decoded audio, keyed by path, size, mtime and sample rate.
         
-    def extract_audio(self, video_path: str) -> Tuple[np.ndarray, int]:
+        Args:
+            video_path (str): Path to the video file
+            
+        Returns:
+            str: Path of the raw float32 PCM cache file
+        """
+        stat = os.stat(video_path)
+        key = f"{os.path.abspath(video_path)}:{stat.st_size}:{stat.st_mtime_ns}:{self.sample_rate}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.f32')
+    
+    @profiling.timed('audio.extract_audio')
+    def extract_audio(self, video_path: str, backend: str = "ffmpeg") -> Tuple[np.ndarray, int]:
         """
         Extract audio from a video file.
         
+        The ffmpeg backend decodes and resamples straight to mono float32 in one
+        FFmpeg process, through a temporary raw PCM file; with a cache_dir that
+        file is kept and later calls for the same video only read it back. The librosa backend
+        goes through librosa.load.
+        
         Args:
             video_path (str): Path to the video file
+            backend (str): 'ffmpeg' or 'librosa'
             
         Returns:
             Tuple[np.ndarray, int]: Audio data and sample rate
         """
-        y, sr = librosa.load(video_path, sr=self.sample_rate)
-        return y, sr
+        if backend == 'librosa':
+            y, sr = librosa.load(video_path, sr=self.sample_rate)
+            return y, sr
+        if backend != 'ffmpeg':
+            raise ValueError(f"Unknown audio backend '{backend}', expected 'ffmpeg' or 'librosa'")
+        
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+        
+        cache_path = self._cache_path(video_path) if self.cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            return np.fromfile(cache_path, dtype=np.float32), self.sample_rate
+        
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(suffix='.f32', dir=self.cache_dir)
+        os.close(fd)
+        try:
+            result = subprocess.run(self._decode_command(video_path, temp_path), capture_output=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"Error decoding audio of {video_path}: {result.stderr.decode().strip()}")
+            y = np.fromfile(temp_path, dtype=np.float32)
+            if cache_path:
+                os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return y, self.sample_rate
+    
+    def stream_audio(self,
+                     video_path: str,
+                     block_duration: float = 60.0) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Decode the audio track of a video in fixed-size blocks.
+        
+        Only one block is held in memory at a time, instead of the whole track
+        extract_audio returns.
+        
+        Args:
+            video_path (str): Path to the video file
+            block_duration (float): Block length in seconds
+        
+        Returns:
+            Iterator[Tuple[float, np.ndarray]]: Block start time in seconds and mono float32 samples
+        """
+        block_bytes = int(block_duration * self.sample_rate) * 4
+        # Errors go to a file, so a decoder reporting many of them never blocks on a full pipe
+        stderr = tempfile.TemporaryFile()
+        process = subprocess.Popen(self._decode_command(video_path), stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            offset = 0
+            while True:
+                data = process.stdout.read(block_bytes)
+                if len(data) < 4:
+                    break
+                block = np.frombuffer(data[:len(data) // 4 * 4], dtype=np.float32)
+                yield offset / self.sample_rate, block
+                offset += len(block)
+            # A decode failing partway also ends the stream, so the blocks read are not the whole track
+            if process.wait() != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"Error decoding audio of {video_path}: {stderr.read().decode(errors='replace').strip()}"
+                )
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            stderr.close()
+    
+    def analyze_stream(self,
+                       video_path: str,
+                       block_duration: float = 60.0,
+                       min_duration: float = 0.5) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Detect applause and crowd reactions block by block with bounded memory.
+        
+        Applause segments are merged across block boundaries the same way
+        detect_applause merges onsets; crowd reaction levels are relative to the
+        loudest moment of each block rather than of the whole track.
+        
+        Args:
+            video_path (str): Path to the video file
+            block_duration (float): Block length in seconds
+            min_duration (float): Minimum duration for applause detection
+        
+        Returns:
+            Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: Applause segments and crowd reactions
+        """
+        segments = []
+        reactions = []
+        for start, block in self.stream_audio(video_path, block_duration):
+            if len(block) < self.n_fft:
+                # Tail shorter than one analysis window
+                continue
+            for segment in self.detect_applause(block, min_duration=0.0):
+                segment = dict(segment, start=segment['start'] + start, end=segment['end'] + start)
+                if segments and segment['start'] - segments[-1]['end'] < 0.5:
+                    segments[-1]['end'] = segment['end']
+                    segments[-1]['score'] = max(segments[-1]['score'], segment['score'])
+                else:
+                    segments.append(segment)
+            for reaction in self.analyze_crowd_reaction(block):
+                reaction['start_time'] += start
+                reaction['end_time'] += start
+                reactions.append(reaction)
+        
+        applause_segments = [s for s in segments if s['end'] - s['start'] >= min_duration]
+        return applause_segments, reactions
     
-    def detect_applause(self, 
+    @profiling.timed('audio.spectral_features')
+    def spectral_features(self, audio_data: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute the spectral front end shared by all audio analyses.
+        
+        One STFT is computed per signal; the onset envelope, band energies, RMS
+        and spectral flatness are all derived from it on the same frame grid.
+        The result is cached for the most recent audio array of each thread, so
+        analyzing the same audio with several methods computes it once.
+        
+        Args:
+            audio_data (np.ndarray): Audio data
+        
+        Returns:
+            Dict[str, np.ndarray]: Per-frame 'times', 'onset_env', 'rms', 'flatness',
+                'high_ratio' (share of the power above 2 kHz) and band energies 'low_band',
+                'mid_band', 'high_band' in dB relative to the loudest bin
+        """
+        entry = getattr(self._features_cache, 'entry', None)
+        if entry is not None and entry[0]() is audio_data:
+            return entry[1]
+        
+        magnitude = np.abs(librosa.stft(audio_data, n_fft=self.n_fft, hop_length=self.hop_length))
+        power = magnitude ** 2
+        
+        # Same envelope as onset_strength(y=...), without a second STFT
+        mel = librosa.feature.melspectrogram(S=power, sr=self.sample_rate)
+        onset_env = librosa.onset.onset_strength(S=librosa.power_to_db(mel), sr=self.sample_rate)
+        
+        S_db = librosa.amplitude_to_db(magnitude, ref=np.max)
+        freqs = librosa.fft_frequencies(sr=self.sample_rate, n_fft=self.n_fft)
+        
+        features = {
+            'times': librosa.frames_to_time(np.arange(magnitude.shape[1]), sr=self.sample_rate,
+                                            hop_length=self.hop_length),
+            'onset_env': onset_env,
+            'rms': librosa.feature.rms(S=magnitude, frame_length=self.n_fft)[0],
+            'flatness': librosa.feature.spectral_flatness(S=magnitude)[0],
+            'high_ratio': power[freqs >= 2000].sum(axis=0) / np.maximum(power.sum(axis=0), 1e-10),
+            'low_band': np.mean(S_db[(freqs >= 20) & (freqs <= 200)], axis=0),
+            'mid_band': np.mean(S_db[(freqs >= 200) & (freqs <= 2000)], axis=0),
+            'high_band': np.mean(S_db[(freqs >= 2000) & (freqs <= 20000)], axis=0)
+        }
+        
+        self._features_cache.entry = (weakref.ref(audio_data), features)
+        return features
+
+    @profiling.timed('audio.detect_applause')
+    def detect_applause(self,
                        audio_data: np.ndarray,
                        threshold: float = 0.5,
-                       min_duration: float = 0.5) -> List[Dict[str, Any]]:
+                       min_duration: float = 0.5,
+                       window: float = 1.0,
+                       max_gap: float = 0.5) -> List[Dict[str, Any]]:
         """
         Detect applause in audio data.
         
+        Every spectral frame gets an applause score in [0, 1] combining, over a
+        sliding window, the onset rate (dense claps), spectral flatness (noise-like
+        sound) and the share of energy above 2 kHz; quiet frames score 0. Runs of frames scoring
+        at least threshold, with gaps shorter than max_gap bridged, form segments.
+        
         Args:
             audio_data (np.ndarray): Audio data
-            threshold (float): Detection threshold
+            threshold (float): Minimum applause score of a frame
             min_duration (float): Minimum duration for applause detection
-            
+            window (float): Sliding window length in seconds
+            max_gap (float): Longest pause in seconds merged into a segment
+        
         Returns:
-            List[Dict[str, Any]]: List of applause segments
+            List[Dict[str, Any]]: Applause segments with 'start', 'end' and mean 'score'
         """
-        # Compute onset strength
-        onset_env = librosa.onset.onset_strength(y=audio_data, sr=self.sample_rate)
+        features = self.spectral_features(audio_data)
+        frame_rate = self.sample_rate / self.hop_length
+        
+        def frames(seconds: float) -> int:
+            return max(1, int(round(seconds * frame_rate)))
         
-        # Detect onsets
+        # Onsets at most 0.1 s apart, as a per-frame indicator
         onset_frames = librosa.onset.onset_detect(
-            onset_envelope=onset_env,
+            onset_envelope=features['onset_env'],
             sr=self.sample_rate,
-            wait=0.1,
-            pre_avg=0.1,
-            post_avg=0.1,
-            pre_max=0.1,
-            post_max=0.1
+            hop_length=self.hop_length,
+            wait=frames(0.1),
+            pre_avg=frames(0.1),
+            post_avg=frames(0.1),
+            pre_max=frames(0.1),
+            post_max=frames(0.1)
         )
+        onsets = np.zeros(len(features['times']))
+        onsets[onset_frames] = 1.0
         
-        # Convert frames to time
-        onset_times = librosa.frames_to_time(onset_frames, sr=self.sample_rate)
-        
-        # Group nearby onsets into applause segments
-        applause_segments = []
-        current_segment = None
-        
-        for time in onset_times:
-            if current_segment is None:
-                current_segment = {'start': time, 'end': time}
-            elif time - current_segment['end'] < 0.5:  # Merge if less than 0.5s apart
-                current_segment['end'] = time
-            else:
-                duration = current_segment['end'] - current_segment['start']
-                if duration >= min_duration:
-                    applause_segments.append(current_segment)
-                current_segment = {'start': time, 'end': time}
-        
-        # Add final segment if exists
-        if current_segment is not None:
-            duration = current_segment['end'] - current_segment['start']
-            if duration >= min_duration:
-                applause_segments.append(current_segment)
-        
-        return applause_segments
-    
+        # Sliding-window features, each mapped to [0, 1]; the window is zero-padded
+        # at the edges and the output keeps the input length, even for audio
+        # shorter than one window
+        def smooth(values: np.ndarray) -> np.ndarray:
+            return uniform_filter1d(values.astype(np.float64), frames(window), mode='constant')
+        
+        onset_rate = smooth(onsets) * frame_rate
+        density = np.clip(onset_rate / APPLAUSE_ONSET_RATE, 0.0, 1.0)
+        noisiness = np.clip(smooth(features['flatness']) / APPLAUSE_FLATNESS, 0.0, 1.0)
+        brightness = np.clip(smooth(features['high_ratio']) / APPLAUSE_HIGH_RATIO, 0.0, 1.0)
+        
+        score = 0.35 * density + 0.4 * noisiness + 0.25 * brightness
+        score[features['rms'] < APPLAUSE_MIN_RMS] = 0.0
+        
+        # Runs of frames above the threshold: [starts, ends) frame indices
+        edges = np.diff(np.concatenate(([0], (score >= threshold).astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1)
+        if not len(starts):
+            return []
+        
+        # Bridge short gaps: a run opens a new segment only after a long enough pause
+        opens = np.concatenate(([True], (starts[1:] - ends[:-1]) / frame_rate >= max_gap))
+        closes = np.concatenate((opens[1:], [True]))
+        starts = starts[opens]
+        ends = ends[closes]
+        
+        cumulative = np.concatenate(([0.0], np.cumsum(score)))
+        mean_scores = (cumulative[ends] - cumulative[starts]) / (ends - starts)
+        start_times = starts / frame_rate
+        end_times = ends / frame_rate
+        keep = end_times - start_times >= min_duration
+        
+        return [
+            {'start': float(start), 'end': float(end), 'score': float(mean_score)}
+            for start, end, mean_score in zip(start_times[keep], end_times[keep], mean_scores[keep])
+        ]
+
+    @profiling.timed('audio.analyze_crowd_reaction')
     def analyze_crowd_reaction(self,
                              audio_data: np.ndarray,
                              window_size: float = 1.0) -> List[Dict[str, Any]]:
@@ -94,22 +345,16 @@ class AudioAnalyzer:
         Returns:
             List[Dict[str, Any]]: List of crowd reaction segments
         """
-        # Compute spectrogram
-        D = librosa.stft(audio_data)
-        S_db = librosa.amplitude_to_db(np.abs(D), ref=np.max)
-        
-        # Compute energy in different frequency bands
-        freqs = librosa.fft_frequencies(sr=self.sample_rate)
-        low_band = np.mean(S_db[(freqs >= 20) & (freqs <= 200)], axis=0)
-        mid_band = np.mean(S_db[(freqs >= 200) & (freqs <= 2000)], axis=0)
-        high_band = np.mean(S_db[(freqs >= 2000) & (freqs <= 20000)], axis=0)
-        
-        # Convert to time
-        times = librosa.times_like(low_band)
+        # Energy in different frequency bands from the shared spectral front end
+        features = self.spectral_features(audio_data)
+        low_band = features['low_band']
+        mid_band = features['mid_band']
+        high_band = features['high_band']
+        times = features['times']
         
         # Detect significant energy changes
         reactions = []
-        window_frames = int(window_size * self.sample_rate / 2048)  # 2048 is default hop length
+        window_frames = max(1, int(window_size * self.sample_rate / self.hop_length))
         
         for i in range(0, len(times) - window_frames, window_frames):
             window_low = low_band[i:i+window_frames]
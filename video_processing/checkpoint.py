@@ -0,0 +1,77 @@
+import json
+import os
+from typing import Any, Dict, Optional
+
+class AnalysisCheckpoint:
+    def __init__(self, checkpoint_path: str, video_path: str, interval: float = 30.0):
+        """
+        Periodic checkpoint of a long-running video analysis.
+
+        Args:
+            checkpoint_path (str): Path of the checkpoint JSON file
+            video_path (str): Video being analyzed (checkpoints of other videos are ignored)
+            interval (float): Minimum video time in seconds between two checkpoints
+        """
+        self.checkpoint_path = checkpoint_path
+        self.interval = interval
+        stat = os.stat(video_path)
+        self.video_id = {
+            'path': os.path.abspath(video_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns
+        }
+        self.last_saved = None
+
+    def due(self, timestamp: float) -> bool:
+        """
+        Check whether a checkpoint should be written at this point of the video.
+
+        Args:
+            timestamp (float): Current video timestamp in seconds
+
+        Returns:
+            bool: True if at least interval seconds passed since the last checkpoint
+        """
+        if self.last_saved is None:
+            self.last_saved = timestamp
+            return False
+        return timestamp - self.last_saved >= self.interval
+
+    def save(self, timestamp: float, state: Dict[str, Any]) -> None:
+        """
+        Atomically write the analysis state.
+
+        Args:
+            timestamp (float): Video timestamp the state corresponds to
+            state (Dict[str, Any]): JSON-serializable analysis state
+        """
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'video': self.video_id, 'timestamp': timestamp, 'state': state}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        self.last_saved = timestamp
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the last checkpoint for this video.
+
+        Returns:
+            Optional[Dict[str, Any]]: Saved analysis state, or None if there is no
+                usable checkpoint for this video
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get('video') != self.video_id:
+            return None
+        self.last_saved = checkpoint['timestamp']
+        return checkpoint['state']
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the analysis has completed."""
+        if os.path.exists(self.checkpoint_path):
+            os.unlink(self.checkpoint_path)
@@ -1,17 +1,22 @@
 import cv2
 import numpy as np
-from typing import List, Dict, Any, Tuple
-import torch
-from ultralytics import YOLO
+from typing import List, Dict, Any, Tuple, Optional
 import os
+from src.models.inference_backend import load_yolo, TorchYOLO
+from src.models.model_artifact import load_model_artifact
+from utils import profiling
 
 class FaceAnalyzer:
-    def __init__(self, face_model_path: str = "models/yolov8n-face.pt"):
+    def __init__(self, face_model_path: str = "models/yolov8n-face.pt",
+                 backend: str = "torch",
+                 backend_options: Optional[Dict[str, Any]] = None):
         """
         Initialize the face analyzer.
         
         Args:
             face_model_path (str): Path to the YOLO face detection model
+            backend (str): Inference backend, 'torch' or 'onnx'
+            backend_options (Optional[Dict[str, Any]]): Backend options passed to load_yolo
         """
         if not os.path.exists(face_model_path):
             raise FileNotFoundError(
@@ -19,21 +24,29 @@ class FaceAnalyzer:
                 "Please run download_models.py first."
             )
             
+        self.face_model_path = face_model_path
         try:
-            # Load the base YOLOv8n model
-            self.face_model = YOLO('yolov8n.pt')
-            
-            # Load the face detection weights
-            state_dict = torch.load(face_model_path, map_location='cpu')
-            self.face_model.model.load_state_dict(state_dict)
-            
-            # Set device
-            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-            self.face_model.to(self.device)
-            
+            self.face_model = load_yolo(
+                face_model_path,
+                backend,
+                build_model=self._build_torch_model,
+                **(backend_options or {})
+            )
         except Exception as e:
             raise RuntimeError(f"Error loading face detection model: {str(e)}")
+    
+    def _build_torch_model(self) -> TorchYOLO:
+        """
+        Build the PyTorch face detection model from its local artifact.
+        
+        Returns:
+            TorchYOLO: Face detection model on the best available device
+        """
+        model = load_model_artifact(self.face_model_path)
+        self.device = model.device
+        return model
         
+    @profiling.timed('face.detect_faces')
     def detect_faces(self, frame: np.ndarray, min_confidence: float = 0.5) -> List[Dict[str, Any]]:
         """
         Detect faces in a frame.
@@ -58,6 +71,7 @@ class FaceAnalyzer:
             
         return faces
     
+    @profiling.timed('face.analyze_emotions')
     def analyze_emotions(self, frame: np.ndarray, faces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Analyze emotions of detected faces.
@@ -90,6 +104,7 @@ class FaceAnalyzer:
             
         return analyzed_faces
     
+    @profiling.timed('face.detect_crowd_reaction')
     def detect_crowd_reaction(self, frame: np.ndarray, min_faces: int = 5, min_happy_ratio: float = 0.7) -> Dict[str, Any]:
         """
         Analyze crowd reaction based on face emotions.
@@ -1,33 +1,460 @@
 import cv2
+import tempfile
+from contextlib import ExitStack
 import numpy as np
-from typing import List, Dict, Any
-from ultralytics import YOLO
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+from src.models.inference_backend import load_yolo
+from src.utils.video_utils import open_frame_reader, FFmpegVideoWriter
+from utils.feature_store import FeatureStoreWriter
+from utils import profiling
+from utils.memory import MemoryBudget
 from .face_analyzer import FaceAnalyzer
 from .audio_analyzer import AudioAnalyzer
+from .highlight_ranking import score_highlight
+from .checkpoint import AnalysisCheckpoint
+
+class SegmentLookup:
+    """
+    Value of the time segment containing a timestamp.
+    
+    Segments must not overlap. They are sorted once, so a lookup per frame is
+    a binary search instead of a scan over every segment.
+    """
+    
+    def __init__(self, starts: List[float], ends: List[float], values: List[float]):
+        """
+        Index the segments.
+        
+        Args:
+            starts (List[float]): Segment start times in seconds
+            ends (List[float]): Segment end times in seconds
+            values (List[float]): Value of each segment
+        """
+        order = np.argsort(starts, kind='stable')
+        self.starts = np.asarray(starts, dtype=np.float64)[order]
+        self.ends = np.asarray(ends, dtype=np.float64)[order]
+        self.values = np.asarray(values, dtype=np.float64)[order]
+    
+    def __call__(self, timestamp: float) -> float:
+        """
+        Look up a timestamp.
+        
+        Args:
+            timestamp (float): Time in seconds
+        
+        Returns:
+            float: Value of the segment containing the timestamp, 0.0 outside all segments
+        """
+        index = int(np.searchsorted(self.starts, timestamp, side='right')) - 1
+        if index >= 0 and timestamp <= self.ends[index]:
+            return float(self.values[index])
+        return 0.0
+
+class HighlightAccumulator:
+    """
+    Running aggregates of one highlight segment.
+    
+    Detections and face analyses are folded into counts, sums, maxima and a
+    per-class histogram, so memory stays constant however long the highlight
+    runs. The per-frame records themselves are only kept with keep_details.
+    The summary carries a score (see highlight_ranking.score_highlight).
+    """
+    
+    __slots__ = (
+        'start_time', 'end_time', 'frame_count', 'has_applause', 'applause_score',
+        'crowd_energy_sum', 'motion_sum',
+        'detection_count', 'confidence_sum', 'max_confidence', 'class_counts',
+        'face_frames', 'face_count_sum', 'max_face_count', 'happy_ratio_sum', 'positive_frames',
+        'detections', 'face_analysis', 'spilled_records'
+    )
+    
+    def __init__(self, start_time: float, keep_details: bool = False):
+        """
+        Start a highlight.
+        
+        Args:
+            start_time (float): Timestamp of the first frame in seconds
+            keep_details (bool): Also keep the per-frame detection and face records
+        """
+        self.start_time = start_time
+        self.end_time = start_time
+        self.frame_count = 0
+        self.has_applause = False
+        self.applause_score = 0.0
+        self.crowd_energy_sum = 0.0
+        self.motion_sum = 0.0
+        self.detection_count = 0
+        self.confidence_sum = 0.0
+        self.max_confidence = 0.0
+        self.class_counts: Dict[str, int] = {}
+        self.face_frames = 0
+        self.face_count_sum = 0
+        self.max_face_count = 0
+        self.happy_ratio_sum = 0.0
+        self.positive_frames = 0
+        self.detections: Optional[List[Dict[str, Any]]] = [] if keep_details else None
+        self.face_analysis: Optional[List[Dict[str, Any]]] = [] if keep_details else None
+        self.spilled_records = 0
+    
+    def add(self,
+            timestamp: float,
+            detections: List[Dict[str, Any]],
+            face_analysis: Optional[Dict[str, Any]],
+            has_applause: bool,
+            applause_score: float = 0.0,
+            crowd_energy: float = 0.0,
+            motion: float = 0.0) -> None:
+        """
+        Fold one highlight frame into the aggregates.
+        
+        Args:
+            timestamp (float): Frame timestamp in seconds
+            detections (List[Dict[str, Any]]): Important detections in the frame
+            face_analysis (Optional[Dict[str, Any]]): Crowd reaction analysis for the frame
+            has_applause (bool): Whether the frame overlaps applause
+            applause_score (float): Score of the overlapping applause segment (0-1)
+            crowd_energy (float): Crowd noise energy at the frame (0-1)
+            motion (float): Mean absolute difference to the previous frame (0-1)
+        """
+        self.end_time = timestamp
+        self.frame_count += 1
+        self.has_applause = self.has_applause or has_applause
+        if applause_score > self.applause_score:
+            self.applause_score = applause_score
+        self.crowd_energy_sum += crowd_energy
+        self.motion_sum += motion
+        
+        for detection in detections:
+            confidence = detection['confidence']
+            self.confidence_sum += confidence
+            if confidence > self.max_confidence:
+                self.max_confidence = confidence
+            self.class_counts[detection['class']] = self.class_counts.get(detection['class'], 0) + 1
+        self.detection_count += len(detections)
+        
+        if face_analysis:
+            face_count = face_analysis['face_count']
+            self.face_frames += 1
+            self.face_count_sum += face_count
+            if face_count > self.max_face_count:
+                self.max_face_count = face_count
+            self.happy_ratio_sum += face_analysis.get('happy_ratio', 0.0)
+            if face_analysis['reaction'] == 'positive':
+                self.positive_frames += 1
+        
+        if self.detections is not None:
+            self.detections.extend(detections)
+            if face_analysis:
+                self.face_analysis.append(face_analysis)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the highlight.
+        
+        Returns:
+            Dict[str, Any]: Highlight with start_time, end_time, has_applause, its best
+                applause_score, mean crowd_energy and motion, frame and detection counts,
+                confidence statistics, per-class counts, averaged face analysis, 'score'
+                and, when kept, the per-frame detections and face_analysis
+        """
+        frames = max(self.frame_count, 1)
+        highlight = {
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'has_applause': self.has_applause,
+            'applause_score': self.applause_score,
+            'crowd_energy': self.crowd_energy_sum / frames,
+            'motion': self.motion_sum / frames,
+            'frame_count': self.frame_count,
+            'detection_count': self.detection_count,
+            'mean_confidence': self.confidence_sum / self.detection_count if self.detection_count else 0.0,
+            'max_confidence': self.max_confidence,
+            'class_counts': dict(self.class_counts)
+        }
+        if self.face_frames:
+            highlight['avg_face_analysis'] = {
+                'face_count': self.face_count_sum / self.face_frames,
+                'max_face_count': self.max_face_count,
+                'happy_ratio': self.happy_ratio_sum / self.face_frames,
+                'positive_ratio': self.positive_frames / self.face_frames
+            }
+        if self.detections is not None:
+            highlight['detections'] = self.detections
+            highlight['face_analysis'] = self.face_analysis
+        if self.spilled_records:
+            highlight['spilled_records'] = self.spilled_records
+        highlight['score'] = score_highlight(highlight)
+        return highlight
+    
+    def state_dict(self) -> Dict[str, Any]:
+        """
+        Get the accumulator state for checkpointing.
+        
+        Returns:
+            Dict[str, Any]: JSON-serializable state
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+    
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'HighlightAccumulator':
+        """
+        Restore an accumulator from a checkpointed state.
+        
+        Args:
+            state (Dict[str, Any]): State returned by state_dict
+        
+        Returns:
+            HighlightAccumulator: Restored accumulator
+        """
+        # Checkpoints written before a slot existed keep its initial value
+        accumulator = cls(state['start_time'])
+        for name in cls.__slots__:
+            if name in state:
+                setattr(accumulator, name, state[name])
+        return accumulator
+
+class HighlightTracker:
+    def __init__(self, min_duration: float = 2.0, keep_details: bool = False):
+        """
+        Group consecutive highlight frames into highlight segments.
+        
+        Args:
+            min_duration (float): Minimum duration for a highlight in seconds
+            keep_details (bool): Keep every detection and face analysis of a highlight
+                instead of only its aggregates
+        """
+        self.min_duration = min_duration
+        self.keep_details = keep_details
+        self.highlights = []
+        self.current_highlight: Optional[HighlightAccumulator] = None
+    
+    def update(self,
+               timestamp: float,
+               is_highlight: bool,
+               detections: List[Dict[str, Any]],
+               face_analysis: Optional[Dict[str, Any]],
+               has_applause: bool,
+               applause_score: float = 0.0,
+               crowd_energy: float = 0.0,
+               motion: float = 0.0) -> None:
+        """
+        Add one analyzed frame.
+        
+        Args:
+            timestamp (float): Frame timestamp in seconds
+            is_highlight (bool): Whether the frame is a highlight moment
+            detections (List[Dict[str, Any]]): Important detections in the frame
+            face_analysis (Optional[Dict[str, Any]]): Crowd reaction analysis for the frame
+            has_applause (bool): Whether the frame overlaps applause
+            applause_score (float): Score of the overlapping applause segment (0-1)
+            crowd_energy (float): Crowd noise energy at the frame (0-1)
+            motion (float): Mean absolute difference to the previous frame (0-1)
+        """
+        if is_highlight:
+            if self.current_highlight is None:
+                self.current_highlight = HighlightAccumulator(timestamp, self.keep_details)
+            self.current_highlight.add(timestamp, detections, face_analysis, has_applause,
+                                       applause_score, crowd_energy, motion)
+        
+        elif self.current_highlight is not None:
+            self._close()
+    
+    def _close(self) -> None:
+        """Keep the open highlight if it is long enough and reset it."""
+        highlight = self.current_highlight
+        self.current_highlight = None
+        
+        # Check if highlight duration meets minimum requirement
+        if highlight.end_time - highlight.start_time >= self.min_duration:
+            self.highlights.append(highlight.to_dict())
+    
+    def spill(self, store: FeatureStoreWriter) -> int:
+        """
+        Move the per-frame detail kept for the open highlight to a feature store.
+        
+        Detections go to the 'highlight_detections' table and face analyses to
+        'highlight_faces', both keyed by the highlight start_time. Rows of
+        highlights later dropped for being too short stay in the store. Without
+        keep_details there is nothing to spill.
+        
+        Args:
+            store (FeatureStoreWriter): Store to write the detail to
+        
+        Returns:
+            int: Number of records moved out of memory
+        """
+        highlight = self.current_highlight
+        if highlight is None or highlight.detections is None:
+            return 0
+        
+        detections = highlight.detections
+        if detections:
+            store.append('highlight_detections', {
+                'start_time': np.full(len(detections), highlight.start_time, dtype=np.float64),
+                'class': np.array([d['class'] for d in detections], dtype='U32'),
+                'confidence': np.array([d['confidence'] for d in detections], dtype=np.float32)
+            })
+        
+        faces = highlight.face_analysis
+        if faces:
+            store.append('highlight_faces', {
+                'start_time': np.full(len(faces), highlight.start_time, dtype=np.float64),
+                'face_count': np.array([f['face_count'] for f in faces], dtype=np.int32),
+                'happy_ratio': np.array([f.get('happy_ratio', 0.0) for f in faces], dtype=np.float32)
+            })
+        
+        spilled = len(detections) + len(faces)
+        highlight.detections = []
+        highlight.face_analysis = []
+        highlight.spilled_records += spilled
+        return spilled
+    
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Close the final highlight and return all highlights.
+        
+        Returns:
+            List[Dict[str, Any]]: List of highlight moments with timestamps
+        """
+        if self.current_highlight is not None:
+            self._close()
+        return self.highlights
+    
+    def state_dict(self) -> Dict[str, Any]:
+        """
+        Get the tracker state for checkpointing.
+        
+        Returns:
+            Dict[str, Any]: JSON-serializable tracker state
+        """
+        return {
+            'highlights': self.highlights,
+            'current_highlight': self.current_highlight.state_dict() if self.current_highlight else None
+        }
+    
+    def load_state_dict(self, state: Dict[str, Any]) -> None:
+        """
+        Restore the tracker from a checkpointed state.
+        
+        Args:
+            state (Dict[str, Any]): State returned by state_dict
+        """
+        self.highlights = state['highlights']
+        current = state['current_highlight']
+        self.current_highlight = HighlightAccumulator.from_state(current) if current else None
 
 class HighlightDetector:
     def __init__(self, 
                  model_path: str = "yolov8n.pt",
-                 face_model_path: str = "yolov8n-face.pt"):
+                 face_model_path: str = "yolov8n-face.pt",
+                 backend: str = "torch",
+                 backend_options: Optional[Dict[str, Any]] = None,
+                 audio_cache_dir: Optional[str] = None):
         """
         Initialize the highlight detector with YOLO model and analyzers.
         
         Args:
             model_path (str): Path to YOLO model weights
             face_model_path (str): Path to YOLO face detection model
+            backend (str): Inference backend for both models, 'torch' or 'onnx'
+            backend_options (Optional[Dict[str, Any]]): Backend options passed to load_yolo
+            audio_cache_dir (Optional[str]): Directory to cache decoded audio in (no cache if None)
         """
-        self.model = YOLO(model_path)
-        self.face_analyzer = FaceAnalyzer(face_model_path)
-        self.audio_analyzer = AudioAnalyzer()
+        self.model = load_yolo(model_path, backend, **(backend_options or {}))
+        self.face_analyzer = FaceAnalyzer(face_model_path, backend, backend_options)
+        self.audio_analyzer = AudioAnalyzer(cache_dir=audio_cache_dir)
         self.important_classes = {'person', 'dancing', 'cheering', 'celebrating'}
         
+    def analyze_frame(self,
+                      frame: np.ndarray,
+                      min_confidence: float = 0.5,
+                      analyze_faces: bool = True) -> Tuple[Any, List[Any], Optional[Dict[str, Any]]]:
+        """
+        Run object detection and optional face analysis on one frame.
+        
+        Args:
+            frame (np.ndarray): Input frame
+            min_confidence (float): Minimum confidence threshold
+            analyze_faces (bool): Whether to analyze faces for reactions
+            
+        Returns:
+            Tuple[Any, List[Any], Optional[Dict[str, Any]]]: YOLO results, boxes of
+                important classes, and crowd reaction analysis (None if disabled)
+        """
+        # Detect objects in frame
+        with profiling.timer('highlight.yolo'):
+            results = self.model(frame, conf=min_confidence)[0]
+        
+        # Check for important events
+        important_detections = [
+            det for det in results.boxes
+            if results.names[int(det.cls[0])] in self.important_classes
+        ]
+        
+        # Analyze faces if enabled
+        face_analysis = None
+        if analyze_faces:
+            with profiling.timer('highlight.faces'):
+                face_analysis = self.face_analyzer.detect_crowd_reaction(frame)
+            
+        return results, important_detections, face_analysis
+    
+    def describe_detections(self, results: Any, important_detections: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Convert important detection boxes to class/confidence records.
+        
+        Args:
+            results (Any): YOLO results for the frame
+            important_detections (List[Any]): Boxes of important classes
+            
+        Returns:
+            List[Dict[str, Any]]: Detection records stored with highlights
+        """
+        return [
+            {
+                'class': results.names[int(det.cls[0])],
+                'confidence': float(det.conf[0])
+            }
+            for det in important_detections
+        ]
+    
+    def is_highlight_frame(self,
+                           important_detections: List[Any],
+                           face_analysis: Optional[Dict[str, Any]],
+                           has_applause: bool) -> bool:
+        """
+        Decide whether an analyzed frame is a highlight moment.
+        
+        Args:
+            important_detections (List[Any]): Boxes of important classes
+            face_analysis (Optional[Dict[str, Any]]): Crowd reaction analysis
+            has_applause (bool): Whether the frame overlaps applause
+            
+        Returns:
+            bool: True if the frame is a highlight moment
+        """
+        return bool(
+            len(important_detections) > 0 or
+            (face_analysis and face_analysis['reaction'] in ['positive', 'surprised']) or
+            has_applause
+        )
+    
+    @profiling.timed('highlight.detect_highlights')
     def detect_highlights(self, 
                          video_path: str,
                          min_confidence: float = 0.5,
                          min_duration: float = 2.0,
                          analyze_audio: bool = True,
-                         analyze_faces: bool = True) -> List[Dict[str, Any]]:
+                         analyze_faces: bool = True,
+                         decoder: str = "opencv",
+                         decoder_options: Optional[Dict[str, Any]] = None,
+                         feature_store: Optional[str] = None,
+                         checkpoint_path: Optional[str] = None,
+                         checkpoint_interval: float = 30.0,
+                         progress_callback: Optional[callable] = None,
+                         memory_budget: Optional[MemoryBudget] = None,
+                         keep_details: bool = False) -> List[Dict[str, Any]]:
         """
         Detect highlight moments in a video.
         
@@ -37,120 +464,224 @@ class HighlightDetector:
             min_duration (float): Minimum duration for a highlight in seconds
             analyze_audio (bool): Whether to analyze audio for applause
             analyze_faces (bool): Whether to analyze faces for reactions
+            decoder (str): Frame decoder, 'opencv' or 'ffmpeg'
+            decoder_options (Optional[Dict[str, Any]]): Options passed to open_frame_reader
+            feature_store (Optional[str]): Directory to stream per-frame features, detections
+                and highlights to (readable with utils.feature_store.FeatureStore)
+            checkpoint_path (Optional[str]): File to periodically save progress to; an
+                interrupted run with the same path resumes from the last checkpoint
+            checkpoint_interval (float): Video seconds between checkpoints
+            progress_callback (Optional[callable]): Callback function to report progress (0-100)
+            memory_budget (Optional[MemoryBudget]): RSS budget; audio is then analyzed in
+                blocks, and above its soft limit the per-frame detail of open highlights
+                is spilled to the feature store (or a temporary one named by the
+                highlights' 'details_store')
+            keep_details (bool): Return every detection and face analysis of each highlight
+                besides its aggregates; the per-frame detail is otherwise only written to
+                the feature store
             
         Returns:
             List[Dict[str, Any]]: List of highlight moments with timestamps
         """
-        cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        highlights = []
-        current_highlight = None
-        
-        # Extract audio if needed
-        audio_data = None
-        if analyze_audio:
-            audio_data, _ = self.audio_analyzer.extract_audio(video_path)
-            applause_segments = self.audio_analyzer.detect_applause(audio_data)
-            crowd_reactions = self.audio_analyzer.analyze_crowd_reaction(audio_data)
-        
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            frame_number = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-            timestamp = frame_number / fps
-            
-            # Detect objects in frame
-            results = self.model(frame, conf=min_confidence)[0]
-            
-            # Check for important events
-            important_detections = [
-                det for det in results.boxes
-                if results.names[int(det.cls[0])] in self.important_classes
-            ]
+        tracker = HighlightTracker(min_duration, keep_details)
+        checkpoint = None
+        start_frame = 0
+        store_mode = 'w'
+        previous_gray = None
+        if checkpoint_path:
+            checkpoint = AnalysisCheckpoint(checkpoint_path, video_path, checkpoint_interval)
+            state = checkpoint.load()
+            if state is not None:
+                # Resume after the last checkpointed frame
+                tracker.load_state_dict(state['tracker'])
+                start_frame = state['next_frame']
+                store_mode = 'a'
+                # Motion of the first resumed frame is relative to the last analyzed one
+                if state.get('previous_gray') is not None:
+                    previous_gray = np.array(state['previous_gray'], dtype=np.uint8)
+        
+        # The reader and stores are closed even if analysis fails, e.g. with a MemoryError
+        with ExitStack() as resources:
+            decoder_options = dict(decoder_options or {}, start_frame=start_frame)
+            reader = resources.enter_context(open_frame_reader(video_path, decoder, **decoder_options))
+            fps = reader.fps
+            reported = -1
             
-            # Analyze faces if enabled
-            face_analysis = None
-            if analyze_faces:
-                face_analysis = self.face_analyzer.detect_crowd_reaction(frame)
+            store = None
+            if feature_store:
+                store = resources.enter_context(FeatureStoreWriter(feature_store, mode=store_mode))
+                if store_mode == 'a':
+                    # Drop rows written after the checkpoint
+                    for table in store.meta['tables']:
+                        store.truncate(table, state['store_rows'].get(table, 0))
             
-            # Check for applause if enabled
-            has_applause = False
+            # Extract audio if needed
+            audio_data = None
+            applause_at = crowd_energy_at = SegmentLookup([], [], [])
             if analyze_audio:
-                for segment in applause_segments:
-                    if segment['start'] <= timestamp <= segment['end']:
-                        has_applause = True
-                        break
+                with profiling.timer('highlight.audio'):
+                    if memory_budget is not None:
+                        applause_segments, crowd_reactions = self.audio_analyzer.analyze_stream(video_path)
+                    else:
+                        audio_data, _ = self.audio_analyzer.extract_audio(video_path)
+                        applause_segments = self.audio_analyzer.detect_applause(audio_data)
+                        crowd_reactions = self.audio_analyzer.analyze_crowd_reaction(audio_data)
+                applause_at = SegmentLookup(
+                    [s['start'] for s in applause_segments],
+                    [s['end'] for s in applause_segments],
+                    [s.get('score', 1.0) for s in applause_segments]
+                )
+                # Crowd noise energy from the reaction thresholds (0) up to full scale (1)
+                crowd_energy_at = SegmentLookup(
+                    [r['start_time'] for r in crowd_reactions],
+                    [r['end_time'] for r in crowd_reactions],
+                    [min(1.0, max(0.0, (r['energy_mid'] + 30) / 30, (r['energy_high'] + 40) / 30))
+                     for r in crowd_reactions]
+                )
             
-            # Determine if this is a highlight moment
-            is_highlight = (
-                len(important_detections) > 0 or
-                (face_analysis and face_analysis['is_crowd'] and 
-                 face_analysis['reaction'] in ['positive', 'surprised']) or
-                has_applause
-            )
+            spill_store = None
             
-            if is_highlight:
-                if current_highlight is None:
-                    current_highlight = {
-                        'start_time': timestamp,
-                        'end_time': timestamp,
-                        'detections': [],
-                        'face_analysis': [],
-                        'has_applause': False
-                    }
-                else:
-                    current_highlight['end_time'] = timestamp
+            for frame_index, frame in profiling.timed_iter(reader, 'highlight.decode'):
+                profiling.count('highlight.frames')
+                timestamp = (frame_index + 1) / fps
                 
-                # Add detections
-                current_highlight['detections'].extend([
-                    {
-                        'class': results.names[int(det.cls[0])],
-                        'confidence': float(det.conf[0])
-                    }
-                    for det in important_detections
-                ])
+                results, important_detections, face_analysis = self.analyze_frame(
+                    frame, min_confidence, analyze_faces
+                )
                 
-                # Add face analysis
-                if face_analysis:
-                    current_highlight['face_analysis'].append(face_analysis)
+                # Check for applause if enabled
+                applause_score = applause_at(timestamp)
+                has_applause = applause_score > 0
+                crowd_energy = crowd_energy_at(timestamp)
                 
-                # Update applause status
-                if has_applause:
-                    current_highlight['has_applause'] = True
-                    
-            elif current_highlight is not None:
-                # Check if highlight duration meets minimum requirement
-                duration = current_highlight['end_time'] - current_highlight['start_time']
-                if duration >= min_duration:
-                    # Calculate average face analysis
-                    if current_highlight['face_analysis']:
-                        avg_face_analysis = {
-                            'face_count': np.mean([f['face_count'] for f in current_highlight['face_analysis']]),
-                            'happy_ratio': np.mean([f['happy_ratio'] for f in current_highlight['face_analysis']]),
-                            'surprise_ratio': np.mean([f['surprise_ratio'] for f in current_highlight['face_analysis']])
-                        }
-                        current_highlight['avg_face_analysis'] = avg_face_analysis
-                    
-                    highlights.append(current_highlight)
-                current_highlight = None
+                # Motion as the mean absolute difference of small grayscale frames
+                gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA)
+                motion = float(np.mean(cv2.absdiff(gray, previous_gray))) / 255.0 if previous_gray is not None else 0.0
+                previous_gray = gray
+                
+                # Determine if this is a highlight moment
+                is_highlight = self.is_highlight_frame(important_detections, face_analysis, has_applause)
+                
+                if store is not None:
+                    with profiling.timer('highlight.store'):
+                        self._store_frame_features(store, timestamp, results, important_detections,
+                                                   face_analysis, has_applause, is_highlight)
                 
-        cap.release()
+                tracker.update(
+                    timestamp,
+                    is_highlight,
+                    self.describe_detections(results, important_detections) if is_highlight else [],
+                    face_analysis,
+                    has_applause,
+                    applause_score,
+                    crowd_energy,
+                    motion
+                )
+                
+                if memory_budget is not None and frame_index % 30 == 0:
+                    memory_budget.enforce('highlight detection')
+                    if memory_budget.over_soft_limit():
+                        if spill_store is None:
+                            spill_store = store or resources.enter_context(
+                                FeatureStoreWriter(tempfile.mkdtemp(prefix='highlights_spill_'))
+                            )
+                        tracker.spill(spill_store)
+                        spill_store.flush()
+                
+                if checkpoint is not None and checkpoint.due(timestamp):
+                    store_rows = {}
+                    if store is not None:
+                        store.flush()
+                        store_rows = {table: store.rows(table) for table in store.meta['tables']}
+                    checkpoint.save(timestamp, {
+                        'next_frame': frame_index + 1,
+                        'tracker': tracker.state_dict(),
+                        'store_rows': store_rows,
+                        'previous_gray': gray.tolist()
+                    })
+                
+                if progress_callback and reader.frame_count:
+                    progress = min(100, (frame_index + 1) * 100 // reader.frame_count)
+                    if progress != reported:
+                        progress_callback(progress)
+                        reported = progress
+                    
+            reader.close()
+            highlights = tracker.finish()
+            profiling.count('highlight.highlights', len(highlights))
+            
+            if spill_store is not None:
+                for highlight in highlights:
+                    if highlight.get('spilled_records'):
+                        highlight['details_store'] = str(spill_store.root)
+            
+            if store is not None:
+                store.append('highlights', {
+                    'start_time': np.array([h['start_time'] for h in highlights], dtype=np.float64),
+                    'end_time': np.array([h['end_time'] for h in highlights], dtype=np.float64),
+                    'has_applause': np.array([h['has_applause'] for h in highlights], dtype=bool),
+                    'frame_count': np.array([h['frame_count'] for h in highlights], dtype=np.int32),
+                    'detection_count': np.array([h['detection_count'] for h in highlights], dtype=np.int32),
+                    'max_confidence': np.array([h['max_confidence'] for h in highlights], dtype=np.float32),
+                    'face_count': np.array([h.get('avg_face_analysis', {}).get('face_count', 0.0)
+                                            for h in highlights], dtype=np.float32),
+                    'happy_ratio': np.array([h.get('avg_face_analysis', {}).get('happy_ratio', 0.0)
+                                             for h in highlights], dtype=np.float32),
+                    'crowd_energy': np.array([h['crowd_energy'] for h in highlights], dtype=np.float32),
+                    'motion': np.array([h['motion'] for h in highlights], dtype=np.float32),
+                    'score': np.array([h['score'] for h in highlights], dtype=np.float32)
+                })
         
-        # Add final highlight if exists
-        if current_highlight is not None:
-            duration = current_highlight['end_time'] - current_highlight['start_time']
-            if duration >= min_duration:
-                highlights.append(current_highlight)
+        if checkpoint is not None:
+            checkpoint.clear()
                 
         return highlights
     
+    def _store_frame_features(self,
+                              store: FeatureStoreWriter,
+                              timestamp: float,
+                              results: Any,
+                              important_detections: List[Any],
+                              face_analysis: Optional[Dict[str, Any]],
+                              has_applause: bool,
+                              is_highlight: bool) -> None:
+        """
+        Append one frame's features and detections to the feature store.
+        
+        Args:
+            store (FeatureStoreWriter): Open feature store
+            timestamp (float): Frame timestamp in seconds
+            results (Any): YOLO results for the frame
+            important_detections (List[Any]): Boxes of important classes
+            face_analysis (Optional[Dict[str, Any]]): Crowd reaction analysis for the frame
+            has_applause (bool): Whether the frame overlaps applause
+            is_highlight (bool): Whether the frame is part of a highlight
+        """
+        store.append('frames', {
+            'timestamp': np.float64(timestamp),
+            'detection_count': np.int32(len(important_detections)),
+            'face_count': np.int32(face_analysis['face_count'] if face_analysis else 0),
+            'happy_ratio': np.float32(face_analysis.get('happy_ratio', 0.0) if face_analysis else 0.0),
+            'has_applause': has_applause,
+            'is_highlight': is_highlight
+        })
+        
+        boxes = results.boxes
+        if len(boxes):
+            store.append('detections', {
+                'timestamp': np.full(len(boxes), timestamp, dtype=np.float64),
+                'bbox': boxes.xyxy.cpu().numpy().astype(np.float32),
+                'confidence': boxes.conf.cpu().numpy().astype(np.float32),
+                'class_id': boxes.cls.cpu().numpy().astype(np.int16)
+            })
+    
+    @profiling.timed('highlight.extract_highlight_clips')
     def extract_highlight_clips(self, 
                               video_path: str,
                               highlights: List[Dict[str, Any]],
                               output_dir: str,
-                              add_visualization: bool = True) -> List[str]:
+                              add_visualization: bool = True,
+                              memory_budget: Optional[MemoryBudget] = None) -> List[str]:
         """
         Extract highlight clips from the video.
         
@@ -159,6 +690,7 @@ class HighlightDetector:
             highlights (List[Dict[str, Any]]): List of highlight moments
             output_dir (str): Directory to save highlight clips
             add_visualization (bool): Whether to add visualization overlays
+            memory_budget (Optional[MemoryBudget]): RSS budget bounding the encoder queue
             
         Returns:
             List[str]: Paths to extracted highlight clips
@@ -167,45 +699,44 @@ class HighlightDetector:
         output_dir.mkdir(parents=True, exist_ok=True)
         
         cap = cv2.VideoCapture(video_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        output_paths = []
-        
-        for i, highlight in enumerate(highlights):
-            start_frame = int(highlight['start_time'] * fps)
-            end_frame = int(highlight['end_time'] * fps)
+        # The capture and the encoder processes are released even if a clip fails
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            queue_size = memory_budget.queue_size(width * height * 3) if memory_budget is not None else 16
             
-            output_path = output_dir / f"highlight_{i+1}.mp4"
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
+            output_paths = []
             
-            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-            
-            for _ in range(end_frame - start_frame):
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                    
-                if add_visualization:
-                    # Add visualization overlays
-                    if 'face_analysis' in highlight:
-                        faces = self.face_analyzer.detect_faces(frame)
-                        analyzed_faces = self.face_analyzer.analyze_emotions(frame, faces)
-                        frame = self.face_analyzer.draw_analysis(frame, analyzed_faces)
-                    
-                    # Add highlight information
-                    info_text = f"Duration: {highlight['end_time'] - highlight['start_time']:.1f}s"
-                    if highlight.get('has_applause'):
-                        info_text += " | Applause"
-                    cv2.putText(frame, info_text, (10, 30),
-                              cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            for i, highlight in enumerate(highlights):
+                start_frame = int(highlight['start_time'] * fps)
+                end_frame = int(highlight['end_time'] * fps)
                 
-                out.write(frame)
+                output_path = output_dir / f"highlight_{i+1}.mp4"
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
                 
-            out.release()
-            output_paths.append(str(output_path))
-            
-        cap.release()
+                with FFmpegVideoWriter(str(output_path), width, height, fps, queue_size=queue_size) as out:
+                    for _ in range(end_frame - start_frame):
+                        ret, frame = cap.read()
+                        if not ret:
+                            break
+                            
+                        if add_visualization:
+                            # Add visualization overlays
+                            if 'avg_face_analysis' in highlight:
+                                faces = self.face_analyzer.detect_faces(frame)
+                                analyzed_faces = self.face_analyzer.analyze_emotions(frame, faces)
+                                frame = self.face_analyzer.draw_analysis(frame, analyzed_faces)
+                            
+                            # Add highlight information
+                            info_text = f"Duration: {highlight['end_time'] - highlight['start_time']:.1f}s"
+                            if highlight.get('has_applause'):
+                                info_text += " | Applause"
+                            cv2.putText(frame, info_text, (10, 30),
+                                      cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                        
+                        out.write(frame)
+                output_paths.append(str(output_path))
+        finally:
+            cap.release()
         return output_paths 
\ No newline at end of file
@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils import profiling
+
+# Contribution of each signal to a highlight's score (they sum to 1)
+SCORE_WEIGHTS = {
+    'detections': 0.25,
+    'crowd_energy': 0.2,
+    'applause': 0.25,
+    'faces': 0.2,
+    'motion': 0.1
+}
+
+# Mean absolute frame difference (0-1) counted as full motion
+MOTION_SCALE = 0.05
+
+
+def highlight_signals(highlight: Dict[str, Any]) -> Dict[str, float]:
+    """
+    The signals of a highlight, each scaled to 0-1.
+
+    Args:
+        highlight (Dict[str, Any]): Highlight from detect_highlights
+
+    Returns:
+        Dict[str, float]: 'detections' (saturating detections per frame), 'crowd_energy',
+            'applause' (best overlapping applause score), 'faces' (happy and positive
+            face ratios) and 'motion'
+    """
+    density = highlight.get('detection_count', 0) / max(highlight.get('frame_count', 1), 1)
+    faces = highlight.get('avg_face_analysis', {})
+    applause = highlight.get('applause_score', 1.0 if highlight.get('has_applause') else 0.0)
+    return {
+        'detections': density / (density + 1.0),
+        'crowd_energy': min(1.0, highlight.get('crowd_energy', 0.0)),
+        'applause': min(1.0, applause),
+        'faces': (faces.get('happy_ratio', 0.0) + faces.get('positive_ratio', 0.0)) / 2,
+        'motion': min(1.0, highlight.get('motion', 0.0) / MOTION_SCALE)
+    }
+
+
+def score_highlight(highlight: Dict[str, Any], weights: Optional[Dict[str, float]] = None) -> float:
+    """
+    Score a highlight as a weighted sum of its signals.
+
+    Args:
+        highlight (Dict[str, Any]): Highlight from detect_highlights
+        weights (Optional[Dict[str, float]]): Weight per signal (SCORE_WEIGHTS if None)
+
+    Returns:
+        float: Score between 0 and 1 for weights summing to 1, higher is better
+    """
+    weights = weights or SCORE_WEIGHTS
+    signals = highlight_signals(highlight)
+    return float(sum(weight * signals[name] for name, weight in weights.items()))
+
+
+@profiling.timed('highlight.select_highlights')
+def select_highlights(highlights: List[Dict[str, Any]],
+                      target_duration: float,
+                      positions: Optional[List[float]] = None,
+                      min_gap: float = 30.0,
+                      diversity: float = 0.5,
+                      transition_duration: float = 0.0,
+                      max_clip_duration: Optional[float] = None,
+                      resolution: float = 0.25) -> List[int]:
+    """
+    Pick the highlights that best fill a reel of the target duration.
+
+    This is a 0/1 knapsack: a highlight costs the reel time it will take (its
+    length, capped at max_clip_duration, minus one transition) and is worth its
+    score times that time. For diversity across the timeline, a highlight
+    starting within min_gap seconds of a better-scoring one is worth
+    (1 - diversity) less, so the reel spreads over the event instead of
+    retelling one busy minute. Durations are rounded up to the resolution. If
+    no highlight fits, the best-scoring one is selected alone.
+
+    Args:
+        highlights (List[Dict[str, Any]]): Highlights with 'start_time', 'end_time' and 'score'
+        target_duration (float): Reel length to fill in seconds
+        positions (Optional[List[float]]): Position of each highlight on the reel timeline
+            in seconds, for highlights from several videos (start_time if None)
+        min_gap (float): Distance in seconds below which highlights count as the same stretch
+        diversity (float): Value discount (0-1) of highlights crowding a better one
+        transition_duration (float): Reel time each clip loses to its transition
+        max_clip_duration (Optional[float]): Longest stretch of one clip the reel shows
+        resolution (float): Duration granularity of the search in seconds
+
+    Returns:
+        List[int]: Indices of the selected highlights, in input order
+    """
+    if not highlights or target_duration <= 0:
+        return []
+    if positions is None:
+        positions = [highlight['start_time'] for highlight in highlights]
+    if len(positions) != len(highlights):
+        raise ValueError("highlights and positions must have the same length")
+
+    lengths = np.array([h['end_time'] - h['start_time'] for h in highlights], dtype=np.float64)
+    if max_clip_duration is not None:
+        lengths = np.minimum(lengths, max_clip_duration)
+    lengths -= transition_duration
+    scores = np.array([h.get('score', score_highlight(h)) for h in highlights], dtype=np.float64)
+    values = scores * np.maximum(lengths, 0.0)
+
+    # Discount highlights that crowd a better-scoring one
+    positions = np.asarray(positions, dtype=np.float64)
+    order = np.argsort(-scores, kind='stable')
+    for rank in range(1, len(order)):
+        index = order[rank]
+        if np.any(np.abs(positions[order[:rank]] - positions[index]) < min_gap):
+            values[index] *= 1.0 - diversity
+
+    capacity = int(target_duration / resolution)
+    costs = np.ceil(lengths / resolution).astype(np.int64)
+    best = np.zeros(capacity + 1)
+    taken = np.zeros((len(highlights), capacity + 1), dtype=bool)
+    for index, (cost, value) in enumerate(zip(costs, values)):
+        if cost <= 0 or cost > capacity or value <= 0:
+            continue
+        candidate = best[:capacity + 1 - cost] + value
+        improved = candidate > best[cost:]
+        taken[index, cost:] = improved
+        best[cost:] = np.where(improved, candidate, best[cost:])
+
+    selected = []
+    remaining = capacity
+    for index in range(len(highlights) - 1, -1, -1):
+        if taken[index, remaining]:
+            selected.append(index)
+            remaining -= costs[index]
+    if not selected:
+        # Nothing fits: the best highlight alone beats an empty reel
+        return [int(order[0])]
+    return sorted(selected)
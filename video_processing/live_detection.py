@@ -0,0 +1,242 @@
+import asyncio
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from .highlight_detection import HighlightDetector, HighlightTracker
+
+class LatestFrameGrabber:
+    def __init__(self, source: str, realtime: bool = False):
+        """
+        Continuously read a stream in a background thread, keeping only the newest frame.
+
+        Frames that arrive while the consumer is busy are overwritten, which is how
+        the live detector drops frames to stay within its latency budget.
+
+        Args:
+            source (str): RTSP/HLS URL, video file or pipe readable by cv2.VideoCapture
+            realtime (bool): Pace reading at the stream frame rate (for replaying files)
+        """
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open stream: {source}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.realtime = realtime
+
+        self.condition = threading.Condition()
+        self.latest: Optional[Tuple[np.ndarray, float, float]] = None
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.finished = False
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> 'LatestFrameGrabber':
+        """Start the reader thread."""
+        self.thread.start()
+        return self
+
+    def _run(self) -> None:
+        start_wall = time.monotonic()
+        try:
+            while not self.stopped.is_set():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+
+                stream_time = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+                if stream_time <= 0:
+                    stream_time = self.frames_read / self.fps
+
+                if self.realtime:
+                    delay = start_wall + stream_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                with self.condition:
+                    if self.latest is not None:
+                        self.frames_dropped += 1
+                    self.latest = (frame, stream_time, time.monotonic())
+                    self.frames_read += 1
+                    self.condition.notify()
+        finally:
+            self.cap.release()
+            with self.condition:
+                self.finished = True
+                self.condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[np.ndarray, float, float]]:
+        """
+        Take the newest unread frame, waiting for one if necessary.
+
+        Args:
+            timeout (Optional[float]): Maximum time to wait in seconds
+
+        Returns:
+            Optional[Tuple[np.ndarray, float, float]]: Frame, stream timestamp and capture
+                wall time, or None once the stream has ended
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.latest is not None or self.finished, timeout)
+            item, self.latest = self.latest, None
+            return item
+
+    def stop(self) -> None:
+        """Stop reading and wait for the reader thread."""
+        self.stopped.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+
+class LiveHighlightDetector:
+    def __init__(self,
+                 detector: HighlightDetector,
+                 latency_budget: float = 1.0,
+                 min_confidence: float = 0.5,
+                 min_duration: float = 2.0,
+                 analyze_faces: bool = True):
+        """
+        Real-time highlight detection on a live stream.
+
+        Args:
+            detector (HighlightDetector): Detector providing the per-frame analysis
+            latency_budget (float): Target end-to-end latency from capture to event in seconds
+            min_confidence (float): Minimum confidence threshold
+            min_duration (float): Minimum duration for a highlight in seconds
+            analyze_faces (bool): Whether to analyze faces when within the latency budget
+        """
+        self.detector = detector
+        self.latency_budget = latency_budget
+        self.min_confidence = min_confidence
+        self.min_duration = min_duration
+        self.analyze_faces = analyze_faces
+
+    def run(self,
+            source: str,
+            on_event: Callable[[Dict[str, Any]], None],
+            realtime: bool = False,
+            stop_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Process a stream until it ends or stop_event is set, emitting highlight events.
+
+        Events are dicts with 'type' ('highlight_start' or 'highlight_end'),
+        'timestamp' (stream time) and 'latency' (seconds from capture to emit).
+        End events also carry 'accepted' and, if accepted, the 'highlight'.
+
+        Args:
+            source (str): RTSP/HLS URL, video file or pipe readable by cv2.VideoCapture
+            on_event (Callable[[Dict[str, Any]], None]): Called for each event
+            realtime (bool): Pace reading at the stream frame rate (for replaying files)
+            stop_event (Optional[threading.Event]): Set to stop processing
+
+        Returns:
+            Dict[str, Any]: Stream statistics (frames read, analyzed and dropped, max latency)
+        """
+        grabber = LatestFrameGrabber(source, realtime).start()
+        tracker = HighlightTracker(self.min_duration)
+        frames_analyzed = 0
+        max_latency = 0.0
+        analyze_faces = self.analyze_faces
+
+        try:
+            while stop_event is None or not stop_event.is_set():
+                item = grabber.get(timeout=0.5)
+                if item is None:
+                    if grabber.finished:
+                        break
+                    continue
+                frame, timestamp, captured_at = item
+
+                results, important_detections, face_analysis = self.detector.analyze_frame(
+                    frame, self.min_confidence, analyze_faces
+                )
+                is_highlight = self.detector.is_highlight_frame(important_detections, face_analysis, False)
+
+                was_open = tracker.current_highlight is not None
+                kept = len(tracker.highlights)
+                tracker.update(
+                    timestamp,
+                    is_highlight,
+                    self.detector.describe_detections(results, important_detections) if is_highlight else [],
+                    face_analysis,
+                    False
+                )
+                frames_analyzed += 1
+
+                latency = time.monotonic() - captured_at
+                max_latency = max(max_latency, latency)
+                if not was_open and tracker.current_highlight is not None:
+                    on_event({'type': 'highlight_start', 'timestamp': timestamp, 'latency': latency})
+                elif was_open and tracker.current_highlight is None:
+                    self._emit_end(on_event, tracker, kept, timestamp, latency)
+
+                # Face analysis is the optional half of the per-frame cost: drop it
+                # while over budget and restore it once there is headroom again
+                if self.analyze_faces:
+                    if latency > self.latency_budget:
+                        analyze_faces = False
+                    elif latency < self.latency_budget / 2:
+                        analyze_faces = True
+        finally:
+            grabber.stop()
+
+        if tracker.current_highlight is not None:
+            kept = len(tracker.highlights)
+            end_time = tracker.current_highlight.end_time
+            tracker.finish()
+            self._emit_end(on_event, tracker, kept, end_time, 0.0)
+
+        return {
+            'frames_read': grabber.frames_read,
+            'frames_analyzed': frames_analyzed,
+            'frames_dropped': grabber.frames_dropped,
+            'max_latency': max_latency
+        }
+
+    def _emit_end(self,
+                  on_event: Callable[[Dict[str, Any]], None],
+                  tracker: HighlightTracker,
+                  kept: int,
+                  timestamp: float,
+                  latency: float) -> None:
+        """Emit the end event of the highlight the tracker just closed."""
+        accepted = len(tracker.highlights) > kept
+        event = {'type': 'highlight_end', 'timestamp': timestamp, 'latency': latency, 'accepted': accepted}
+        if accepted:
+            event['highlight'] = tracker.highlights[-1]
+        on_event(event)
+
+    async def events(self, source: str, realtime: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async iterator over highlight events of a stream.
+
+        The blocking detection loop runs in the default executor; leaving the
+        iteration early stops it.
+
+        Args:
+            source (str): RTSP/HLS URL, video file or pipe readable by cv2.VideoCapture
+            realtime (bool): Pace reading at the stream frame rate (for replaying files)
+
+        Yields:
+            Dict[str, Any]: Highlight events as emitted by run()
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop_event = threading.Event()
+
+        def emit(event: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        future = loop.run_in_executor(None, self.run, source, emit, realtime, stop_event)
+        future.add_done_callback(lambda _: queue.put_nowait(None))
+
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    break
+                yield event
+            await future
+        finally:
+            stop_event.set()
@@ -0,0 +1,272 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils import profiling
+from .audio_analyzer import AudioAnalyzer
+
+
+def audio_envelope(audio_data: np.ndarray, sample_rate: int, rate: int) -> np.ndarray:
+    """
+    Decimate audio to a standardized onset envelope.
+
+    The envelope is the positive change in log RMS energy per 1/rate seconds,
+    which keeps the transients recordings of the same event share while
+    discarding level and microphone colouring.
+
+    Args:
+        audio_data (np.ndarray): Mono audio
+        sample_rate (int): Audio sample rate
+        rate (int): Envelope rate in Hz
+
+    Returns:
+        np.ndarray: Zero-mean, unit-variance float32 envelope
+    """
+    hop = max(1, sample_rate // rate)
+    count = len(audio_data) // hop
+    if count < 2:
+        return np.zeros(count, dtype=np.float32)
+
+    frames = audio_data[:count * hop].reshape(count, hop)
+    energy = np.log1p(1000.0 * np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)))
+    envelope = np.maximum(np.diff(energy, prepend=energy[0]), 0.0)
+    return ((envelope - envelope.mean()) / (envelope.std() + 1e-9)).astype(np.float32)
+
+
+def cross_correlate(reference: np.ndarray,
+                    other: np.ndarray,
+                    min_overlap: int = 1) -> Tuple[int, float]:
+    """
+    Find the lag of other against reference with an FFT cross-correlation.
+
+    Args:
+        reference (np.ndarray): Reference envelope
+        other (np.ndarray): Envelope to align
+        min_overlap (int): Minimum number of overlapping samples of a candidate lag
+
+    Returns:
+        Tuple[int, float]: Lag in samples (other[0] lines up with reference[lag]) and the
+            peak's confidence, in standard deviations of the correlation of unrelated audio
+    """
+    size = len(reference) + len(other) - 1
+    n = 1 << (size - 1).bit_length()
+    spectrum = np.fft.rfft(reference, n) * np.conj(np.fft.rfft(other, n))
+    circular = np.fft.irfft(spectrum, n)
+
+    # Lags -(len(other) - 1) .. len(reference) - 1, negative lags wrap around
+    correlation = np.concatenate((circular[n - len(other) + 1:], circular[:len(reference)]))
+    lags = np.arange(-len(other) + 1, len(reference))
+
+    # For unrelated standardized envelopes sum / sqrt(overlap) is roughly standard
+    # normal at every lag, so the peak value doubles as a significance score
+    overlap = np.minimum(lags + len(other), len(reference)) - np.maximum(lags, 0)
+    valid = overlap >= min_overlap
+    if not valid.any():
+        raise ValueError("Recordings are shorter than the minimum overlap")
+    scores = correlation[valid] / np.sqrt(overlap[valid])
+
+    best = int(np.argmax(scores))
+    return int(lags[valid][best]), float(scores[best])
+
+
+class MultiCamSync:
+    """
+    Align recordings of the same event on a common timeline by their audio.
+
+    Offsets are found coarse-to-fine: an FFT cross-correlation of low-rate onset
+    envelopes over the full recordings, then a search of a few coarse samples
+    around that lag on high-rate envelopes of an excerpt. Audio is decoded once
+    at a low sample rate, so hours of footage align in seconds.
+    """
+
+    def __init__(self,
+                 sample_rate: int = 8000,
+                 coarse_rate: int = 50,
+                 fine_rate: int = 1000,
+                 min_overlap: float = 10.0,
+                 min_confidence: float = 8.0,
+                 refine_excerpt: float = 120.0,
+                 ffmpeg_path: str = "ffmpeg",
+                 cache_dir: Optional[str] = None):
+        """
+        Initialize the synchronizer.
+
+        Args:
+            sample_rate (int): Rate audio is decoded at
+            coarse_rate (int): Envelope rate of the full-length search in Hz
+            fine_rate (int): Envelope rate of the refinement in Hz
+            min_overlap (float): Minimum overlap in seconds of two aligned recordings
+            min_confidence (float): Peak confidence below which a recording counts as unsynced
+            refine_excerpt (float): Seconds of overlap used by the refinement
+            ffmpeg_path (str): Path to FFmpeg executable
+            cache_dir (Optional[str]): Directory to cache decoded audio in
+        """
+        if fine_rate > sample_rate // 2:
+            raise ValueError(f"fine_rate {fine_rate} Hz needs a sample rate of at least {2 * fine_rate} Hz")
+        self.analyzer = AudioAnalyzer(sample_rate, ffmpeg_path, cache_dir)
+        self.coarse_rate = coarse_rate
+        self.fine_rate = fine_rate
+        self.min_overlap = min_overlap
+        self.min_confidence = min_confidence
+        self.refine_excerpt = refine_excerpt
+
+    def envelopes(self, video_path: str) -> Dict[str, Any]:
+        """
+        Decode a recording's audio and compute its coarse and fine envelopes.
+
+        Args:
+            video_path (str): Path to the video file
+
+        Returns:
+            Dict[str, Any]: 'coarse' and 'fine' envelopes and 'duration' in seconds
+        """
+        audio_data, sample_rate = self.analyzer.extract_audio(video_path)
+        return {
+            'coarse': audio_envelope(audio_data, sample_rate, self.coarse_rate),
+            'fine': audio_envelope(audio_data, sample_rate, self.fine_rate),
+            'duration': len(audio_data) / sample_rate
+        }
+
+    def offset(self, reference: Dict[str, Any], other: Dict[str, Any]) -> Tuple[float, float]:
+        """
+        Offset of one recording against another.
+
+        Args:
+            reference (Dict[str, Any]): Envelopes of the reference recording
+            other (Dict[str, Any]): Envelopes of the recording to align
+
+        Returns:
+            Tuple[float, float]: Start of other on the reference timeline in seconds, and
+                the confidence of the coarse match
+        """
+        lag, confidence = cross_correlate(
+            reference['coarse'], other['coarse'], int(self.min_overlap * self.coarse_rate)
+        )
+
+        # Refine around the coarse lag on an excerpt of the overlap
+        scale = self.fine_rate // self.coarse_rate
+        ref_fine, other_fine = reference['fine'], other['fine']
+        center = lag * scale
+        overlap_start = max(center, 0)
+        overlap_end = min(len(ref_fine), center + len(other_fine))
+        excerpt = int(self.refine_excerpt * self.fine_rate)
+        mid = (overlap_start + overlap_end) // 2
+        start = max(overlap_start + scale, mid - excerpt // 2)
+        end = min(overlap_end - scale, mid + excerpt // 2)
+        if end - start < scale:
+            return lag / self.coarse_rate, confidence
+
+        segment = ref_fine[start:end]
+        candidates = np.arange(center - scale, center + scale + 1)
+        scores = [np.dot(segment, other_fine[start - candidate:end - candidate]) for candidate in candidates]
+        return float(candidates[int(np.argmax(scores))]) / self.fine_rate, confidence
+
+    @profiling.timed('multicam.align')
+    def align(self, video_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Place recordings on a common timeline.
+
+        The longest recording is the reference; the timeline starts at the
+        earliest synced recording. Recordings whose best match is below
+        min_confidence are reported as unsynced.
+
+        Args:
+            video_paths (List[str]): Recordings of the same event
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Per recording its 'offset' (start on the common
+                timeline in seconds, None if unsynced), 'duration', 'confidence' (None for
+                the reference) and 'synced'
+        """
+        envelopes = {path: self.envelopes(path) for path in video_paths}
+        reference = max(video_paths, key=lambda path: envelopes[path]['duration'])
+
+        alignment = {}
+        for path in video_paths:
+            if path == reference:
+                offset, confidence = 0.0, None
+            else:
+                try:
+                    offset, confidence = self.offset(envelopes[reference], envelopes[path])
+                except ValueError:
+                    offset, confidence = None, 0.0
+            synced = confidence is None or confidence >= self.min_confidence
+            alignment[path] = {
+                'offset': offset if synced else None,
+                'duration': envelopes[path]['duration'],
+                'confidence': confidence,
+                'synced': synced
+            }
+
+        origin = min(entry['offset'] for entry in alignment.values() if entry['synced'])
+        for entry in alignment.values():
+            if entry['synced']:
+                entry['offset'] -= origin
+        return alignment
+
+
+def angle_score(highlight: Dict[str, Any]) -> float:
+    """
+    How good a view of a moment a highlight is: its score, or for highlights
+    without one, detections per frame plus the share of frames with a positive
+    crowd reaction.
+
+    Args:
+        highlight (Dict[str, Any]): Highlight from detect_highlights
+
+    Returns:
+        float: Score, higher is better
+    """
+    if 'score' in highlight:
+        return highlight['score']
+    density = highlight.get('detection_count', 0) / max(highlight.get('frame_count', 1), 1)
+    reaction = highlight.get('avg_face_analysis', {}).get('positive_ratio', 0.0)
+    return density + reaction
+
+
+def select_angles(highlights: Dict[str, List[Dict[str, Any]]],
+                  alignment: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Pick one angle per moment across synced recordings.
+
+    Highlights of synced recordings that overlap on the common timeline are the
+    same moment; the one with the best angle_score is kept. Moments are
+    returned in timeline order, followed by the highlights of unsynced
+    recordings in their own order.
+
+    Args:
+        highlights (Dict[str, List[Dict[str, Any]]]): Highlights per recording
+        alignment (Dict[str, Dict[str, Any]]): Result of MultiCamSync.align
+
+    Returns:
+        List[Tuple[str, Dict[str, Any]]]: (recording, highlight) pairs to put in the reel
+    """
+    placed = []
+    unsynced = []
+    for path, video_highlights in highlights.items():
+        entry = alignment.get(path)
+        for highlight in video_highlights:
+            if entry is not None and entry['synced']:
+                placed.append((entry['offset'] + highlight['start_time'],
+                               entry['offset'] + highlight['end_time'], path, highlight))
+            else:
+                unsynced.append((path, highlight))
+    placed.sort(key=lambda item: item[0])
+
+    selected = []
+    moment_end = None
+    best = None
+    for start, end, path, highlight in placed:
+        if moment_end is not None and start < moment_end:
+            moment_end = max(moment_end, end)
+            if angle_score(highlight) > angle_score(best[1]):
+                best = (path, highlight)
+            continue
+        if best is not None:
+            selected.append(best)
+        moment_end = end
+        best = (path, highlight)
+    if best is not None:
+        selected.append(best)
+
+    return selected + unsynced
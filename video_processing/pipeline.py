@@ -0,0 +1,540 @@
+import asyncio
+import contextvars
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from src.utils.video_utils import get_video_duration
+from utils import profiling
+from utils.memory import MemoryBudget, MemorySampler
+from .highlight_detection import HighlightDetector
+from .highlight_ranking import select_highlights
+from .multicam_sync import MultiCamSync, select_angles
+from .reel_generator import ReelGenerator
+
+# Share of the overall progress taken by each stage
+STAGE_WEIGHTS = {
+    'analyze': 0.7,
+    'extract': 0.1,
+    'merge': 0.15,
+    'captions': 0.025,
+    'title': 0.025
+}
+
+PER_VIDEO_STAGES = ('analyze', 'extract')
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+async def run_ffmpeg(command: List[str],
+                     duration: Optional[float] = None,
+                     on_progress: Optional[Callable[[float], None]] = None) -> None:
+    """
+    Run an FFmpeg command as an asyncio subprocess.
+
+    Args:
+        command (List[str]): FFmpeg command, executable first
+        duration (Optional[float]): Expected output duration in seconds, used for progress
+        on_progress (Optional[Callable[[float], None]]): Called with the completed fraction (0-1)
+    """
+    command = [command[0], '-y', '-nostdin', '-nostats', '-progress', 'pipe:1', *command[1:]]
+    with profiling.timer('pipeline.ffmpeg'):
+        await _run_process(command, duration, on_progress)
+
+
+async def _run_process(command: List[str],
+                       duration: Optional[float],
+                       on_progress: Optional[Callable[[float], None]]) -> None:
+    """Run a prepared FFmpeg command, parsing its -progress output."""
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stderr = asyncio.ensure_future(process.stderr.read())
+
+    try:
+        async for line in process.stdout:
+            key, _, value = line.decode(errors='replace').strip().partition('=')
+            if key == 'out_time_us' and duration and on_progress:
+                try:
+                    on_progress(min(1.0, int(value) / 1e6 / duration))
+                except ValueError:
+                    # out_time_us is N/A until the first frame is written
+                    continue
+        returncode = await process.wait()
+    except asyncio.CancelledError:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, f"FFmpeg error: {(await stderr).decode(errors='replace')}")
+    await stderr
+
+
+class EventPipeline:
+    """
+    Asyncio orchestration of the full reel pipeline: detect highlights, extract
+    clips, merge, caption and title.
+
+    Videos are analyzed concurrently, with inference offloaded to a thread pool
+    and every FFmpeg step run as an asyncio subprocess. Progress is reported as
+    structured event dicts. Peak memory is sampled per stage, and an optional
+    memory budget is enforced during analysis. Recordings of the same event from
+    several cameras can be synced by their audio, so each moment appears once,
+    from its best angle. With a reel duration, only the best-scoring highlights
+    that fill it are cut.
+    """
+
+    def __init__(self,
+                 detector: Optional[HighlightDetector] = None,
+                 reel_generator: Optional[ReelGenerator] = None,
+                 max_concurrent_videos: int = 2,
+                 detector_options: Optional[Dict[str, Any]] = None,
+                 memory_budget: Optional[MemoryBudget] = None,
+                 sync: Optional[MultiCamSync] = None,
+                 executor: Optional[Executor] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            detector (Optional[HighlightDetector]): Highlight detector. Models are not thread-safe,
+                so without detector_options the videos take turns on it; otherwise it is
+                the detector of the first worker thread
+            reel_generator (Optional[ReelGenerator]): Builds the FFmpeg commands
+            max_concurrent_videos (int): Number of videos analyzed at the same time
+            detector_options (Optional[Dict[str, Any]]): HighlightDetector arguments; each
+                worker thread builds its own detector from them on first use
+            memory_budget (Optional[MemoryBudget]): RSS budget passed to detect_highlights
+                and checked before each video is analyzed
+            sync (Optional[MultiCamSync]): Aligns camera angles for run(sync_angles=True)
+            executor (Optional[Executor]): Runs inference and other blocking work (a thread
+                pool of max_concurrent_videos workers if None)
+        """
+        self.detector = detector
+        self.reel_generator = reel_generator or ReelGenerator()
+        self.max_concurrent_videos = max_concurrent_videos
+        self.detector_options = detector_options
+        self.memory_budget = memory_budget
+        self.sync = sync or MultiCamSync(ffmpeg_path=self.reel_generator.ffmpeg_path)
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_concurrent_videos)
+        self._detector_lock = threading.Lock()
+        self._thread_detectors = threading.local()
+        self._unclaimed = [detector] if detector is not None else []
+
+    def _detect_highlights(self, video_path: str, **detect_options) -> List[Dict[str, Any]]:
+        """Detect highlights on the detector of the calling worker thread."""
+        if self.detector is not None and self.detector_options is None:
+            # A given detector cannot be rebuilt, so concurrent videos take turns on it
+            with self._detector_lock:
+                return self.detector.detect_highlights(video_path, **detect_options)
+
+        detector = getattr(self._thread_detectors, 'detector', None)
+        if detector is None:
+            # Built one at a time, so model exports and loads do not race
+            with self._detector_lock:
+                if self._unclaimed:
+                    detector = self._unclaimed.pop()
+                else:
+                    detector = HighlightDetector(**(self.detector_options or {}))
+            self._thread_detectors.detector = detector
+        return detector.detect_highlights(video_path, **detect_options)
+
+    async def analyze_video(self,
+                            video_path: str,
+                            clip_dir: str,
+                            report: Callable[..., None],
+                            detect_options: Optional[Dict[str, Any]] = None,
+                            memory: Optional[MemorySampler] = None,
+                            extract: bool = True) -> Dict[str, Any]:
+        """
+        Detect the highlights of one video and cut them into clips.
+
+        Args:
+            video_path (str): Path to input video
+            clip_dir (str): Directory to write the clips to
+            report (Callable[..., None]): Progress reporter, called as
+                report(stage, status, progress, video=...)
+            detect_options (Optional[Dict[str, Any]]): Arguments passed to detect_highlights
+            memory (Optional[MemorySampler]): Sampler attributing peak memory to the stages
+            extract (bool): Cut the clips (otherwise 'clips' is empty, see extract_clips)
+
+        Returns:
+            Dict[str, Any]: Highlights, clip paths and per-stage timings of the video
+        """
+        loop = asyncio.get_running_loop()
+        timings = {}
+        memory = memory or MemorySampler()
+        detect_options = dict(detect_options or {})
+        if self.memory_budget is not None:
+            detect_options.setdefault('memory_budget', self.memory_budget)
+            self.memory_budget.enforce('analyze')
+
+        report('analyze', 'started', 0.0, video=video_path)
+        started = time.perf_counter()
+
+        def on_progress(percent: int) -> None:
+            loop.call_soon_threadsafe(lambda: report('analyze', 'progress', percent / 100, video=video_path))
+
+        # Run in a copy of the context so profiling jobs see the inference metrics
+        context = contextvars.copy_context()
+        with memory.stage('analyze'):
+            highlights = await loop.run_in_executor(
+                self.executor,
+                context.run,
+                lambda: self._detect_highlights(video_path, progress_callback=on_progress, **detect_options)
+            )
+        timings['analyze'] = time.perf_counter() - started
+        report('analyze', 'finished', 1.0, video=video_path)
+
+        result = {'highlights': highlights, 'clips': [], 'timings': timings}
+        if extract:
+            result['clips'] = await self.extract_clips(video_path, highlights, clip_dir, report, timings)
+        return result
+
+    async def extract_clips(self,
+                            video_path: str,
+                            highlights: List[Dict[str, Any]],
+                            clip_dir: str,
+                            report: Callable[..., None],
+                            timings: Dict[str, float]) -> List[str]:
+        """
+        Cut highlights out of a video.
+
+        Args:
+            video_path (str): Path to input video
+            highlights (List[Dict[str, Any]]): Highlights to cut
+            clip_dir (str): Directory to write the clips to
+            report (Callable[..., None]): Progress reporter
+            timings (Dict[str, float]): Per-stage timings of the video, 'extract' is set
+
+        Returns:
+            List[str]: Clip paths, one per highlight
+        """
+        report('extract', 'started', 0.0, video=video_path)
+        started = time.perf_counter()
+        Path(clip_dir).mkdir(parents=True, exist_ok=True)
+        clips = []
+        for i, highlight in enumerate(highlights):
+            clip_path = os.path.join(clip_dir, f"highlight_{i + 1}.mp4")
+            command = self.reel_generator.extract_clip_command(
+                video_path, clip_path, highlight['start_time'], highlight['end_time']
+            )
+            await run_ffmpeg(command)
+            clips.append(clip_path)
+            report('extract', 'progress', (i + 1) / len(highlights), video=video_path)
+        timings['extract'] = time.perf_counter() - started
+        report('extract', 'finished', 1.0, video=video_path)
+        return clips
+
+    async def run(self,
+                  video_paths: List[str],
+                  output_file: str,
+                  title: Optional[str] = None,
+                  captions: Optional[List[Dict[str, Any]]] = None,
+                  progress_callback: Optional[ProgressCallback] = None,
+                  detect_options: Optional[Dict[str, Any]] = None,
+                  work_dir: Optional[str] = None,
+                  sync_angles: bool = False,
+                  reel_duration: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run the full pipeline and write the reel.
+
+        Progress events are dicts with 'stage', 'status' ('started', 'progress',
+        'finished' or 'failed'), 'video' (None for reel-level stages), 'progress'
+        (0-1 within the stage), 'overall' (0-1 for the whole run) and 'elapsed'
+        (seconds since the run started). The callback runs on the event loop thread.
+
+        Videos without any highlight are used whole, except with a reel_duration:
+        they are then left out (or, if no video has one, the reel is the opening
+        of the first video). With sync_angles the videos
+        are camera angles of one event: they are aligned by audio, overlapping
+        highlights become one moment cut from the best angle, and moments are
+        ordered along the common timeline (see select_angles). With reel_duration
+        the highlights are ranked by score and a set spread over the timeline that
+        fills the duration is picked (see select_highlights). In both cases only
+        the selected clips are cut.
+
+        Args:
+            video_paths (List[str]): Input videos, in reel order
+            output_file (str): Output reel file
+            title (Optional[str]): Title screen text (no title screen if None)
+            captions (Optional[List[Dict[str, Any]]]): Captions with 'text', 'start_time' and 'end_time'
+            progress_callback (Optional[ProgressCallback]): Called with each progress event
+            detect_options (Optional[Dict[str, Any]]): Arguments passed to detect_highlights
+            work_dir (Optional[str]): Directory for intermediate clips (a temporary one if None)
+            sync_angles (bool): Treat the videos as synced camera angles of one event
+            reel_duration (Optional[float]): Length in seconds the highlights should fill
+                (all highlights if None)
+
+        Returns:
+            Dict[str, Any]: Output file, per-video results (with their 'alignment' when
+                syncing angles and the 'selected' highlights with a reel_duration),
+                per-stage timings and 'memory' (peak RSS of the run and per stage, see
+                MemorySampler.report)
+        """
+        if not video_paths:
+            raise ValueError("No input videos")
+
+        run_start = time.perf_counter()
+        stages = list(PER_VIDEO_STAGES) + ['merge']
+        if captions:
+            stages.append('captions')
+        if title:
+            stages.append('title')
+        total_weight = sum(STAGE_WEIGHTS[stage] for stage in stages)
+        stage_progress: Dict[tuple, float] = {}
+
+        def report(stage: str, status: str, progress: float, video: Optional[str] = None) -> None:
+            stage_progress[(stage, video)] = progress
+            overall = 0.0
+            for (done_stage, done_video), value in stage_progress.items():
+                weight = STAGE_WEIGHTS[done_stage] / total_weight
+                if done_video is not None:
+                    weight /= len(video_paths)
+                overall += weight * value
+            if progress_callback:
+                progress_callback({
+                    'stage': stage,
+                    'status': status,
+                    'video': video,
+                    'progress': progress,
+                    'overall': min(1.0, overall),
+                    'elapsed': time.perf_counter() - run_start
+                })
+
+        semaphore = asyncio.Semaphore(self.max_concurrent_videos)
+        sync_angles = sync_angles and len(video_paths) > 1
+
+        with MemorySampler() as memory, tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+            async def analyze(index: int, video_path: str) -> Dict[str, Any]:
+                async with semaphore:
+                    try:
+                        return await self.analyze_video(
+                            video_path, os.path.join(tmp_dir, f"video_{index}"), report, detect_options, memory,
+                            extract=not sync_angles and reel_duration is None
+                        )
+                    except Exception:
+                        report('analyze', 'failed', 0.0, video=video_path)
+                        raise
+
+            results = await asyncio.gather(*(analyze(i, path) for i, path in enumerate(video_paths)))
+
+            if sync_angles:
+                clips, duration = await self._synced_clips(video_paths, results, tmp_dir, report, reel_duration)
+            else:
+                if reel_duration is not None:
+                    await self._selected_clips(video_paths, results, tmp_dir, report, reel_duration)
+                clips, duration = await self._clips(video_paths, results)
+
+            timings = {}
+            with memory.stage('merge'):
+                current = await self._merge(clips, os.path.join(tmp_dir, 'merged.mp4'), duration, report, timings)
+
+            if captions:
+                with memory.stage('captions'):
+                    current = await self._timed_step(
+                        'captions', current, os.path.join(tmp_dir, 'captioned.mp4'), report, timings,
+                        lambda src, dst: self._captions(src, dst, captions)
+                    )
+            if title:
+                with memory.stage('title'):
+                    current = await self._timed_step(
+                        'title', current, os.path.join(tmp_dir, 'titled.mp4'), report, timings,
+                        lambda src, dst: self._title(src, dst, title)
+                    )
+
+            Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(current, output_file)
+
+        timings['total'] = time.perf_counter() - run_start
+        return {
+            'output_file': output_file,
+            'videos': dict(zip(video_paths, results)),
+            'timings': timings,
+            'memory': memory.report()
+        }
+
+    async def _clips(self,
+                     video_paths: List[str],
+                     results: List[Dict[str, Any]]) -> Tuple[List[str], float]:
+        """
+        Clips of every video in order, with videos without highlights used whole.
+
+        After _selected_clips only the selected highlights are used, so videos
+        without highlights do not blow the reel duration.
+        """
+        clips = []
+        duration = 0.0
+        for video_path, result in zip(video_paths, results):
+            if 'selected' in result or result['highlights']:
+                clips.extend(result['clips'])
+                duration += sum(h['end_time'] - h['start_time'] for h in result.get('selected', result['highlights']))
+            else:
+                clips.append(video_path)
+                duration += await asyncio.get_running_loop().run_in_executor(
+                    self.executor, get_video_duration, video_path
+                )
+        return clips, duration
+
+    async def _selected_clips(self,
+                              video_paths: List[str],
+                              results: List[Dict[str, Any]],
+                              clip_root: str,
+                              report: Callable[..., None],
+                              reel_duration: float) -> None:
+        """Pick the highlights of all videos that fill the reel and cut only those."""
+        loop = asyncio.get_running_loop()
+        candidates = []
+        positions = []
+        offset = 0.0
+        for video_path, result in zip(video_paths, results):
+            for highlight in result['highlights']:
+                candidates.append(highlight)
+                positions.append(offset + highlight['start_time'])
+            if result['highlights']:
+                offset += await loop.run_in_executor(self.executor, get_video_duration, video_path)
+        chosen = {id(candidates[i]) for i in select_highlights(candidates, reel_duration, positions)}
+        for result in results:
+            result['selected'] = [highlight for highlight in result['highlights'] if id(highlight) in chosen]
+        if not candidates:
+            # No highlight anywhere: the opening of the first video fills the reel
+            duration = await loop.run_in_executor(self.executor, get_video_duration, video_paths[0])
+            results[0]['selected'] = [{'start_time': 0.0, 'end_time': min(reel_duration, duration)}]
+
+        async def extract(index: int, video_path: str, result: Dict[str, Any]) -> None:
+            result['clips'] = await self.extract_clips(
+                video_path, result['selected'], os.path.join(clip_root, f"video_{index}"), report, result['timings']
+            )
+
+        await asyncio.gather(*(extract(i, path, result)
+                               for i, (path, result) in enumerate(zip(video_paths, results))))
+
+    async def _synced_clips(self,
+                            video_paths: List[str],
+                            results: List[Dict[str, Any]],
+                            clip_root: str,
+                            report: Callable[..., None],
+                            reel_duration: Optional[float] = None) -> Tuple[List[str], float]:
+        """Align the angles, pick one per moment and cut only the picked clips."""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        alignment = await loop.run_in_executor(self.executor, context.run, self.sync.align, video_paths)
+        selected = select_angles(
+            {path: result['highlights'] for path, result in zip(video_paths, results)}, alignment
+        )
+        if reel_duration is not None and selected:
+            # Unsynced recordings follow the common timeline
+            timeline_end = max(entry['offset'] + entry['duration'] for entry in alignment.values() if entry['synced'])
+            positions = [(alignment[path]['offset'] if alignment[path]['synced'] else timeline_end)
+                         + highlight['start_time'] for path, highlight in selected]
+            kept = select_highlights([highlight for _, highlight in selected], reel_duration, positions)
+            selected = [selected[i] for i in kept]
+
+        clip_paths: Dict[int, str] = {}
+
+        async def extract(index: int, video_path: str, result: Dict[str, Any]) -> None:
+            result['alignment'] = alignment[video_path]
+            highlights = [highlight for path, highlight in selected if path == video_path]
+            if reel_duration is not None:
+                result['selected'] = highlights
+            clips = await self.extract_clips(
+                video_path, highlights, os.path.join(clip_root, f"video_{index}"), report, result['timings']
+            )
+            result['clips'] = clips
+            for highlight, clip in zip(highlights, clips):
+                clip_paths[id(highlight)] = clip
+
+        await asyncio.gather(*(extract(i, path, result)
+                               for i, (path, result) in enumerate(zip(video_paths, results))))
+
+        if not selected:
+            # No highlight from any angle: use the longest recording whole
+            reference = max(video_paths, key=lambda path: alignment[path]['duration'])
+            return [reference], alignment[reference]['duration']
+        clips = [clip_paths[id(highlight)] for _, highlight in selected]
+        return clips, sum(h['end_time'] - h['start_time'] for _, h in selected)
+
+    async def _merge(self,
+                     clips: List[str],
+                     output_file: str,
+                     duration: float,
+                     report: Callable[..., None],
+                     timings: Dict[str, float]) -> str:
+        """Concatenate the clips into one video."""
+        report('merge', 'started', 0.0)
+        started = time.perf_counter()
+        concat_list = self.reel_generator.write_concat_list(clips)
+        try:
+            await run_ffmpeg(
+                self.reel_generator.merge_command(concat_list, output_file),
+                duration or None,
+                lambda fraction: report('merge', 'progress', fraction)
+            )
+        except Exception:
+            report('merge', 'failed', 0.0)
+            raise
+        finally:
+            os.unlink(concat_list)
+        timings['merge'] = time.perf_counter() - started
+        report('merge', 'finished', 1.0)
+        return output_file
+
+    async def _timed_step(self,
+                          stage: str,
+                          input_file: str,
+                          output_file: str,
+                          report: Callable[..., None],
+                          timings: Dict[str, float],
+                          step: Callable[[str, str], Awaitable[None]]) -> str:
+        """Run one reel-level step with progress events and timing."""
+        report(stage, 'started', 0.0)
+        started = time.perf_counter()
+        try:
+            await step(input_file, output_file)
+        except Exception:
+            report(stage, 'failed', 0.0)
+            raise
+        timings[stage] = time.perf_counter() - started
+        report(stage, 'finished', 1.0)
+        return output_file
+
+    async def _captions(self, input_file: str, output_file: str, captions: List[Dict[str, Any]]) -> None:
+        """Burn captions into the reel."""
+        srt_file = self.reel_generator.write_srt(captions)
+        try:
+            await run_ffmpeg(self.reel_generator.caption_command(input_file, output_file, srt_file))
+        finally:
+            os.unlink(srt_file)
+
+    async def _title(self, input_file: str, output_file: str, title: str) -> None:
+        """Prepend a title screen to the reel."""
+        title_file = f"{output_file}.title.mp4"
+        await run_ffmpeg(self.reel_generator.title_command(title_file, title))
+        concat_list = self.reel_generator.write_concat_list([title_file, input_file])
+        try:
+            await run_ffmpeg(self.reel_generator.concat_copy_command(concat_list, output_file))
+        finally:
+            os.unlink(concat_list)
+            os.unlink(title_file)
+
+    def run_sync(self, *args, **kwargs) -> Dict[str, Any]:
+        """
+        Blocking wrapper around run for callers without an event loop
+        (the Streamlit app, scripts).
+
+        Returns:
+            Dict[str, Any]: Result of run
+        """
+        return asyncio.run(self.run(*args, **kwargs))
+
+    def close(self) -> None:
+        """Shut down the inference thread pool."""
+        self.executor.shutdown(wait=True)
@@ -5,17 +5,21 @@ import json
 import requests
 from pathlib import Path
 import tempfile
+from utils import profiling
 
 class ReelGenerator:
-    def __init__(self, ffmpeg_path: str = "ffmpeg"):
+    def __init__(self, ffmpeg_path: str = "ffmpeg", threads: int = 0):
         """
         Initialize the reel generator.
         
         Args:
             ffmpeg_path (str): Path to FFmpeg executable
+            threads (int): Encoder threads per FFmpeg process (0 lets FFmpeg decide)
         """
         self.ffmpeg_path = ffmpeg_path
+        self.threads = threads
         
+    @profiling.timed('reel.merge_clips')
     def merge_clips(self, 
                    input_files: List[str],
                    output_file: str,
@@ -33,11 +37,7 @@ class ReelGenerator:
         Returns:
             str: Path to the merged video file
         """
-        # Create a temporary file for the concat list
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            for input_file in input_files:
-                f.write(f"file '{input_file}'\n")
-            concat_list = f.name
+        concat_list = self.write_concat_list(input_files)
         
         try:
             # Get total duration of input files
@@ -60,18 +60,7 @@ class ReelGenerator:
                     total_duration += 10.0  # Assume 10 seconds if duration can't be determined
             
             # Merge clips with transitions
-            command = [
-                self.ffmpeg_path,
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', concat_list,
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                '-strict', 'experimental',
-                '-b:a', '192k',
-                '-pix_fmt', 'yuv420p',
-                output_file
-            ]
+            command = self.merge_command(concat_list, output_file)
             
             process = subprocess.Popen(
                 command,
@@ -114,6 +103,7 @@ class ReelGenerator:
             # Clean up temporary file
             os.unlink(concat_list)
     
+    @profiling.timed('reel.add_captions')
     def add_captions(self,
                     input_file: str,
                     output_file: str,
@@ -135,27 +125,11 @@ class ReelGenerator:
         Returns:
             str: Path to the output video file
         """
-        # Create a temporary file for the captions
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.srt', delete=False) as f:
-            for i, caption in enumerate(captions, 1):
-                start_time = self._format_timestamp(caption['start_time'])
-                end_time = self._format_timestamp(caption['end_time'])
-                f.write(f"{i}\n{start_time} --> {end_time}\n{caption['text']}\n\n")
-            srt_file = f.name
+        srt_file = self.write_srt(captions)
         
         try:
-            # Build FFmpeg command
-            command = [
-                self.ffmpeg_path,
-                '-i', input_file,
-                '-vf', f"subtitles={srt_file}:force_style='FontSize={font_size},PrimaryColour=&H{font_color}'",
-                '-c:a', 'copy',
-                output_file
-            ]
-            
-            if font_file:
-                command[3] = f"subtitles={srt_file}:force_style='FontSize={font_size},PrimaryColour=&H{font_color},FontName={font_file}'"
-            
+            command = self.caption_command(input_file, output_file, srt_file,
+                                           font_size, font_color, font_file)
             subprocess.run(command, check=True)
             return output_file
             
@@ -163,6 +137,7 @@ class ReelGenerator:
             # Clean up temporary file
             os.unlink(srt_file)
     
+    @profiling.timed('reel.apply_vintage_filter')
     def apply_vintage_filter(self,
                            input_file: str,
                            output_file: str,
@@ -211,6 +186,7 @@ class ReelGenerator:
         
         return output_file
     
+    @profiling.timed('reel.add_title_screen')
     def add_title_screen(self,
                         input_file: str,
                         output_file: str,
@@ -235,41 +211,201 @@ class ReelGenerator:
             str: Path to the output video file
         """
         # Create title screen
-        title_command = [
-            self.ffmpeg_path,
-            '-f', 'lavfi',
-            '-i', f'color=c={background_color}:s=1920x1080:d={duration}',
-            '-vf', f"drawtext=text='{title}':fontsize={font_size}:fontcolor={font_color}:x=(w-text_w)/2:y=(h-text_h)/2",
-            '-c:v', 'libx264',
-            '-t', str(duration),
-            'title.mp4'
-        ]
-        
-        subprocess.run(title_command, check=True)
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            title_file = f.name
+        concat_list = None
         
         try:
-            # Concatenate title screen with main video
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-                f.write("file 'title.mp4'\n")
-                f.write(f"file '{input_file}'\n")
-                concat_list = f.name
+            subprocess.run(self.title_command(title_file, title, duration, background_color,
+                                              font_size, font_color), check=True)
             
-            merge_command = [
-                self.ffmpeg_path,
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', concat_list,
-                '-c', 'copy',
-                output_file
-            ]
-            
-            subprocess.run(merge_command, check=True)
+            # Concatenate title screen with main video
+            concat_list = self.write_concat_list([title_file, input_file])
+            subprocess.run(self.concat_copy_command(concat_list, output_file), check=True)
             return output_file
             
         finally:
             # Clean up temporary files
-            os.unlink('title.mp4')
-            os.unlink(concat_list)
+            os.unlink(title_file)
+            if concat_list:
+                os.unlink(concat_list)
+    
+    def write_concat_list(self, input_files: List[str]) -> str:
+        """
+        Write an FFmpeg concat demuxer list to a temporary file.
+        
+        Args:
+            input_files (List[str]): Files to concatenate, in order
+        
+        Returns:
+            str: Path to the list file (the caller removes it)
+        """
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
+            for input_file in input_files:
+                escaped = os.path.abspath(input_file).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+            return f.name
+    
+    def write_srt(self, captions: List[Dict[str, Any]]) -> str:
+        """
+        Write captions to a temporary SRT file.
+        
+        Args:
+            captions (List[Dict[str, Any]]): List of caption dictionaries with 'text', 'start_time', and 'end_time'
+        
+        Returns:
+            str: Path to the SRT file (the caller removes it)
+        """
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.srt', delete=False) as f:
+            for i, caption in enumerate(captions, 1):
+                start_time = self._format_timestamp(caption['start_time'])
+                end_time = self._format_timestamp(caption['end_time'])
+                f.write(f"{i}\n{start_time} --> {end_time}\n{caption['text']}\n\n")
+            return f.name
+    
+    def extract_clip_command(self,
+                             input_file: str,
+                             output_file: str,
+                             start_time: float,
+                             end_time: float) -> List[str]:
+        """
+        Build the FFmpeg command that cuts one clip out of a video.
+        
+        Args:
+            input_file (str): Source video file
+            output_file (str): Output clip file
+            start_time (float): Clip start in seconds
+            end_time (float): Clip end in seconds
+        
+        Returns:
+            List[str]: FFmpeg command
+        """
+        return [
+            self.ffmpeg_path,
+            '-y',
+            '-ss', f"{start_time:.3f}",
+            '-i', input_file,
+            '-t', f"{end_time - start_time:.3f}",
+            '-c:v', 'libx264',
+            '-preset', 'veryfast',
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            '-threads', str(self.threads),
+            output_file
+        ]
+    
+    def merge_command(self, concat_list: str, output_file: str) -> List[str]:
+        """
+        Build the FFmpeg command that re-encodes a concat list into one video.
+        
+        Args:
+            concat_list (str): Concat demuxer list file
+            output_file (str): Output video file
+        
+        Returns:
+            List[str]: FFmpeg command
+        """
+        return [
+            self.ffmpeg_path,
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_list,
+            '-c:v', 'libx264',
+            '-c:a', 'aac',
+            '-strict', 'experimental',
+            '-b:a', '192k',
+            '-pix_fmt', 'yuv420p',
+            '-threads', str(self.threads),
+            output_file
+        ]
+    
+    def concat_copy_command(self, concat_list: str, output_file: str) -> List[str]:
+        """
+        Build the FFmpeg command that concatenates a list without re-encoding.
+        
+        Args:
+            concat_list (str): Concat demuxer list file
+            output_file (str): Output video file
+        
+        Returns:
+            List[str]: FFmpeg command
+        """
+        return [
+            self.ffmpeg_path,
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_list,
+            '-c', 'copy',
+            output_file
+        ]
+    
+    def caption_command(self,
+                        input_file: str,
+                        output_file: str,
+                        srt_file: str,
+                        font_size: int = 24,
+                        font_color: str = "white",
+                        font_file: Optional[str] = None) -> List[str]:
+        """
+        Build the FFmpeg command that burns captions into a video.
+        
+        Args:
+            input_file (str): Input video file
+            output_file (str): Output video file
+            srt_file (str): SRT captions file
+            font_size (int): Font size for captions
+            font_color (str): Font color
+            font_file (Optional[str]): Path to custom font file
+        
+        Returns:
+            List[str]: FFmpeg command
+        """
+        style = f"FontSize={font_size},PrimaryColour=&H{font_color}"
+        if font_file:
+            style += f",FontName={font_file}"
+        return [
+            self.ffmpeg_path,
+            '-i', input_file,
+            '-vf', f"subtitles={srt_file}:force_style='{style}'",
+            '-c:a', 'copy',
+            '-threads', str(self.threads),
+            output_file
+        ]
+    
+    def title_command(self,
+                      output_file: str,
+                      title: str,
+                      duration: float = 3.0,
+                      background_color: str = "black",
+                      font_size: int = 48,
+                      font_color: str = "white") -> List[str]:
+        """
+        Build the FFmpeg command that renders a title screen clip.
+        
+        Args:
+            output_file (str): Output clip file
+            title (str): Title text
+            duration (float): Duration of title screen in seconds
+            background_color (str): Background color
+            font_size (int): Font size
+            font_color (str): Font color
+        
+        Returns:
+            List[str]: FFmpeg command
+        """
+        return [
+            self.ffmpeg_path,
+            '-y',
+            '-f', 'lavfi',
+            '-i', f'color=c={background_color}:s=1920x1080:d={duration}',
+            '-vf', f"drawtext=text='{title}':fontsize={font_size}:fontcolor={font_color}:x=(w-text_w)/2:y=(h-text_h)/2",
+            '-c:v', 'libx264',
+            '-t', str(duration),
+            '-threads', str(self.threads),
+            output_file
+        ]
     
     def _format_timestamp(self, seconds: float) -> str:
         """Convert seconds to SRT timestamp format."""